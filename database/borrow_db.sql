@@ -18,12 +18,59 @@ USE borrow_db;
 --     returned_at DATETIME NULL COMMENT '实际归还时间',
 --     remark VARCHAR(255) NULL COMMENT '备注信息',
 --     created_at DATETIME NOT NULL COMMENT '创建时间',
---     updated_at DATETIME NOT NULL COMMENT '更新时间',
---     INDEX idx_user_id (user_id),
---     INDEX idx_material_id (material_id),
---     INDEX idx_status (status)
+--     updated_at DATETIME(6) NOT NULL COMMENT '更新时间（微秒精度，用于 ETag）',
+--     INDEX idx_user_status_created (user_id, status, created_at),
+--     INDEX idx_material_status_created (material_id, status, created_at),
+--     INDEX idx_user_created (user_id, created_at),
+--     INDEX idx_material_created (material_id, created_at),
+--     INDEX idx_status_created (status, created_at),
+--     INDEX idx_status_due (status, due_at),
+--     INDEX idx_created_at_id (created_at, id)
 -- ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='借用记录表';
 
+-- CREATE TABLE IF NOT EXISTS material_status_outbox (
+--     id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '事件ID',
+--     material_id BIGINT NOT NULL COMMENT '物资ID',
+--     material_status SMALLINT NOT NULL COMMENT '目标物资状态: 0-可用, 1-借出中',
+--     borrow_record_id BIGINT NULL COMMENT '触发事件的借用记录ID',
+--     status SMALLINT NOT NULL DEFAULT 0 COMMENT '投递状态: 0-待投递, 1-已投递, 2-投递失败, 3-已被后续事件覆盖',
+--     attempts INT NOT NULL DEFAULT 0 COMMENT '已尝试投递次数',
+--     next_attempt_at DATETIME NOT NULL COMMENT '下次投递时间',
+--     last_error VARCHAR(255) NULL COMMENT '最近一次投递错误',
+--     created_at DATETIME NOT NULL COMMENT '创建时间',
+--     updated_at DATETIME NOT NULL COMMENT '更新时间',
+--     INDEX idx_outbox_status_next_attempt (status, next_attempt_at),
+--     INDEX idx_outbox_material_status (material_id, status)
+-- ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='物资状态变更发件箱';
+
+-- CREATE TABLE IF NOT EXISTS sweeper_watermarks (
+--     name VARCHAR(64) PRIMARY KEY COMMENT '扫描任务名称',
+--     position_at DATETIME(6) NULL COMMENT '已处理到的时间位置（微秒精度）',
+--     position_id BIGINT NOT NULL DEFAULT 0 COMMENT '已处理到的记录ID',
+--     processed BIGINT NOT NULL DEFAULT 0 COMMENT '累计处理记录数',
+--     updated_at DATETIME NOT NULL COMMENT '更新时间'
+-- ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='后台扫描任务水位线';
+
+-- CREATE TABLE IF NOT EXISTS borrow_user_stats (
+--     user_id BIGINT PRIMARY KEY COMMENT '用户ID',
+--     active_count INT NOT NULL DEFAULT 0 COMMENT '借出中记录数',
+--     total_count INT NOT NULL DEFAULT 0 COMMENT '借用记录总数',
+--     INDEX idx_user_stats_active (active_count)
+-- ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户借用统计';
+
+-- CREATE TABLE IF NOT EXISTS borrow_material_stats (
+--     material_id BIGINT PRIMARY KEY COMMENT '物资ID',
+--     borrow_count INT NOT NULL DEFAULT 0 COMMENT '被借用次数',
+--     active_count INT NOT NULL DEFAULT 0 COMMENT '借出中记录数',
+--     INDEX idx_material_stats_borrow (borrow_count)
+-- ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='物资借用统计';
+
+-- CREATE TABLE IF NOT EXISTS borrow_daily_stats (
+--     stat_date DATE PRIMARY KEY COMMENT '统计日期',
+--     borrowed_count INT NOT NULL DEFAULT 0 COMMENT '当日借出数',
+--     returned_count INT NOT NULL DEFAULT 0 COMMENT '当日归还数'
+-- ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='每日借出/归还量统计';
+
 -- 插入测试数据（可选）
 -- INSERT INTO borrow_records (user_id, material_id, quantity, status, borrowed_at, due_at, remark, created_at, updated_at)
 -- VALUES 
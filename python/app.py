@@ -1,19 +1,48 @@
-from flask import Flask
+import os
+from flask import Flask, Response
 from flask_cors import CORS
 from flasgger import Swagger
 from config import Config
 from models import db
-from routes_borrows import borrows_bp
+from routes_borrows import borrows_bp, user_client, material_client, outbox_dispatcher, response_cache
+from services.http_transport import get_transport
+from services.circuit_breaker import breaker_stats
+from services import metrics, query_profiler, db_pool
+from services.overdue import OverdueSweeper
+from utils.json_codec import FastJSONProvider
+from utils import compression
 
 # 创建 Flask 应用
 app = Flask(__name__)
 
 # 加载配置
 app.config.from_object(Config)
+
+# 数据库连接池参数（开启监控指标时使用记录等待耗时和借出连接数的连接池）
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_pool.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
+# 响应 JSON 编码（orjson 可用时使用 orjson）
+app.json = FastJSONProvider(app)
 
 # 启用 CORS
 CORS(app)
 
+# 请求、下游调用及数据库语句耗时指标
+if Config.METRICS_ENABLED:
+    metrics.init_app(app)
+    metrics.instrument_database()
+
+# 每个请求的 SQL 语句数/耗时、慢查询日志及疑似 N+1 查询告警
+if Config.QUERY_PROFILING_ENABLED:
+    query_profiler.init_app(app)
+
+# 响应压缩（按 Accept-Encoding 协商，小响应和 304 不压缩，流式导出逐块压缩）
+if Config.COMPRESSION_ENABLED:
+    compression.init_app(app)
+
+# 逾期借用扫描器（提醒等处理逻辑通过 overdue_sweeper.add_listener 注册）
+overdue_sweeper = OverdueSweeper()
+
 # 初始化 Swagger 文档
 swagger_template = {
     "swagger": "2.0",
@@ -76,6 +105,57 @@ swagger_template = {
                 "remark": {"type": "string"}
             }
         },
+        "BorrowBatchCreateRequest": {
+            "type": "object",
+            "required": ["items"],
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "items": {"$ref": "#/definitions/BorrowCreateRequest"}
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["allOrNothing", "bestEffort"],
+                    "default": "allOrNothing",
+                    "description": "allOrNothing-任一条目失败则整体不生效, bestEffort-逐条处理"
+                }
+            }
+        },
+        "BorrowBatchReturnRequest": {
+            "type": "object",
+            "required": ["ids"],
+            "properties": {
+                "ids": {
+                    "type": "array",
+                    "items": {"type": "integer", "format": "int64"}
+                },
+                "returnedAt": {"type": "string", "format": "date-time"},
+                "remark": {"type": "string"}
+            }
+        },
+        "BorrowBatchItemResult": {
+            "type": "object",
+            "properties": {
+                "index": {"type": "integer", "description": "条目在请求中的下标"},
+                "id": {"type": "integer", "format": "int64", "description": "借用记录ID（仅批量归还）"},
+                "success": {"type": "boolean"},
+                "code": {"type": "integer"},
+                "message": {"type": "string"},
+                "data": {"$ref": "#/definitions/BorrowRecord"}
+            }
+        },
+        "BorrowBatchResult": {
+            "type": "object",
+            "properties": {
+                "mode": {"type": "string"},
+                "succeeded": {"type": "integer"},
+                "failed": {"type": "integer"},
+                "results": {
+                    "type": "array",
+                    "items": {"$ref": "#/definitions/BorrowBatchItemResult"}
+                }
+            }
+        },
         "PagedBorrowResult": {
             "type": "object",
             "properties": {
@@ -85,7 +165,71 @@ swagger_template = {
                 },
                 "page": {"type": "integer"},
                 "pageSize": {"type": "integer"},
-                "total": {"type": "integer"}
+                "total": {"type": ["integer", "null"]},
+                "totalStrategy": {"type": "string", "enum": ["exact", "estimate", "none"], "description": "total 的统计策略"},
+                "nextCursor": {"type": ["string", "null"], "description": "游标分页模式下的下一页游标，无更多数据时为 null"}
+            }
+        },
+        "OverdueBorrowResult": {
+            "type": "object",
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "items": {
+                        "allOf": [
+                            {"$ref": "#/definitions/BorrowRecord"},
+                            {
+                                "type": "object",
+                                "properties": {
+                                    "overdueSeconds": {"type": "integer", "description": "截至 asOf 已逾期的秒数"}
+                                }
+                            }
+                        ]
+                    }
+                },
+                "pageSize": {"type": "integer"},
+                "asOf": {"type": "string", "format": "date-time"},
+                "nextCursor": {"type": ["string", "null"], "description": "下一页游标，无更多数据时为 null"}
+            }
+        },
+        "BorrowStats": {
+            "type": "object",
+            "properties": {
+                "users": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "userId": {"type": "integer", "format": "int64"},
+                            "activeCount": {"type": "integer", "description": "借出中记录数"},
+                            "totalCount": {"type": "integer", "description": "借用记录总数"}
+                        }
+                    }
+                },
+                "materials": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "materialId": {"type": "integer", "format": "int64"},
+                            "borrowCount": {"type": "integer", "description": "被借用次数"},
+                            "activeCount": {"type": "integer", "description": "借出中记录数"}
+                        }
+                    }
+                },
+                "daily": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "date": {"type": "string", "format": "date"},
+                            "borrowedCount": {"type": "integer"},
+                            "returnedCount": {"type": "integer"}
+                        }
+                    }
+                },
+                "topUsers": {"type": "array", "items": {"type": "object"}, "description": "借出中数量最多的用户"},
+                "topMaterials": {"type": "array", "items": {"type": "object"}, "description": "被借用次数最多的物资"}
             }
         },
         "BaseResponse": {
@@ -107,6 +251,28 @@ swagger_template = {
                 }
             ]
         },
+        "OverdueBorrowListResponse": {
+            "allOf": [
+                {"$ref": "#/definitions/BaseResponse"},
+                {
+                    "type": "object",
+                    "properties": {
+                        "data": {"$ref": "#/definitions/OverdueBorrowResult"}
+                    }
+                }
+            ]
+        },
+        "BorrowStatsResponse": {
+            "allOf": [
+                {"$ref": "#/definitions/BaseResponse"},
+                {
+                    "type": "object",
+                    "properties": {
+                        "data": {"$ref": "#/definitions/BorrowStats"}
+                    }
+                }
+            ]
+        },
         "BorrowListResponse": {
             "allOf": [
                 {"$ref": "#/definitions/BaseResponse"},
@@ -118,6 +284,17 @@ swagger_template = {
                 }
             ]
         },
+        "BorrowBatchResponse": {
+            "allOf": [
+                {"$ref": "#/definitions/BaseResponse"},
+                {
+                    "type": "object",
+                    "properties": {
+                        "data": {"$ref": "#/definitions/BorrowBatchResult"}
+                    }
+                }
+            ]
+        },
         "SimpleResponse": {
             "allOf": [
                 {"$ref": "#/definitions/BaseResponse"},
@@ -202,11 +379,164 @@ def health():
     }
 
 
+@app.route('/health/http-pool')
+def http_pool_stats():
+    """
+    下游服务 HTTP 连接池状态
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: 连接池配置及各下游主机的连接使用情况
+        schema:
+          type: object
+    """
+    return get_transport().stats()
+
+
+@app.route('/health/db-pool')
+def db_pool_stats():
+    """
+    数据库连接池状态
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: 连接池配置及常驻、空闲、借出、溢出连接数
+        schema:
+          type: object
+    """
+    return db_pool.pool_stats(db.engine)
+
+
+@app.route('/health/cache')
+def cache_stats():
+    """
+    下游数据本地缓存状态
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: 用户/物资缓存的命中、未命中、淘汰等计数
+        schema:
+          type: object
+    """
+    return {
+        'user': user_client.cache.stats(),
+        'material': material_client.cache.stats()
+    }
+
+
+@app.route('/health/response-cache')
+def response_cache_stats():
+    """
+    读接口响应缓存状态
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: 各路由的命中/未命中次数及命中率、失效次数、缓存条目数和占用字节数
+        schema:
+          type: object
+    """
+    return response_cache.stats()
+
+
+@app.route('/health/circuit-breakers')
+def circuit_breaker_stats():
+    """
+    下游服务熔断器状态
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: 各下游服务熔断器的状态（closed / open / half_open）、连续失败次数、剩余冷却时间及拒绝次数
+        schema:
+          type: object
+    """
+    return breaker_stats()
+
+
+@app.route('/health/outbox')
+def outbox_stats():
+    """
+    物资状态发件箱投递状态
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: 待投递/已投递/失败事件数量、最早待投递事件的等待时间及本进程投递计数
+        schema:
+          type: object
+    """
+    return outbox_dispatcher.stats()
+
+
+@app.route('/health/overdue-sweeper')
+def overdue_sweeper_stats():
+    """
+    逾期借用扫描状态
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: 扫描水位线位置、累计处理数及本进程发出的逾期事件数
+        schema:
+          type: object
+    """
+    return overdue_sweeper.stats()
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    监控指标（Prometheus 文本格式）
+    ---
+    tags:
+      - Health
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: 各路由请求数/耗时分布、处理中请求数、下游服务调用耗时/失败数及数据库语句耗时
+    """
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 # 创建数据库表
 with app.app_context():
     db.create_all()
     print("数据库表创建成功!")
+
+# 绑定物资状态发件箱投递器和逾期借用扫描器（后台线程只由服务入口启动，导入 app 的维护脚本不会启动）
+outbox_dispatcher.init_app(app)
+overdue_sweeper.init_app(app)
 
+
+def start_background_workers():
+    """
+    启动后台投递 / 扫描线程（由 python app.py 及 asgi.py 的 lifespan 调用）
+
+    多实例部署时可设置 OUTBOX_DISPATCHER_AUTOSTART=False，改为单独运行 outbox_dispatcher.py。
+    """
+    if Config.OUTBOX_DISPATCHER_AUTOSTART:
+        outbox_dispatcher.start()
+    if Config.OVERDUE_SWEEPER_AUTOSTART:
+        overdue_sweeper.start()
+
+
+def stop_background_workers(timeout=None):
+    """停止后台投递 / 扫描线程"""
+    outbox_dispatcher.stop(timeout)
+    overdue_sweeper.stop(timeout)
+
 
 if __name__ == '__main__':
     print(f"借用记录服务启动中...")
@@ -214,4 +544,7 @@ if __name__ == '__main__':
     print(f"数据库: {Config.SQLALCHEMY_DATABASE_URI}")
     print(f"用户服务: {Config.USER_SERVICE_BASE_URL}")
     print(f"物资服务: {Config.MATERIAL_SERVICE_BASE_URL}")
+    # DEBUG 模式下重载器的父进程只负责监视文件，后台线程只在实际处理请求的子进程中启动
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_workers()
     app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
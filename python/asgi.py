@@ -0,0 +1,390 @@
+"""
+异步 (ASGI) 服务入口
+借用列表、单条查询、创建、归还等需要等待下游服务的接口在事件循环上异步处理，
+其余接口（更新、删除、批量操作、健康检查、Swagger 文档）转交给原 Flask 应用处理，
+接口路径与响应格式与同步模式保持一致。
+
+启动方式:
+    uvicorn asgi:application --host 0.0.0.0 --port 8081 --workers 4
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.middleware import Middleware
+from starlette.routing import Route, Mount
+
+from app import app as flask_app, start_background_workers, stop_background_workers
+from config import Config
+from models import BorrowRecord, borrow_read_columns
+from routes_borrows import (
+    parse_create_fields, parse_list_args, parse_fields, parse_include, list_criteria, list_statement, page_statement, list_etag, cursor_page,
+    list_cache_key, enrichment_complete, cache_hit_response, cache_miss_response,
+    count_cache, response_cache, outbox_dispatcher,
+    user_client as sync_user_client, material_client as sync_material_client
+)
+from services.response_cache import borrow_dependency
+from services.async_clients import (
+    create_async_http_client, AsyncUserClient, AsyncMaterialClient, AsyncBorrowEnricher
+)
+from services import metrics, query_profiler, db_pool
+from services.circuit_breaker import CircuitOpenError
+from services.deadline import DeadlineExceeded, deadline_scope, parse_deadline_header
+from services.count_cache import record_key
+from services.outbox import outbox_events
+from services.stats import BorrowStatsDelta, stats_snapshot
+from utils import json_codec
+from utils.compression import CompressionMiddleware
+from utils.conditional import record_etag, has_validators, is_not_modified, validator_headers
+from utils.response import build_payload
+
+# 异步数据库会话
+engine = create_async_engine(
+    Config.ASYNC_SQLALCHEMY_DATABASE_URI, echo=Config.SQLALCHEMY_ECHO,
+    **db_pool.engine_options(Config.ASYNC_SQLALCHEMY_DATABASE_URI, async_engine=True)
+)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# 异步下游客户端（与同步客户端共享本地缓存）
+http_client = create_async_http_client()
+user_client = AsyncUserClient(http_client, cache=sync_user_client.cache)
+material_client = AsyncMaterialClient(http_client, cache=sync_material_client.cache)
+enricher = AsyncBorrowEnricher(user_client, material_client)
+
+# 正在后台刷新的估算总数
+_refreshing_counts = set()
+_background_tasks = set()
+
+
+class ApiResponse(JSONResponse):
+    """与 Flask 应用一致的 JSON 编码"""
+
+    def render(self, content):
+        return json_codec.dumps(content)
+
+
+def respond(code=200, message="success", data=None):
+    """统一响应格式封装"""
+    payload, status = build_payload(code=code, message=message, data=data)
+    return ApiResponse(payload, status_code=status)
+
+
+def raw_response(body, status, headers):
+    """由 (body, status, headers) 构造响应（body 为已序列化的响应体）"""
+    return Response(body, status_code=status, headers=headers, media_type='application/json' if body else None)
+
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _count_statement(key):
+    user_id, material_id, status = key
+    return select(func.count(BorrowRecord.id)).where(*list_criteria({
+        'user_id': user_id,
+        'material_id': material_id,
+        'status': status,
+        'cursor_position': None
+    }))
+
+
+async def _refresh_count(key):
+    try:
+        async with Session() as session:
+            count_cache.put(key, await session.scalar(_count_statement(key)))
+    finally:
+        _refreshing_counts.discard(key)
+
+
+async def _estimate_total(session, params):
+    """估算总数：与同步模式共享缓存，过期时在事件循环上后台刷新"""
+    key = (params['user_id'], params['material_id'], params['status'])
+    value, fresh = count_cache.lookup(key)
+
+    if value is None:
+        value = await session.scalar(_count_statement(key))
+        count_cache.put(key, value)
+    elif not fresh and key not in _refreshing_counts:
+        _refreshing_counts.add(key)
+        task = asyncio.create_task(_refresh_count(key))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    return value
+
+
+async def list_borrows(request):
+    """查询借用列表（支持过滤和分页）"""
+    try:
+        params, error = parse_list_args(request.query_params)
+        if error:
+            return respond(400, error)
+
+        page = params['page']
+        page_size = params['page_size']
+        total_strategy = params['total_strategy']
+        conditional = not (params['include_user'] or params['include_material'])
+
+        # 响应缓存：命中时不访问数据库（代数须在查询之前读取）
+        cached, cache_token = response_cache.lookup('/borrows', *list_cache_key(params))
+        if cached is not None:
+            return raw_response(*cache_hit_response(cached, request.headers))
+
+        async with Session() as session:
+            total = None
+            if params['cursor'] is None:
+                if total_strategy == 'exact':
+                    total = await session.scalar(_count_statement(
+                        (params['user_id'], params['material_id'], params['status'])
+                    ))
+                elif total_strategy == 'estimate':
+                    total = await _estimate_total(session, params)
+
+            # 条件请求：先只查询本页各记录的 (id, updated_at)，未变化时直接返回 304
+            if conditional and has_validators(request.headers):
+                versions = (await session.execute(page_statement(
+                    select(BorrowRecord.id, BorrowRecord.updated_at).where(*list_criteria(params)), params
+                ))).all()
+                etag = list_etag(params, versions, total)
+                if is_not_modified(request.headers, etag):
+                    return Response(status_code=304, headers=validator_headers(etag))
+
+            records = (await session.execute(page_statement(list_statement(params), params))).all()
+
+        etag = list_etag(params, records, total) if conditional else None
+        if params['cursor'] is not None:
+            records, next_cursor = cursor_page(records, page_size)
+            data = {
+                'pageSize': page_size,
+                'nextCursor': next_cursor
+            }
+        else:
+            data = {
+                'page': page,
+                'pageSize': page_size,
+                'total': total,
+                'totalStrategy': total_strategy
+            }
+
+        items = await enricher.enrich(
+            records,
+            include_user=params['include_user'],
+            include_material=params['include_material'],
+            fields=params['fields']
+        )
+
+        return raw_response(*cache_miss_response(
+            cache_token, {'items': items, **data}, etag,
+            ttl=response_cache.ttl_for(params['include_user'], params['include_material']),
+            cacheable=enrichment_complete(items, params['include_user'], params['include_material'])
+        ))
+
+    except Exception as e:
+        return respond(500, f"查询借用列表失败: {str(e)}")
+
+
+async def get_borrow(request):
+    """查询单条借用记录"""
+    try:
+        record_id = request.path_params['id']
+        fields, error = parse_fields(request.query_params)
+        if error:
+            return respond(400, error)
+        include_user, include_material = parse_include(request.query_params, fields)
+        conditional = not (include_user or include_material)
+
+        # 响应缓存：命中时不访问数据库（代数须在查询之前读取）
+        cached, cache_token = response_cache.lookup(
+            '/borrows/<int:id>', (record_id, include_user, include_material, fields), [borrow_dependency(record_id)]
+        )
+        if cached is not None:
+            return raw_response(*cache_hit_response(cached, request.headers))
+
+        async with Session() as session:
+            # 条件请求：只查询 updated_at 判断是否变化，未变化时不加载整行
+            if conditional and has_validators(request.headers):
+                updated_at = await session.scalar(
+                    select(BorrowRecord.updated_at).where(BorrowRecord.id == record_id)
+                )
+                if updated_at is None:
+                    return respond(404, "借用记录不存在")
+                etag = record_etag(record_id, updated_at)
+                if is_not_modified(request.headers, etag, updated_at):
+                    return Response(status_code=304, headers=validator_headers(etag, updated_at))
+
+            record = (await session.execute(
+                select(*borrow_read_columns(fields)).where(BorrowRecord.id == record_id)
+            )).first()
+        if not record:
+            return respond(404, "借用记录不存在")
+
+        items = await enricher.enrich(
+            [record], include_user=include_user, include_material=include_material, fields=fields
+        )
+        return raw_response(*cache_miss_response(
+            cache_token, items[0],
+            record_etag(record.id, record.updated_at) if conditional else None,
+            record.updated_at if conditional else None,
+            ttl=response_cache.ttl_for(include_user, include_material),
+            cacheable=enrichment_complete(items, include_user, include_material)
+        ))
+
+    except Exception as e:
+        return respond(500, f"查询借用记录失败: {str(e)}")
+
+
+async def create_borrow(request):
+    """创建借用记录（借出）"""
+    try:
+        data = await _read_json(request)
+        if not data:
+            return respond(400, "请求体不能为空")
+
+        fields, error = parse_create_fields(data)
+        if error:
+            return respond(400, error)
+
+        # 1/2. 在请求时间预算内并发验证用户存在、物资存在且可用（物资使用严格模式）
+        upstream_budget = parse_deadline_header(request.headers.get(Config.DEADLINE_HEADER))
+        with deadline_scope(Config.CREATE_BORROW_DEADLINE, upstream_budget) as deadline:
+            try:
+                user, material_data = await asyncio.wait_for(asyncio.gather(
+                    user_client.get_user(fields['user_id']),
+                    material_client.get_material(fields['material_id'], strict=True)
+                ), timeout=deadline.remaining())
+            except (asyncio.TimeoutError, DeadlineExceeded):
+                return respond(504, "用户或物资服务响应超时")
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if deadline.expired:
+                    return respond(504, "用户或物资服务响应超时")
+                return respond(500, f"调用依赖服务失败: {str(e)}")
+        if user is None:
+            return respond(404, "用户不存在")
+        if material_data is None:
+            return respond(404, "物资不存在")
+        is_available = material_data.get('materialStatus') == 0
+
+        async with Session() as session:
+            # 物资服务状态由发件箱异步更新，以本地借出中记录为准防止重复借出
+            if not is_available or await session.scalar(select(BorrowRecord.id).where(
+                BorrowRecord.material_id == fields['material_id'],
+                BorrowRecord.status == BorrowRecord.STATUS_BORROWED
+            ).limit(1)) is not None:
+                return respond(409, "物资当前不可借出")
+
+            # 3. 创建借用记录，并在同一事务中写入物资状态变更事件
+            borrow_record = BorrowRecord(
+                status=BorrowRecord.STATUS_BORROWED,
+                borrowed_at=datetime.utcnow(),
+                **fields
+            )
+            session.add(borrow_record)
+            await session.flush()
+            session.add_all(outbox_events([(fields['material_id'], 1, borrow_record.id)]))
+            stats_delta = BorrowStatsDelta().add(after=stats_snapshot(borrow_record))
+            await session.run_sync(stats_delta.apply)
+            await session.commit()
+        outbox_dispatcher.notify()
+
+        count_cache.adjust(after=record_key(borrow_record))
+        response_cache.invalidate([(borrow_record.id, None, record_key(borrow_record))])
+        return respond(201, "创建借用记录成功", borrow_record.to_dict())
+
+    except CircuitOpenError as e:
+        return respond(503, f"依赖服务暂不可用: {str(e)}")
+    except Exception as e:
+        return respond(500, f"创建借用记录失败: {str(e)}")
+
+
+async def return_borrow(request):
+    """归还操作专用接口"""
+    try:
+        async with Session() as session:
+            record = await session.get(BorrowRecord, request.path_params['id'])
+            if not record:
+                return respond(404, "借用记录不存在")
+
+            if record.status != BorrowRecord.STATUS_BORROWED:
+                return respond(409, "借用记录当前状态不允许归还操作")
+
+            data = await _read_json(request) or {}
+            returned_at_str = data.get('returnedAt')
+            remark = data.get('remark')
+
+            # 设置归还时间
+            if returned_at_str:
+                try:
+                    record.returned_at = datetime.fromisoformat(returned_at_str.replace('Z', '+00:00'))
+                except ValueError:
+                    return respond(400, "returnedAt 时间格式不正确")
+            else:
+                record.returned_at = datetime.utcnow()
+
+            if remark is not None:
+                record.remark = remark
+
+            before_key = record_key(record)
+            before_stats = stats_snapshot(record)
+            record.status = BorrowRecord.STATUS_RETURNED
+            record.updated_at = datetime.utcnow()
+
+            # 物资状态更新为可用（与记录变更同事务写入发件箱）
+            session.add_all(outbox_events([(record.material_id, 0, record.id)]))
+            stats_delta = BorrowStatsDelta().add(before=before_stats, after=stats_snapshot(record))
+            await session.run_sync(stats_delta.apply)
+            await session.commit()
+        outbox_dispatcher.notify()
+
+        count_cache.adjust(before=before_key, after=record_key(record))
+        response_cache.invalidate([(record.id, before_key, record_key(record))])
+        return respond(200, "归还成功", record.to_dict())
+
+    except Exception as e:
+        return respond(500, f"归还操作失败: {str(e)}")
+
+
+def instrument(endpoint, route):
+    """原生路由请求指标及 SQL 统计（与 Flask 路由行为一致）"""
+    if Config.QUERY_PROFILING_ENABLED:
+        query_profiler.instrument_database()
+        endpoint = query_profiler.profile_route(endpoint)
+    if Config.METRICS_ENABLED:
+        metrics.instrument_database()
+        endpoint = metrics.observe_route(route)(endpoint)
+    return endpoint
+
+
+# 原生路由的响应压缩（只作用于原生路由，转交给 Flask 的接口由 Flask 应用自行压缩，两者使用相同的协商规则）
+native_middleware = [Middleware(CompressionMiddleware)] if Config.COMPRESSION_ENABLED else None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start_background_workers()
+    yield
+    stop_background_workers(timeout=5)
+    await http_client.aclose()
+    await engine.dispose()
+
+
+application = Starlette(
+    routes=[
+        Route('/borrows', instrument(list_borrows, '/borrows'), methods=['GET'], middleware=native_middleware),
+        Route('/borrows', instrument(create_borrow, '/borrows'), methods=['POST'], middleware=native_middleware),
+        Route('/borrows/{id:int}', instrument(get_borrow, '/borrows/<int:id>'), methods=['GET'],
+              middleware=native_middleware),
+        Route('/borrows/{id:int}/return', instrument(return_borrow, '/borrows/<int:id>/return'), methods=['POST'],
+              middleware=native_middleware),
+        # 其余接口由 Flask 应用在线程池中处理
+        Mount('/', app=WsgiToAsgi(flask_app))
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,146 @@
+"""
+响应压缩基准
+对一页包含用户/物资信息的列表响应（相当于 GET /borrows?pageSize=100&include=user,material）
+以及 NDJSON 流式导出，比较不压缩、gzip 各级别及 brotli（已安装时）的传输字节数、服务端耗时，
+并按给定链路带宽估算首字节到末字节的时间（time-to-last-byte = 服务端耗时 + 传输字节数 / 带宽）。
+
+响应经过实际的 Flask 压缩钩子（utils/compression.py），不需要数据库。
+
+用法（在 python/ 目录下运行）:
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --rows 100 --repeat 300 --bandwidth 10,100,1000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response
+from config import Config
+from models import BorrowRecord
+from utils import compression
+from utils.export import ndjson_stream
+from utils.json_codec import FastJSONProvider
+from utils.response import success_response
+
+EXPORT_FIELDS = ['id', 'userId', 'materialId', 'quantity', 'status', 'borrowedAt', 'dueAt', 'returnedAt', 'remark']
+
+
+def make_items(count):
+    """构造包含用户/物资信息的借用记录字典"""
+    now = datetime.utcnow()
+    items = []
+    for i in range(1, count + 1):
+        record = BorrowRecord(
+            id=i,
+            user_id=i % 20 + 1,
+            material_id=i,
+            quantity=1,
+            status=i % 3,
+            borrowed_at=now - timedelta(days=i),
+            due_at=now + timedelta(days=7),
+            returned_at=now if i % 3 == 1 else None,
+            remark=f'借用备注 {i}'
+        )
+        items.append(record.to_dict(
+            include_user=True,
+            include_material=True,
+            user_data={
+                'userId': record.user_id,
+                'username': f'user{record.user_id}',
+                'realName': f'用户{record.user_id}',
+                'department': '实验室管理中心',
+                'email': f'user{record.user_id}@example.com'
+            },
+            material_data={
+                'materialId': record.material_id,
+                'materialName': f'示波器 {record.material_id}',
+                'category': '电子测量仪器',
+                'location': '实验楼 A 座 301',
+                'materialStatus': 1
+            }
+        ))
+    return items
+
+
+def create_app(items, export_rows):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    compression.init_app(app)
+
+    @app.route('/list')
+    def list_page():
+        return success_response(data={
+            'items': items, 'page': 1, 'pageSize': len(items), 'total': 1000, 'totalStrategy': 'exact'
+        })
+
+    @app.route('/export')
+    def export():
+        rows = [
+            [index + 1] + [items[index % len(items)][field] for field in EXPORT_FIELDS[1:]]
+            for index in range(export_rows)
+        ]
+        batches = (rows[i:i + 1000] for i in range(0, len(rows), 1000))
+        return Response(ndjson_stream(EXPORT_FIELDS, batches), content_type='application/x-ndjson; charset=utf-8')
+
+    return app
+
+
+def measure(client, path, accept_encoding, repeat):
+    """
+    Returns:
+        tuple: (wire_bytes, median_server_seconds)
+    """
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        size = len(response.get_data())
+        timings.append(time.perf_counter() - started)
+    return size, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='响应压缩基准')
+    parser.add_argument('--rows', type=int, default=100, help='列表每页记录数')
+    parser.add_argument('--export-rows', type=int, default=20000, help='导出记录数')
+    parser.add_argument('--repeat', type=int, default=200, help='每种配置的请求次数（导出为其 1/20）')
+    parser.add_argument('--bandwidth', default='10,100,1000', help='估算传输时间的链路带宽（Mbps，逗号分隔）')
+    args = parser.parse_args()
+
+    bandwidths = [float(value) for value in args.bandwidth.split(',')]
+    app = create_app(make_items(args.rows), args.export_rows)
+    client = app.test_client()
+
+    variants = [('identity', None, None), ('gzip-1', 'gzip', 1), ('gzip-6', 'gzip', 6), ('gzip-9', 'gzip', 9)]
+    if compression.brotli is not None:
+        variants.append((f'br-{Config.COMPRESSION_BROTLI_QUALITY}', 'br', None))
+    Config.COMPRESSION_ENCODINGS = ['br', 'gzip']
+
+    for path, repeat in (('/list', args.repeat), ('/export', max(args.repeat // 20, 3))):
+        print(f"\n{path}  (列表 {args.rows} 条 / 导出 {args.export_rows} 条, Config.COMPRESSION_MIN_SIZE={Config.COMPRESSION_MIN_SIZE})")
+        header = f"{'encoding':<10} {'bytes':>10} {'ratio':>7} {'server ms':>10}"
+        header += ''.join(f" {f'TTLB@{bandwidth:g}Mbps':>16}" for bandwidth in bandwidths)
+        print(header)
+
+        identity_size = None
+        for name, encoding, level in variants:
+            if level is not None:
+                Config.COMPRESSION_LEVEL = level
+            size, seconds = measure(client, path, encoding, repeat)
+            identity_size = identity_size or size
+            line = f"{name:<10} {size:>10,} {identity_size / size:>6.1f}x {seconds * 1000:>10.2f}"
+            for bandwidth in bandwidths:
+                ttlb = seconds + size * 8 / (bandwidth * 1_000_000)
+                line += f" {ttlb * 1000:>14.2f}ms"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
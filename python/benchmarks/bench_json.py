@@ -0,0 +1,108 @@
+"""
+响应序列化微基准
+对比原序列化路径（to_dict 中逐字段 isoformat + Flask 默认 JSON 提供者）与当前路径
+（to_dict 保留 datetime + FastJSONProvider），数据为一页 100 条借用记录的列表响应。
+
+用法（在 python/ 目录下运行，不需要数据库）:
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --rows 100 --repeat 2000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from models import BorrowRecord
+from utils import json_codec
+from utils.json_codec import FastJSONProvider
+
+
+def make_records(count):
+    """构造未关联会话的借用记录"""
+    now = datetime.utcnow()
+    return [
+        BorrowRecord(
+            id=i,
+            user_id=i % 50 + 1,
+            material_id=i,
+            quantity=1,
+            status=i % 3,
+            borrowed_at=now - timedelta(days=i),
+            due_at=now + timedelta(days=7),
+            returned_at=now if i % 3 == 1 else None,
+            remark=f'借用备注 {i}'
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def legacy_to_dict(record):
+    """原 to_dict 实现（时间字段逐个 isoformat）"""
+    return {
+        'id': record.id,
+        'userId': record.user_id,
+        'materialId': record.material_id,
+        'quantity': record.quantity,
+        'status': record.status,
+        'statusText': record.STATUS_TEXT.get(record.status, '未知'),
+        'borrowedAt': record.borrowed_at.isoformat() if record.borrowed_at else None,
+        'dueAt': record.due_at.isoformat() if record.due_at else None,
+        'returnedAt': record.returned_at.isoformat() if record.returned_at else None,
+        'remark': record.remark
+    }
+
+
+def page_payload(items, timestamp):
+    return {
+        'code': 200,
+        'message': 'success',
+        'data': {'items': items, 'page': 1, 'pageSize': len(items), 'total': 1000, 'totalStrategy': 'exact'},
+        'timestamp': timestamp
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='响应序列化微基准')
+    parser.add_argument('--rows', type=int, default=100, help='每页记录数')
+    parser.add_argument('--repeat', type=int, default=2000, help='每种路径的执行次数')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    legacy_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+    records = make_records(args.rows)
+
+    def legacy():
+        payload = page_payload([legacy_to_dict(r) for r in records], datetime.utcnow().isoformat())
+        return legacy_provider.response(payload).get_data()
+
+    def current():
+        payload = page_payload([r.to_dict() for r in records], datetime.utcnow())
+        return fast_provider.response(payload).get_data()
+
+    # 两条路径的输出内容应一致（仅键顺序与非 ASCII 字符转义方式不同）
+    legacy_body = json_codec.loads(legacy())
+    current_body = json_codec.loads(current())
+    legacy_body.pop('timestamp')
+    current_body.pop('timestamp')
+    assert legacy_body == current_body, "序列化结果不一致"
+
+    with app.app_context():
+        results = {}
+        for name, func in (('legacy (isoformat + json)', legacy), (f'current ({json_codec.codec.name})', current)):
+            seconds = min(timeit.repeat(func, number=args.repeat, repeat=3))
+            results[name] = seconds
+            print(f"{name:<28} {seconds / args.repeat * 1e6:10.1f} us/page  "
+                  f"{args.rows * args.repeat / seconds:12,.0f} rows/s")
+
+    legacy_seconds, current_seconds = results.values()
+    print(f"加速比: {legacy_seconds / current_seconds:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
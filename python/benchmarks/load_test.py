@@ -0,0 +1,485 @@
+"""
+端到端压测
+启动下游服务替身（benchmarks/stub_services.py，进程内）和借用服务（独立进程，连接本地数据库），
+以固定并发（闭环，每个工作线程收到响应后立即发出下一个请求）执行读写混合负载，
+按接口输出吞吐量、错误数及 p50/p95/p99 延迟，并写入 JSON 结果文件，便于不同版本 / 配置之间对比。
+
+默认使用临时目录下的 SQLite 文件，每次运行重建表并写入测试数据；--database-uri 指定 MySQL 等数据库时
+只在传入 --reset 时重建表（会清空已有数据）。服务进程继承当前环境变量，可用于对比不同配置，例如:
+    RESPONSE_CACHE_ENABLED=False python benchmarks/load_test.py --output no-cache.json
+
+用法（在 python/ 目录下运行）:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --concurrency 32 --duration 60 --mix list=30,get=40,create=20,return=10
+    python benchmarks/load_test.py --stub-latency-ms 50 --stub-error-rate 0.05 --output results.json
+    python benchmarks/load_test.py --compare baseline.json
+    python benchmarks/load_test.py --target http://localhost:8081   # 压测已启动的服务（不启动服务、不写入数据）
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import requests
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+import stub_services
+
+DEFAULT_MIX = 'list=25,list_filtered=10,list_include=10,list_fields=5,get=30,create=10,return=10'
+
+
+class WorkloadState:
+    """工作线程共享的压测数据（已有记录 ID、借出中记录 ID、新建借用使用的物资 ID）"""
+
+    def __init__(self, ids, borrowed_ids, users):
+        self.ids = ids
+        self.borrowed = deque(borrowed_ids)
+        self.users = users
+        # 每次运行使用不同的物资 ID 区间，重复压测同一数据库时不会因物资已借出而失败
+        self.material_ids = itertools.count(int(time.time() * 1000))
+        self.lock = threading.Lock()
+
+    def next_material_id(self):
+        with self.lock:
+            return next(self.material_ids)
+
+    def take_borrowed(self):
+        try:
+            return self.borrowed.popleft()
+        except IndexError:
+            return None
+
+
+def op_list(session, base, state, rng):
+    return session.get(f'{base}/borrows', params={'page': rng.randint(1, 10), 'pageSize': 20})
+
+
+def op_list_filtered(session, base, state, rng):
+    return session.get(f'{base}/borrows', params={'userId': rng.randint(1, state.users), 'status': 0})
+
+
+def op_list_include(session, base, state, rng):
+    return session.get(f'{base}/borrows', params={
+        'page': rng.randint(1, 10), 'pageSize': 20, 'include': 'user,material'
+    })
+
+
+def op_list_fields(session, base, state, rng):
+    return session.get(f'{base}/borrows', params={
+        'page': rng.randint(1, 10), 'pageSize': 100, 'fields': 'id,status,dueAt'
+    })
+
+
+def op_get(session, base, state, rng):
+    return session.get(f'{base}/borrows/{rng.choice(state.ids)}')
+
+
+def op_create(session, base, state, rng):
+    response = session.post(f'{base}/borrows', json={
+        'userId': rng.randint(1, state.users),
+        'materialId': state.next_material_id(),
+        'dueAt': (datetime.utcnow() + timedelta(days=7)).isoformat(),
+        'remark': '压测借用'
+    })
+    if response.status_code == 201:
+        state.borrowed.append(response.json()['data']['id'])
+    return response
+
+
+def op_return(session, base, state, rng):
+    record_id = state.take_borrowed()
+    if record_id is None:
+        return None
+    return session.post(f'{base}/borrows/{record_id}/return', json={})
+
+
+# 接口名 -> 请求函数（返回 None 表示本次无可执行的请求，例如没有借出中的记录可归还）
+OPERATIONS = {
+    'list': op_list,
+    'list_filtered': op_list_filtered,
+    'list_include': op_list_include,
+    'list_fields': op_list_fields,
+    'get': op_get,
+    'create': op_create,
+    'return': op_return
+}
+
+
+def parse_mix(value):
+    """
+    解析负载配比
+
+    Args:
+        value: 例如 list=25,get=30,create=10
+
+    Returns:
+        dict: 接口名 -> 权重
+    """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"未知接口: {name}，可选 {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, p):
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return None
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(samples, seconds):
+    """
+    汇总延迟样本
+
+    Args:
+        samples: [(status, elapsed_seconds)]，请求异常时 status 为 'error'
+        seconds: 统计窗口时长（秒）
+
+    Returns:
+        dict: 请求数、吞吐量、错误数（异常或 5xx）、状态码分布及延迟百分位数（毫秒）
+    """
+    latencies = sorted(elapsed * 1000 for _, elapsed in samples)
+    statuses = {}
+    for status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(1 for status, _ in samples if status == 'error' or status >= 500)
+    return {
+        'requests': len(samples),
+        'throughput': round(len(samples) / seconds, 2),
+        'errors': errors,
+        'statuses': statuses,
+        'latencyMs': {
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'p50': round(percentile(latencies, 50), 3) if latencies else None,
+            'p95': round(percentile(latencies, 95), 3) if latencies else None,
+            'p99': round(percentile(latencies, 99), 3) if latencies else None,
+            'max': round(latencies[-1], 3) if latencies else None
+        }
+    }
+
+
+def worker(index, base, mix, state, measure_from, deadline, seed, results):
+    """闭环工作线程：按权重随机选择接口，只记录预热结束后发出的请求"""
+    rng = random.Random(seed + index)
+    names = list(mix)
+    weights = list(mix.values())
+    session = requests.Session()
+    samples = results[index] = []
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = OPERATIONS[name](session, base, state, rng)
+            if response is None:
+                continue
+            status = response.status_code
+        except Exception:
+            # 连接失败、响应体无法解析等均记为错误样本，不中断工作线程
+            status = 'error'
+        elapsed = time.perf_counter() - started
+        if started >= measure_from:
+            samples.append((name, status, elapsed))
+    session.close()
+
+
+def collect_ids(base, limit, params=None):
+    """按游标分页读取已有记录 ID（最多 limit 个）"""
+    ids = []
+    cursor = ''
+    while len(ids) < limit:
+        response = requests.get(f'{base}/borrows', params={
+            'cursor': cursor, 'pageSize': 100, 'fields': 'id', **(params or {})
+        })
+        response.raise_for_status()
+        data = response.json()['data']
+        ids.extend(item['id'] for item in data['items'])
+        cursor = data.get('nextCursor')
+        if not cursor:
+            break
+    return ids[:limit]
+
+
+def seed(rows, users):
+    """写入测试数据（显式指定主键，兼容 SQLite；约三分之一为借出中，其余已归还）"""
+    from models import db, BorrowRecord
+
+    now = datetime.utcnow()
+    batch = []
+    for i in range(1, rows + 1):
+        borrowed = i % 3 == 0
+        batch.append({
+            'id': i,
+            'user_id': i % users + 1,
+            'material_id': i,
+            'quantity': 1,
+            'status': BorrowRecord.STATUS_BORROWED if borrowed else BorrowRecord.STATUS_RETURNED,
+            'borrowed_at': now - timedelta(minutes=i),
+            'due_at': now + timedelta(days=7),
+            'returned_at': None if borrowed else now,
+            'remark': f'借用备注 {i}',
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now
+        })
+        if len(batch) == 5000:
+            db.session.execute(BorrowRecord.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(BorrowRecord.__table__.insert(), batch)
+    db.session.commit()
+
+
+def serve(args):
+    """服务进程：按参数配置数据库，可选重建并写入数据，然后以多线程 WSGI 服务器运行应用"""
+    import logging
+    from werkzeug.serving import make_server
+    from config import Config
+
+    Config.SQLALCHEMY_DATABASE_URI = args.database_uri
+    if args.database_uri.startswith('sqlite'):
+        from sqlalchemy import BigInteger
+        from sqlalchemy.ext.compiler import compiles
+
+        # SQLite 只有 INTEGER PRIMARY KEY 会自增
+        @compiles(BigInteger, 'sqlite')
+        def _bigint_as_integer(type_, compiler, **kw):
+            return 'INTEGER'
+
+        Config.SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS, connect_args={'timeout': 30})
+
+    from app import app, start_background_workers
+    from models import db
+
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+            db.create_all()
+            if args.database_uri.startswith('sqlite'):
+                db.session.execute(db.text('PRAGMA journal_mode=WAL'))
+            seed(args.rows, args.users)
+            from services.stats import rebuild_stats
+            rebuild_stats()
+
+            # 共享响应缓存文件中的条目和代数对应重建前的数据，一并删除
+            if Config.RESPONSE_CACHE_BACKEND == 'sqlite':
+                from services.response_cache import default_sqlite_path
+                cache_path = Config.RESPONSE_CACHE_SQLITE_PATH or default_sqlite_path()
+                for path in (cache_path, cache_path + '-wal', cache_path + '-shm'):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    # 后台投递 / 扫描线程在重建表和写入数据之后再启动，避免与 drop_all / create_all 竞争
+    start_background_workers()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, stub_url, database_uri, reset):
+    """启动服务进程并等待就绪"""
+    port = free_port()
+    command = [
+        sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port),
+        '--database-uri', database_uri, '--rows', str(args.rows), '--users', str(args.users)
+    ]
+    if reset:
+        command.append('--reset')
+    env = dict(os.environ, USER_SERVICE_BASE_URL=stub_url, MATERIAL_SERVICE_BASE_URL=stub_url)
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL)
+
+    base = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'服务进程启动失败（退出码 {process.returncode}）')
+        try:
+            requests.get(f'{base}/', timeout=1)
+            return process, base
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'服务进程 {args.startup_timeout} 秒内未就绪')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f"\n{'endpoint':<14} {'requests':>9} {'rps':>9} {'errors':>7} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(report['endpoints'].items()) + [('total', report['total'])]
+    for name, result in rows:
+        latency = result['latencyMs']
+        line = (f"{name:<14} {result['requests']:>9,} {result['throughput']:>9.1f} {result['errors']:>7,}"
+                + ''.join(f" {latency[key]:>9.2f}" if latency[key] is not None else f" {'-':>9}"
+                          for key in ('p50', 'p95', 'p99', 'max')))
+        print(line)
+
+    if baseline is None:
+        return
+    print(f"\n对比基线 {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})，正数表示变大")
+    print(f"{'endpoint':<14} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    baseline_rows = dict(baseline['endpoints'], total=baseline['total'])
+    for name, result in rows:
+        before = baseline_rows.get(name)
+        if before is None:
+            continue
+        line = f"{name:<14} {delta(before['throughput'], result['throughput']):>9}"
+        for key in ('p50', 'p95', 'p99'):
+            line += f" {delta(before['latencyMs'][key], result['latencyMs'][key]):>9}"
+        print(line)
+
+
+def delta(before, after):
+    if not before or after is None:
+        return '-'
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='借用服务端到端压测')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发工作线程数')
+    parser.add_argument('--duration', type=float, default=30, help='统计时长（秒，不含预热）')
+    parser.add_argument('--warmup', type=float, default=5, help='预热时长（秒，期间的请求不计入结果）')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='负载配比，接口名=权重，逗号分隔')
+    parser.add_argument('--rows', type=int, default=10000, help='写入的测试记录数')
+    parser.add_argument('--users', type=int, default=500, help='测试数据中的用户数')
+    parser.add_argument('--database-uri', help='服务使用的数据库，默认临时目录下的 SQLite 文件（每次重建）')
+    parser.add_argument('--reset', action='store_true', help='重建表并写入测试数据（会清空已有数据）')
+    parser.add_argument('--stub-latency-ms', type=float, default=5, help='下游服务替身平均延迟（毫秒）')
+    parser.add_argument('--stub-jitter-ms', type=float, default=2, help='下游服务替身延迟抖动（毫秒）')
+    parser.add_argument('--stub-error-rate', type=float, default=0, help='下游服务替身返回 500 的比例 0-1')
+    parser.add_argument('--target', help='压测已启动的服务（不启动服务和替身，不写入数据）')
+    parser.add_argument('--startup-timeout', type=float, default=60, help='等待服务进程就绪的时间（秒）')
+    parser.add_argument('--seed', type=int, default=1, help='随机数种子（相同种子产生相同的请求序列）')
+    parser.add_argument('--output', help='结果 JSON 文件路径')
+    parser.add_argument('--compare', help='基线结果 JSON 文件路径，输出与基线的差异')
+    # 以下参数仅供内部启动服务进程使用
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    mix = parse_mix(args.mix)
+    stub = process = None
+    database_uri = None
+    if args.target:
+        base = args.target.rstrip('/')
+    else:
+        stub = stub_services.start(
+            latency_ms=args.stub_latency_ms, jitter_ms=args.stub_jitter_ms, error_rate=args.stub_error_rate
+        )
+        stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+        database_uri = args.database_uri or 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'borrow_load_test.sqlite3')
+        reset = args.reset or not args.database_uri
+        print(f"启动服务: {database_uri}（{'重建并写入 ' + str(args.rows) + ' 条记录' if reset else '使用已有数据'}）")
+        process, base = start_server(args, stub_url, database_uri, reset)
+
+    try:
+        ids = collect_ids(base, 5000)
+        if not ids:
+            raise RuntimeError('目标服务没有借用记录，无法执行读负载（使用 --reset 写入测试数据）')
+        state = WorkloadState(ids, collect_ids(base, 5000, {'status': 0}), args.users)
+
+        print(f"压测 {base}: 并发 {args.concurrency}, 预热 {args.warmup:g}s, 统计 {args.duration:g}s, 配比 {args.mix}")
+        results = [None] * args.concurrency
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        deadline = measure_from + args.duration
+        threads = [
+            threading.Thread(target=worker, args=(
+                index, base, mix, state, measure_from, deadline, args.seed, results
+            ))
+            for index in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 以最后一个请求完成的时间为窗口终点（闭环负载中最后一批请求在截止时间之后返回）
+        seconds = max(time.perf_counter(), deadline) - measure_from
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if stub is not None:
+            stub.shutdown()
+
+    samples = [sample for worker_samples in results for sample in worker_samples]
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'target': args.target,
+            'database': database_uri,
+            'rows': None if args.target else args.rows,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'seconds': round(seconds, 3),
+            'mix': mix,
+            'seed': args.seed,
+            'stub': None if stub is None else {
+                'latencyMs': args.stub_latency_ms,
+                'jitterMs': args.stub_jitter_ms,
+                'errorRate': args.stub_error_rate,
+                'requests': stub.requests,
+                'errors': stub.errors
+            }
+        },
+        'endpoints': {
+            name: summarize([(status, elapsed) for op, status, elapsed in samples if op == name], seconds)
+            for name in mix
+        },
+        'total': summarize([(status, elapsed) for _, status, elapsed in samples], seconds)
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
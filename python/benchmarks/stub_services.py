@@ -0,0 +1,150 @@
+"""
+用户服务 / 物资服务替身（压测用）
+在同一个端口上提供借用服务依赖的下游接口，可配置响应延迟、抖动和错误率:
+
+    GET /users/<id>          -> {"code": 200, "data": {"userId": ..., ...}}
+    GET /materials/<id>      -> {"code": 200, "data": {"materialId": ..., "materialStatus": 0, ...}}
+    PUT /materials/<id>      -> {"code": 200, "data": null}
+
+物资始终返回可借出状态（materialStatus=0），结果只取决于请求参数，便于多次压测之间对比。
+
+用法（在 python/ 目录下运行，单独启动时将 USER_SERVICE_BASE_URL / MATERIAL_SERVICE_BASE_URL 指向该端口）:
+    python benchmarks/stub_services.py --port 8090 --latency-ms 20 --jitter-ms 5 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServiceHandler(BaseHTTPRequestHandler):
+    """下游服务替身请求处理（延迟、错误率由 server 上的配置决定）"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _respond(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _simulate(self):
+        """
+        模拟下游处理耗时和故障
+
+        Returns:
+            bool: 是否按配置的错误率返回 500
+        """
+        server = self.server
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        with server.lock:
+            server.requests += 1
+            failed = random.random() < server.error_rate
+            if failed:
+                server.errors += 1
+        if failed:
+            self._respond(500, {'code': 500, 'message': 'stub error', 'data': None})
+        return failed
+
+    def _parse_path(self):
+        """解析 /users/<id> 或 /materials/<id>，不匹配时返回 (None, None)"""
+        parts = self.path.split('?', 1)[0].strip('/').split('/')
+        if len(parts) == 2 and parts[0] in ('users', 'materials') and parts[1].isdigit():
+            return parts[0], int(parts[1])
+        return None, None
+
+    def do_GET(self):
+        resource, key = self._parse_path()
+        if resource is None:
+            return self._respond(404, {'code': 404, 'message': 'not found', 'data': None})
+        if self._simulate():
+            return
+        if resource == 'users':
+            data = {
+                'userId': key,
+                'username': f'user{key}',
+                'realName': f'压测用户{key}',
+                'department': '实验室管理中心',
+                'email': f'user{key}@example.com'
+            }
+        else:
+            data = {
+                'materialId': key,
+                'materialName': f'压测物资{key}',
+                'category': '电子测量仪器',
+                'location': '实验楼 A 座 301',
+                'materialStatus': 0
+            }
+        self._respond(200, {'code': 200, 'message': 'success', 'data': data})
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        resource, _ = self._parse_path()
+        if resource != 'materials':
+            return self._respond(404, {'code': 404, 'message': 'not found', 'data': None})
+        if self._simulate():
+            return
+        self._respond(200, {'code': 200, 'message': 'success', 'data': None})
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:  # 借用服务进程退出时连接池中的空闲连接被重置
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(host='127.0.0.1', port=0, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0):
+    """
+    在后台线程启动下游服务替身
+
+    Args:
+        host: 监听地址
+        port: 监听端口，0 表示随机端口
+        latency_ms: 平均响应延迟（毫秒）
+        jitter_ms: 延迟抖动（毫秒，均匀分布 ±jitter_ms）
+        error_rate: 返回 500 的比例 0-1
+
+    Returns:
+        ThreadingHTTPServer: 已启动的服务（server_address 为实际地址，requests / errors 为累计计数）
+    """
+    server = ThreadingHTTPServer((host, port), StubServiceHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000
+    server.jitter = jitter_ms / 1000
+    server.error_rate = error_rate
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.errors = 0
+    threading.Thread(target=server.serve_forever, name='stub-services', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用户服务 / 物资服务替身')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8090, help='监听端口')
+    parser.add_argument('--latency-ms', type=float, default=0, help='平均响应延迟（毫秒）')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='延迟抖动（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0, help='返回 500 的比例 0-1')
+    args = parser.parse_args()
+
+    server = start(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"下游服务替身已启动: http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
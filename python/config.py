@@ -29,12 +29,122 @@ class Config:
         "?charset=utf8mb4"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ECHO = DEBUG
+    SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'False').lower() == 'true'  # 输出全部 SQL（开销较大，仅本地排查时开启）
+    
+    # 数据库连接池: 常驻 DB_POOL_SIZE 个连接，突发时最多再开 DB_MAX_OVERFLOW 个，均被占用时等待 DB_POOL_TIMEOUT 秒后报错
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # 等待空闲连接的时间（秒）
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # 连接最长使用时间（秒），需小于 MySQL wait_timeout，-1 表示不回收
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'  # 借出连接前检测是否可用（避免 server has gone away）
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING
+    }
+    
+    # SQL 统计: 每个请求的语句数/耗时、慢查询日志、疑似 N+1 查询（同一语句形态重复执行）告警
+    QUERY_PROFILING_ENABLED = os.getenv('QUERY_PROFILING_ENABLED', 'True').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))  # 超过该耗时的语句记录警告日志
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', '5'))  # 同一请求内同一语句形态执行次数达到该值时告警
+    QUERY_DEBUG_HEADER = os.getenv('QUERY_DEBUG_HEADER', str(DEBUG)).lower() == 'true'  # 响应头输出 X-DB-Query-Count 等调试信息
+    
+    # 异步模式 (asgi.py) 使用的数据库连接
+    ASYNC_SQLALCHEMY_DATABASE_URI = (
+        f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        "?charset=utf8mb4"
+    )
     
     # 其他服务地址
     USER_SERVICE_BASE_URL = os.getenv('USER_SERVICE_BASE_URL', 'http://localhost:8083')
     MATERIAL_SERVICE_BASE_URL = os.getenv('MATERIAL_SERVICE_BASE_URL', 'http://localhost:8082')
     
+    # 下游服务 HTTP 连接池配置
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))  # 缓存的主机连接池数量
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))  # 每个主机最大连接数
+    HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', 'False').lower() == 'true'  # 连接耗尽时是否阻塞等待
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '2'))  # 建连超时（秒）
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '5'))  # 读取超时（秒）
+    HTTP_POOL_IDLE_TIMEOUT = float(os.getenv('HTTP_POOL_IDLE_TIMEOUT', '60'))  # 空闲连接回收时间（秒），0 表示不回收
+    
+    # 下游服务熔断: 连续失败达到阈值后打开，冷却期内直接拒绝调用，冷却结束后放行少量试探调用
+    CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'True').lower() == 'true'
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', '30'))  # 冷却时间（秒）
+    CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv('CIRCUIT_HALF_OPEN_MAX_CALLS', '1'))  # 半开状态允许的并发试探调用数
+    
+    # 请求时间预算: 下游调用的超时不超过剩余预算，并通过请求头把剩余预算（毫秒）传递给下游服务
+    CREATE_BORROW_DEADLINE = float(os.getenv('CREATE_BORROW_DEADLINE', '3'))  # 创建借用记录时校验用户/物资的总时间预算（秒）
+    DEADLINE_HEADER = os.getenv('DEADLINE_HEADER', 'X-Request-Timeout-Ms')
+    
+    # 下游数据本地缓存配置（TTL 单位：秒）
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '300'))
+    USER_CACHE_MAXSIZE = int(os.getenv('USER_CACHE_MAXSIZE', '10000'))
+    MATERIAL_CACHE_TTL = float(os.getenv('MATERIAL_CACHE_TTL', '30'))
+    MATERIAL_CACHE_MAXSIZE = int(os.getenv('MATERIAL_CACHE_MAXSIZE', '10000'))
+    CACHE_NEGATIVE_TTL = float(os.getenv('CACHE_NEGATIVE_TTL', '10'))  # 不存在(404)结果的缓存时间
+    
+    # 读接口响应缓存配置（GET /borrows/<id> 及列表，写操作提交后按代数失效）
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'sqlite')  # sqlite（同一主机多 worker 共享）/ memory（仅单进程）
+    RESPONSE_CACHE_SQLITE_PATH = os.getenv('RESPONSE_CACHE_SQLITE_PATH', '')  # 默认使用系统临时目录（按数据库地址区分文件）
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '60'))  # 兜底过期时间（秒），含下游数据时不超过对应缓存的 TTL
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    RESPONSE_CACHE_MAX_GENERATIONS = int(os.getenv('RESPONSE_CACHE_MAX_GENERATIONS', '100000'))  # 代数表行数上限，超出时清空缓存
+    
+    # 关联信息并发加载配置（include=user,material）
+    ENRICH_MAX_WORKERS = int(os.getenv('ENRICH_MAX_WORKERS', '16'))
+    
+    # 创建借用时校验用户/物资的线程池大小（独立于 include 并发加载，读负载高时写请求不排队）
+    VALIDATION_MAX_WORKERS = int(os.getenv('VALIDATION_MAX_WORKERS', '8'))
+    
+    # 响应 JSON 编码器: auto（优先 orjson，未安装时回退标准库）/ orjson / json
+    JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto')
+    
+    # 响应压缩（按 Accept-Encoding 协商；br 需要安装 brotli）
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_ENCODINGS = [
+        encoding.strip().lower() for encoding in os.getenv('COMPRESSION_ENCODINGS', 'br,gzip').split(',') if encoding.strip()
+    ]  # 服务端优先顺序
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # 小于该字节数的响应不压缩
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))  # gzip 压缩级别 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))  # brotli 压缩质量 0-11
+    
+    # 监控指标（/metrics，Prometheus 文本格式）
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    
     # 分页配置
     DEFAULT_PAGE_SIZE = 10
     MAX_PAGE_SIZE = 100
+    
+    # 批量操作配置
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '100'))
+    
+    # 导出配置
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))  # 服务端游标每批读取行数
+    EXPORT_GZIP_LEVEL = int(os.getenv('EXPORT_GZIP_LEVEL', '6'))  # gzip=true 时的压缩级别
+    
+    # 列表总数统计配置
+    DEFAULT_TOTAL_STRATEGY = os.getenv('DEFAULT_TOTAL_STRATEGY', 'exact')  # exact / estimate / none
+    COUNT_CACHE_TTL = float(os.getenv('COUNT_CACHE_TTL', '30'))  # 估算总数的刷新周期（秒）
+    COUNT_CACHE_MAXSIZE = int(os.getenv('COUNT_CACHE_MAXSIZE', '1024'))  # 缓存的过滤条件组合数量
+    
+    # 物资状态发件箱投递配置
+    OUTBOX_DISPATCHER_AUTOSTART = os.getenv('OUTBOX_DISPATCHER_AUTOSTART', 'True').lower() == 'true'  # 随服务进程启动投递线程
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '1'))  # 无待投递事件时的轮询间隔（秒）
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))  # 每批领取的事件数
+    OUTBOX_MAX_WORKERS = int(os.getenv('OUTBOX_MAX_WORKERS', '8'))  # 并发投递线程数
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))  # 最大投递次数，超过后标记为失败
+    OUTBOX_RETRY_BASE_DELAY = float(os.getenv('OUTBOX_RETRY_BASE_DELAY', '1'))  # 首次重试等待（秒），之后指数增长
+    OUTBOX_RETRY_MAX_DELAY = float(os.getenv('OUTBOX_RETRY_MAX_DELAY', '300'))  # 重试等待上限（秒）
+    OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', '120'))  # 领取后的投递租约（秒），应大于一批事件的投递耗时
+    
+    # 逾期借用扫描配置
+    OVERDUE_SWEEPER_AUTOSTART = os.getenv('OVERDUE_SWEEPER_AUTOSTART', 'True').lower() == 'true'  # 随服务进程启动扫描线程
+    OVERDUE_SWEEP_INTERVAL = float(os.getenv('OVERDUE_SWEEP_INTERVAL', '60'))  # 扫描周期（秒）
+    OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv('OVERDUE_SWEEP_BATCH_SIZE', '500'))  # 每批处理的记录数
+    # 补扫水位线之前新写入的逾期记录（创建时 dueAt 已过期，或更新时 dueAt 提前到水位线之前）
+    OVERDUE_RESCAN_WINDOW_HOURS = float(os.getenv('OVERDUE_RESCAN_WINDOW_HOURS', '168'))  # 补扫水位线之前多长时间内的 dueAt（小时）
+    OVERDUE_RESCAN_LAG = float(os.getenv('OVERDUE_RESCAN_LAG', '60'))  # 只补扫此前已提交的写入（秒），应大于写事务耗时
@@ -0,0 +1,193 @@
+"""
+索引迁移脚本
+对比模型中声明的索引与数据库中的实际索引，在线新增/删除索引；
+同时同步 COLUMN_TYPES 中列的类型（如 updated_at 改为 DATETIME(6)）
+（db.create_all() 不会修改已存在表的索引和列）
+
+用法:
+    python migrate_indexes.py                # 仅打印执行计划
+    python migrate_indexes.py --apply        # 执行变更
+    python migrate_indexes.py --apply --keep-extra   # 只新增，不删除模型中未声明的索引
+"""
+import argparse
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from app import app, db
+from models import (
+    BorrowRecord, MaterialStatusOutbox, SweeperWatermark,
+    BorrowUserStats, BorrowMaterialStats, BorrowDailyStats
+)
+
+# 需要同步索引的模型
+MODELS = [
+    BorrowRecord, MaterialStatusOutbox, SweeperWatermark,
+    BorrowUserStats, BorrowMaterialStats, BorrowDailyStats
+]
+
+# 需要同步类型的列（MySQL 修改 DATETIME 精度需要重建表，期间阻塞写入，请在低峰期执行）
+COLUMN_TYPES = [
+    (BorrowRecord, 'updated_at'),
+    (SweeperWatermark, 'position_at')
+]
+
+# MySQL InnoDB 在线 DDL：原地构建索引且不阻塞读写
+MYSQL_ONLINE_OPTIONS = 'ALGORITHM=INPLACE, LOCK=NONE'
+
+
+def _index_signature(columns, unique):
+    return tuple(columns), bool(unique)
+
+
+def diff_indexes(inspector, table):
+    """
+    对比模型与数据库中的索引
+
+    Returns:
+        tuple: (to_add, to_change, to_drop)
+            to_add: 需要新增的模型索引列表
+            to_change: 定义不一致、需要重建的模型索引列表
+            to_drop: 需要删除的数据库索引名称列表
+    """
+    expected = {idx.name: idx for idx in table.indexes}
+    actual = {
+        idx['name']: _index_signature(idx['column_names'], idx.get('unique'))
+        for idx in inspector.get_indexes(table.name)
+    }
+
+    to_add, to_change = [], []
+    for name, index in expected.items():
+        signature = _index_signature([c.name for c in index.columns], index.unique)
+        if name not in actual:
+            to_add.append(index)
+        elif actual[name] != signature:
+            to_change.append(index)
+
+    to_drop = [name for name in actual if name not in expected]
+    return to_add, to_change, to_drop
+
+
+def diff_column_types(inspector, dialect, table, column_names):
+    """
+    对比模型与数据库中的列类型
+
+    Returns:
+        list: 数据库中类型与模型不一致的模型列
+    """
+    actual = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+    changed = []
+    for name in column_names:
+        column = table.columns[name]
+        if name in actual and actual[name].compile(dialect=dialect) != column.type.compile(dialect=dialect):
+            changed.append(column)
+    return changed
+
+
+def build_column_statements(dialect, table, columns):
+    """
+    生成修改列类型的 DDL 语句（仅 MySQL；SQLite 不区分 DATETIME 精度）
+    """
+    if dialect.name != 'mysql':
+        return []
+
+    quote = dialect.identifier_preparer.quote
+    statements = []
+    for column in columns:
+        definition = f"{quote(column.name)} {column.type.compile(dialect=dialect)} {'NULL' if column.nullable else 'NOT NULL'}"
+        if column.comment:
+            definition += " COMMENT '{}'".format(column.comment.replace("'", "''"))
+        statements.append(f"ALTER TABLE {quote(table.name)} MODIFY {definition}")
+    return statements
+
+
+def build_statements(dialect, table, to_add, to_change, to_drop):
+    """
+    生成 DDL 语句（先建新索引再删旧索引，保证查询始终有索引可用）
+    """
+    quote = dialect.identifier_preparer.quote
+    table_name = quote(table.name)
+    statements = []
+
+    if dialect.name == 'mysql':
+        def index_clause(index):
+            columns = ', '.join(quote(c.name) for c in index.columns)
+            kind = 'UNIQUE INDEX' if index.unique else 'INDEX'
+            return f"ADD {kind} {quote(index.name)} ({columns})"
+
+        for index in to_add:
+            statements.append(f"ALTER TABLE {table_name} {index_clause(index)}, {MYSQL_ONLINE_OPTIONS}")
+        for index in to_change:
+            statements.append(
+                f"ALTER TABLE {table_name} DROP INDEX {quote(index.name)}, {index_clause(index)}, {MYSQL_ONLINE_OPTIONS}"
+            )
+        for name in to_drop:
+            statements.append(f"ALTER TABLE {table_name} DROP INDEX {quote(name)}, {MYSQL_ONLINE_OPTIONS}")
+    else:
+        # 其他数据库（如本地 SQLite）使用标准 DDL
+        for index in to_add:
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)))
+        for index in to_change:
+            statements.append(f"DROP INDEX {quote(index.name)}")
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)))
+        for name in to_drop:
+            statements.append(f"DROP INDEX {quote(name)}")
+
+    return statements
+
+
+def migrate(apply=False, keep_extra=False):
+    """
+    同步所有模型的索引
+
+    Args:
+        apply: 是否执行变更，False 时只打印执行计划
+        keep_extra: 是否保留模型中未声明的索引
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for model in MODELS:
+        table = model.__table__
+        if table.name not in existing_tables:
+            print(f"- 表 {table.name} 不存在，跳过（请先运行 init_db.py 创建表）")
+            continue
+
+        to_add, to_change, to_drop = diff_indexes(inspector, table)
+        if keep_extra:
+            to_drop = []
+
+        column_names = [name for column_model, name in COLUMN_TYPES if column_model is model]
+        columns = diff_column_types(inspector, engine.dialect, table, column_names)
+
+        statements = build_column_statements(engine.dialect, table, columns)
+        statements += build_statements(engine.dialect, table, to_add, to_change, to_drop)
+        if not statements:
+            print(f"✓ 表 {table.name} 的索引及列类型已是最新")
+            continue
+
+        print(f"表 {table.name} 变更计划:")
+        for statement in statements:
+            print(f"  {statement};")
+
+        if not apply:
+            continue
+
+        with engine.connect() as conn:
+            for statement in statements:
+                print(f"  执行: {statement}")
+                conn.execute(text(statement))
+                conn.commit()
+        print(f"✓ 表 {table.name} 迁移完成")
+
+    if not apply:
+        print("\n以上为执行计划，添加 --apply 参数执行变更")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='同步模型索引及列类型到数据库')
+    parser.add_argument('--apply', action='store_true', help='执行变更（默认仅打印执行计划）')
+    parser.add_argument('--keep-extra', action='store_true', help='保留模型中未声明的索引')
+    args = parser.parse_args()
+
+    with app.app_context():
+        migrate(apply=args.apply, keep_extra=args.keep_extra)
@@ -1,8 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import mysql
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# 微秒精度时间（MySQL DATETIME 默认只精确到秒）；用作 ETag 等校验值的列需要区分同一秒内的多次写入
+PRECISE_DATETIME = db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
 
 class BorrowRecord(db.Model):
     """借用记录模型"""
@@ -13,12 +17,12 @@ class BorrowRecord(db.Model):
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True, comment='借用记录ID')
     
     # 外键关联
-    user_id = db.Column(db.BigInteger, nullable=False, index=True, comment='借用人ID')
-    material_id = db.Column(db.BigInteger, nullable=False, index=True, comment='物资ID')
+    user_id = db.Column(db.BigInteger, nullable=False, comment='借用人ID')
+    material_id = db.Column(db.BigInteger, nullable=False, comment='物资ID')
     
     # 借用信息
     quantity = db.Column(db.Integer, nullable=False, default=1, comment='借用数量')
-    status = db.Column(db.SmallInteger, nullable=False, default=0, index=True, comment='借用状态: 0-借出中, 1-已归还, 2-已取消')
+    status = db.Column(db.SmallInteger, nullable=False, default=0, comment='借用状态: 0-借出中, 1-已归还, 2-已取消')
     
     # 时间字段
     borrowed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment='借出时间')
@@ -30,13 +34,19 @@ class BorrowRecord(db.Model):
     
     # 审计字段
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment='创建时间')
-    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+    updated_at = db.Column(PRECISE_DATETIME, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间（微秒精度，用于 ETag）')
     
-    # 索引
+    # 索引（按列表查询的过滤条件 + ORDER BY created_at DESC 设计，InnoDB 二级索引隐含主键 id）
+    # 变更索引后请执行 python migrate_indexes.py 同步到已有数据库
     __table_args__ = (
-        db.Index('idx_user_id', 'user_id'),
-        db.Index('idx_material_id', 'material_id'),
-        db.Index('idx_status', 'status'),
+        db.Index('idx_user_status_created', 'user_id', 'status', 'created_at'),
+        db.Index('idx_material_status_created', 'material_id', 'status', 'created_at'),
+        # 只按用户 / 物资过滤（不带状态）时按创建时间排序，避免 filesort
+        db.Index('idx_user_created', 'user_id', 'created_at'),
+        db.Index('idx_material_created', 'material_id', 'created_at'),
+        db.Index('idx_status_created', 'status', 'created_at'),
+        db.Index('idx_status_due', 'status', 'due_at'),
+        db.Index('idx_created_at_id', 'created_at', 'id'),
     )
     
     # 状态枚举
@@ -52,7 +62,7 @@ class BorrowRecord(db.Model):
     
     def to_dict(self, include_user=False, include_material=False, user_data=None, material_data=None):
         """
-        将模型转换为字典
+        将模型转换为字典（时间字段保留 datetime，由 JSON 编码器直接序列化为 ISO 8601）
         
         Args:
             include_user: 是否包含用户信息
@@ -60,28 +70,223 @@ class BorrowRecord(db.Model):
             user_data: 用户数据字典
             material_data: 物资数据字典
         """
-        result = {
-            'id': self.id,
-            'userId': self.user_id,
-            'materialId': self.material_id,
-            'quantity': self.quantity,
-            'status': self.status,
-            'statusText': self.STATUS_TEXT.get(self.status, '未知'),
-            'borrowedAt': self.borrowed_at.isoformat() if self.borrowed_at else None,
-            'dueAt': self.due_at.isoformat() if self.due_at else None,
-            'returnedAt': self.returned_at.isoformat() if self.returned_at else None,
-            'remark': self.remark
-        }
-        
-        # 如果需要包含用户信息
-        if include_user and user_data:
+        return borrow_to_dict(self, include_user, include_material, user_data, material_data)
+    
+    def __repr__(self):
+        return f'<BorrowRecord {self.id}: User {self.user_id} borrowed Material {self.material_id}>'
+
+
+# 只读查询使用的列（列名与模型属性名一致，结果行可直接传给 borrow_to_dict、游标编码及 ETag 计算）
+BORROW_READ_COLUMNS = (
+    BorrowRecord.id,
+    BorrowRecord.user_id,
+    BorrowRecord.material_id,
+    BorrowRecord.quantity,
+    BorrowRecord.status,
+    BorrowRecord.borrowed_at,
+    BorrowRecord.due_at,
+    BorrowRecord.returned_at,
+    BorrowRecord.remark,
+    BorrowRecord.created_at,
+    BorrowRecord.updated_at
+)
+
+# 稀疏字段集（fields=）: 响应字段 -> 取值函数及所需的列，顺序即响应中的字段顺序
+BORROW_FIELDS = {
+    'id': (lambda r: r.id, (BorrowRecord.id,)),
+    'userId': (lambda r: r.user_id, (BorrowRecord.user_id,)),
+    'materialId': (lambda r: r.material_id, (BorrowRecord.material_id,)),
+    'quantity': (lambda r: r.quantity, (BorrowRecord.quantity,)),
+    'status': (lambda r: r.status, (BorrowRecord.status,)),
+    'statusText': (lambda r: BorrowRecord.STATUS_TEXT.get(r.status, '未知'), (BorrowRecord.status,)),
+    'borrowedAt': (lambda r: r.borrowed_at, (BorrowRecord.borrowed_at,)),
+    'dueAt': (lambda r: r.due_at, (BorrowRecord.due_at,)),
+    'returnedAt': (lambda r: r.returned_at, (BorrowRecord.returned_at,)),
+    'remark': (lambda r: r.remark, (BorrowRecord.remark,))
+}
+
+# 关联信息字段（需同时指定 include）及其所需的列
+BORROW_RELATION_FIELDS = {
+    'user': (BorrowRecord.user_id,),
+    'material': (BorrowRecord.material_id,)
+}
+
+# 稀疏查询始终包含的列（游标编码、ETag 计算依赖）
+BORROW_KEY_COLUMNS = (BorrowRecord.id, BorrowRecord.created_at, BorrowRecord.updated_at)
+
+
+def borrow_read_columns(fields=None):
+    """
+    只读查询需要的列
+    
+    Args:
+        fields: 响应字段元组（None 表示全部字段）
+    
+    Returns:
+        tuple: BORROW_READ_COLUMNS 中 fields 所需的列及 BORROW_KEY_COLUMNS，保持原有顺序
+    """
+    if fields is None:
+        return BORROW_READ_COLUMNS
+    keys = {column.key for column in BORROW_KEY_COLUMNS}
+    for name in fields:
+        columns = BORROW_FIELDS[name][1] if name in BORROW_FIELDS else BORROW_RELATION_FIELDS[name]
+        keys.update(column.key for column in columns)
+    return tuple(column for column in BORROW_READ_COLUMNS if column.key in keys)
+
+
+def borrow_to_dict(record, include_user=False, include_material=False, user_data=None, material_data=None,
+                   fields=None):
+    """
+    将借用记录转换为字典
+    
+    Args:
+        record: BorrowRecord 实例，或按 BORROW_READ_COLUMNS / borrow_read_columns(fields) 查询得到的结果行
+        include_user: 是否包含用户信息
+        include_material: 是否包含物资信息
+        user_data: 用户数据字典
+        material_data: 物资数据字典
+        fields: 只输出的字段元组（None 表示全部字段）
+    """
+    if fields is not None:
+        result = {name: BORROW_FIELDS[name][0](record) for name in fields if name in BORROW_FIELDS}
+        if include_user and user_data and 'user' in fields:
             result['user'] = user_data
-        
-        # 如果需要包含物资信息
-        if include_material and material_data:
+        if include_material and material_data and 'material' in fields:
             result['material'] = material_data
-        
         return result
     
+    result = {
+        'id': record.id,
+        'userId': record.user_id,
+        'materialId': record.material_id,
+        'quantity': record.quantity,
+        'status': record.status,
+        'statusText': BorrowRecord.STATUS_TEXT.get(record.status, '未知'),
+        'borrowedAt': record.borrowed_at,
+        'dueAt': record.due_at,
+        'returnedAt': record.returned_at,
+        'remark': record.remark
+    }
+    
+    # 如果需要包含用户信息
+    if include_user and user_data:
+        result['user'] = user_data
+    
+    # 如果需要包含物资信息
+    if include_material and material_data:
+        result['material'] = material_data
+    
+    return result
+
+
+class MaterialStatusOutbox(db.Model):
+    """物资状态变更发件箱（与借用记录变更在同一事务中写入，由后台投递到物资服务）"""
+    
+    __tablename__ = 'material_status_outbox'
+    
+    # 主键
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True, comment='事件ID')
+    
+    # 事件内容
+    material_id = db.Column(db.BigInteger, nullable=False, comment='物资ID')
+    material_status = db.Column(db.SmallInteger, nullable=False, comment='目标物资状态: 0-可用, 1-借出中')
+    borrow_record_id = db.Column(db.BigInteger, nullable=True, comment='触发事件的借用记录ID')
+    
+    # 投递状态
+    status = db.Column(db.SmallInteger, nullable=False, default=0, comment='投递状态: 0-待投递, 1-已投递, 2-投递失败, 3-已被后续事件覆盖')
+    attempts = db.Column(db.Integer, nullable=False, default=0, comment='已尝试投递次数')
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment='下次投递时间')
+    last_error = db.Column(db.String(255), nullable=True, comment='最近一次投递错误')
+    
+    # 审计字段
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment='创建时间')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+    
+    # 索引
+    __table_args__ = (
+        db.Index('idx_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('idx_outbox_material_status', 'material_id', 'status'),
+    )
+    
+    # 投递状态枚举
+    STATUS_PENDING = 0  # 待投递
+    STATUS_SENT = 1  # 已投递
+    STATUS_FAILED = 2  # 投递失败（超过最大重试次数）
+    STATUS_SUPERSEDED = 3  # 已被同一物资的后续事件覆盖
+    
     def __repr__(self):
-        return f'<BorrowRecord {self.id}: User {self.user_id} borrowed Material {self.material_id}>'
+        return f'<MaterialStatusOutbox {self.id}: Material {self.material_id} -> {self.material_status}>'
+
+
+class SweeperWatermark(db.Model):
+    """后台扫描任务水位线（记录已处理到的 (时间, ID) 位置，避免重复扫描）"""
+    
+    __tablename__ = 'sweeper_watermarks'
+    
+    name = db.Column(db.String(64), primary_key=True, comment='扫描任务名称')
+    position_at = db.Column(PRECISE_DATETIME, nullable=True, comment='已处理到的时间位置（微秒精度）')
+    position_id = db.Column(db.BigInteger, nullable=False, default=0, comment='已处理到的记录ID')
+    processed = db.Column(db.BigInteger, nullable=False, default=0, comment='累计处理记录数')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
+    
+    def __repr__(self):
+        return f'<SweeperWatermark {self.name}: ({self.position_at}, {self.position_id})>'
+
+
+class BorrowUserStats(db.Model):
+    """用户借用统计（随借用记录变更在同一事务中增量维护，可由 rebuild_stats.py 重建）"""
+    
+    __tablename__ = 'borrow_user_stats'
+    
+    user_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False, comment='用户ID')
+    active_count = db.Column(db.Integer, nullable=False, default=0, comment='借出中记录数')
+    total_count = db.Column(db.Integer, nullable=False, default=0, comment='借用记录总数')
+    
+    __table_args__ = (
+        db.Index('idx_user_stats_active', 'active_count'),
+    )
+    
+    def to_dict(self):
+        return {
+            'userId': self.user_id,
+            'activeCount': self.active_count,
+            'totalCount': self.total_count
+        }
+
+
+class BorrowMaterialStats(db.Model):
+    """物资借用统计（随借用记录变更在同一事务中增量维护，可由 rebuild_stats.py 重建）"""
+    
+    __tablename__ = 'borrow_material_stats'
+    
+    material_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False, comment='物资ID')
+    borrow_count = db.Column(db.Integer, nullable=False, default=0, comment='被借用次数')
+    active_count = db.Column(db.Integer, nullable=False, default=0, comment='借出中记录数')
+    
+    __table_args__ = (
+        db.Index('idx_material_stats_borrow', 'borrow_count'),
+    )
+    
+    def to_dict(self):
+        return {
+            'materialId': self.material_id,
+            'borrowCount': self.borrow_count,
+            'activeCount': self.active_count
+        }
+
+
+class BorrowDailyStats(db.Model):
+    """每日借出/归还量统计（按 UTC 日期，随借用记录变更在同一事务中增量维护）"""
+    
+    __tablename__ = 'borrow_daily_stats'
+    
+    stat_date = db.Column(db.Date, primary_key=True, comment='统计日期')
+    borrowed_count = db.Column(db.Integer, nullable=False, default=0, comment='当日借出数')
+    returned_count = db.Column(db.Integer, nullable=False, default=0, comment='当日归还数')
+    
+    def to_dict(self):
+        return {
+            'date': self.stat_date.isoformat(),
+            'borrowedCount': self.borrowed_count,
+            'returnedCount': self.returned_count
+        }
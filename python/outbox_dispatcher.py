@@ -0,0 +1,29 @@
+"""
+物资状态发件箱投递进程
+多实例 / 多 worker 部署时，可在各服务实例中设置 OUTBOX_DISPATCHER_AUTOSTART=False，
+单独运行本脚本投递物资状态变更事件（多个投递进程可同时运行，事件按行加锁领取，不会重复投递）
+
+用法:
+    python outbox_dispatcher.py           # 持续投递
+    python outbox_dispatcher.py --once    # 投递一批到期事件后退出
+"""
+import argparse
+
+from app import app
+from routes_borrows import outbox_dispatcher
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='投递物资状态发件箱事件')
+    parser.add_argument('--once', action='store_true', help='只投递一批到期事件')
+    args = parser.parse_args()
+
+    if args.once:
+        with app.app_context():
+            print(f"已处理 {outbox_dispatcher.dispatch_once()} 个事件")
+    else:
+        print("物资状态发件箱投递进程启动中...")
+        try:
+            outbox_dispatcher.run_forever()
+        except KeyboardInterrupt:
+            outbox_dispatcher.stop()
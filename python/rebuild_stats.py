@@ -0,0 +1,18 @@
+"""
+借用统计重建脚本
+从 borrow_records 全量回填统计表（borrow_user_stats / borrow_material_stats / borrow_daily_stats），
+用于首次上线统计功能或修复统计偏差。清空与回填在同一事务中完成，建议在业务低峰期执行。
+
+用法:
+    python rebuild_stats.py
+"""
+from app import app
+from services.stats import rebuild_stats
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        result = rebuild_stats()
+    for table, count in result.items():
+        print(f"✓ {table}: {count} 行")
+    print("统计表重建完成")
@@ -1,12 +1,31 @@
-from flask import Blueprint, request
-from models import db, BorrowRecord
+from flask import Blueprint, request, Response, stream_with_context
+from models import (
+    db, BorrowRecord, BorrowUserStats, BorrowMaterialStats, BorrowDailyStats, BORROW_READ_COLUMNS,
+    BORROW_FIELDS, BORROW_RELATION_FIELDS, borrow_read_columns, borrow_to_dict
+)
 from utils.response import (
-    success_response, created_response, bad_request_response,
-    not_found_response, conflict_response, internal_error_response
+    make_response, success_response, created_response, bad_request_response,
+    not_found_response, conflict_response, service_unavailable_response, gateway_timeout_response,
+    internal_error_response, success_payload
 )
+from services.circuit_breaker import CircuitOpenError
+from services.deadline import DeadlineExceeded, deadline_scope, parse_deadline_header
 from services.user_client import UserClient
 from services.material_client import MaterialClient
-from datetime import datetime
+from services.enrichment import BorrowEnricher
+from services.count_cache import BorrowCountCache, record_key
+from services.response_cache import (
+    ResponseCache, ALL_BORROWS, borrow_dependency, user_dependency, material_dependency
+)
+from services.outbox import OutboxDispatcher, outbox_events
+from services.overdue import overdue_criteria, OVERDUE_ORDER
+from services.stats import BorrowStatsDelta, stats_snapshot
+from utils.pagination import encode_cursor, decode_cursor
+from utils.export import ndjson_stream, csv_stream, gzip_stream
+from utils.conditional import record_etag, fingerprint_etag, has_validators, is_not_modified, validator_headers
+from utils import json_codec
+from concurrent.futures import wait
+from datetime import datetime, date, timedelta, timezone
 from config import Config
 
 # 创建蓝图
@@ -15,6 +34,464 @@ borrows_bp = Blueprint('borrows', __name__)
 # 初始化客户端
 user_client = UserClient()
 material_client = MaterialClient()
+enricher = BorrowEnricher(user_client, material_client)
+# 创建借用时的用户/物资校验使用独立线程池，不与读接口的 include 并发加载排队
+validator = BorrowEnricher(
+    user_client, material_client, max_workers=Config.VALIDATION_MAX_WORKERS, thread_name_prefix='borrow-validate'
+)
+count_cache = BorrowCountCache()
+response_cache = ResponseCache()
+
+# 物资状态发件箱投递器（由 app.py 绑定应用并启动）
+outbox_dispatcher = OutboxDispatcher(material_client)
+
+# 列表总数统计策略
+TOTAL_STRATEGIES = ('exact', 'estimate', 'none')
+
+# 批量操作模式: allOrNothing-任一条目失败则整体失败, bestEffort-逐条处理
+BATCH_MODES = ('allOrNothing', 'bestEffort')
+
+# 游标分页排序: (created_at, id) 倒序
+CURSOR_ORDER = (BorrowRecord.created_at.desc(), BorrowRecord.id.desc())
+
+# 导出格式及对应的 Content-Type
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+# 导出字段（只查询所需列，statusText 在 SQL 中计算）
+EXPORT_COLUMNS = (
+    ('id', BorrowRecord.id),
+    ('userId', BorrowRecord.user_id),
+    ('materialId', BorrowRecord.material_id),
+    ('quantity', BorrowRecord.quantity),
+    ('status', BorrowRecord.status),
+    ('statusText', db.case(BorrowRecord.STATUS_TEXT, value=BorrowRecord.status, else_='未知')),
+    ('borrowedAt', BorrowRecord.borrowed_at),
+    ('dueAt', BorrowRecord.due_at),
+    ('returnedAt', BorrowRecord.returned_at),
+    ('remark', BorrowRecord.remark),
+    ('createdAt', BorrowRecord.created_at),
+    ('updatedAt', BorrowRecord.updated_at)
+)
+
+# 导出时间范围参数: 参数名 -> (字段, 是否为下界)
+EXPORT_DATE_RANGES = {
+    'createdFrom': (BorrowRecord.created_at, True),
+    'createdTo': (BorrowRecord.created_at, False),
+    'borrowedFrom': (BorrowRecord.borrowed_at, True),
+    'borrowedTo': (BorrowRecord.borrowed_at, False)
+}
+
+
+def _get_int(args, name, default=None):
+    """从查询参数中读取整数，缺失或格式不正确时返回默认值"""
+    value = args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_fields(args):
+    """
+    解析稀疏字段集参数 fields（逗号分隔的响应字段名）
+    
+    Returns:
+        tuple: (fields, error)
+            fields: 按响应字段顺序排列的字段元组，未指定时为 None（全部字段）
+            error: str, 包含不支持的字段时的提示信息
+    """
+    names = {name.strip() for name in args.get('fields', '').split(',') if name.strip()}
+    if not names:
+        return None, None
+    unknown = names - BORROW_FIELDS.keys() - BORROW_RELATION_FIELDS.keys()
+    if unknown:
+        supported = ', '.join([*BORROW_FIELDS, *BORROW_RELATION_FIELDS])
+        return None, f"fields 包含不支持的字段: {', '.join(sorted(unknown))}，可选 {supported}"
+    return tuple(name for name in [*BORROW_FIELDS, *BORROW_RELATION_FIELDS] if name in names), None
+
+
+def parse_include(args, fields):
+    """
+    解析 include 参数（指定 fields 时，未在 fields 中的关联信息不再获取）
+    
+    Returns:
+        tuple: (include_user, include_material)
+    """
+    include = args.get('include', '').lower()
+    return (
+        'user' in include and (fields is None or 'user' in fields),
+        'material' in include and (fields is None or 'material' in fields)
+    )
+
+
+def parse_list_args(args):
+    """
+    校验并解析借用列表查询参数
+    
+    Args:
+        args: 查询参数（Flask request.args 或其他字典类对象）
+    
+    Returns:
+        tuple: (params, error)
+            params: dict, 解析后的查询参数
+            error: str, 校验失败的提示信息，校验通过时为 None
+    """
+    fields, error = parse_fields(args)
+    if error:
+        return None, error
+    include_user, include_material = parse_include(args, fields)
+    params = {
+        'user_id': _get_int(args, 'userId'),
+        'material_id': _get_int(args, 'materialId'),
+        'status': _get_int(args, 'status'),
+        'page': _get_int(args, 'page', 1),
+        'page_size': _get_int(args, 'pageSize', Config.DEFAULT_PAGE_SIZE),
+        'include_user': include_user,
+        'include_material': include_material,
+        'fields': fields,
+        'cursor': args.get('cursor'),
+        'cursor_position': None,
+        'total_strategy': args.get('totalStrategy', Config.DEFAULT_TOTAL_STRATEGY).lower()
+    }
+    
+    if params['total_strategy'] not in TOTAL_STRATEGIES:
+        return None, "totalStrategy 必须为 exact, estimate 或 none"
+    
+    # 限制分页大小
+    if params['page'] < 1:
+        params['page'] = 1
+    if params['page_size'] < 1 or params['page_size'] > Config.MAX_PAGE_SIZE:
+        params['page_size'] = Config.DEFAULT_PAGE_SIZE
+    
+    if params['status'] is not None and params['status'] not in [0, 1, 2]:
+        return None, "status 必须为 0, 1 或 2"
+    
+    if params['cursor']:
+        try:
+            params['cursor_position'] = decode_cursor(params['cursor'])
+        except ValueError as e:
+            return None, str(e)
+    
+    return params, None
+
+
+def list_criteria(params):
+    """根据列表查询参数构造过滤条件（含游标定位条件）"""
+    criteria = []
+    if params['user_id'] is not None:
+        criteria.append(BorrowRecord.user_id == params['user_id'])
+    if params['material_id'] is not None:
+        criteria.append(BorrowRecord.material_id == params['material_id'])
+    if params['status'] is not None:
+        criteria.append(BorrowRecord.status == params['status'])
+    
+    if params['cursor_position'] is not None:
+        cursor_created_at, cursor_id = params['cursor_position']
+        criteria.append(db.or_(
+            BorrowRecord.created_at < cursor_created_at,
+            db.and_(
+                BorrowRecord.created_at == cursor_created_at,
+                BorrowRecord.id < cursor_id
+            )
+        ))
+    return criteria
+
+
+def list_statement(params):
+    """
+    构造列表查询语句
+    
+    只查询响应所需的列（BORROW_READ_COLUMNS，指定 fields 时只查询其所需的列），结果为普通行元组，
+    不创建 ORM 实例、不进入会话 identity map，可直接用于关联信息加载和游标编码。
+    """
+    return db.select(*borrow_read_columns(params['fields'])).where(*list_criteria(params))
+
+
+def page_statement(statement, params):
+    """为列表查询附加排序和分页（游标分页多取一条用于判断是否还有下一页）"""
+    if params['cursor'] is not None:
+        return statement.order_by(*CURSOR_ORDER).limit(params['page_size'] + 1)
+    return (
+        statement.order_by(BorrowRecord.created_at.desc())
+        .offset((params['page'] - 1) * params['page_size'])
+        .limit(params['page_size'])
+    )
+
+
+def list_etag(params, records, total):
+    """
+    列表结果的 ETag
+    
+    由分页参数、总数及本页各记录的 (id, updated_at) 决定：本页记录的增删改、排序变化及总数变化都会改变 ETag。
+    
+    Args:
+        params: parse_list_args 解析后的参数
+        records: 本页记录行（游标分页时为多取一条的结果）
+        total: 总数（游标分页或 totalStrategy=none 时为 None）
+    """
+    return fingerprint_etag(
+        params['page'], params['page_size'], params['cursor'], params['total_strategy'], total,
+        [(record.id, record.updated_at) for record in records]
+    )
+
+
+def list_total(params):
+    """按 totalStrategy 获取列表总数（游标分页不统计总数）"""
+    if params['cursor'] is not None:
+        return None
+    if params['total_strategy'] == 'exact':
+        return count_cache.count(params['user_id'], params['material_id'], params['status'])
+    if params['total_strategy'] == 'estimate':
+        return count_cache.estimate(params['user_id'], params['material_id'], params['status'])
+    return None
+
+
+def list_cache_key(params):
+    """
+    列表响应的缓存变体及依赖代数
+    
+    按用户/物资过滤时只依赖对应代数（其他用户、物资的写操作不影响缓存），否则依赖全局代数。
+    
+    Returns:
+        tuple: (variant, dependencies)
+    """
+    variant = tuple(sorted((key, value) for key, value in params.items() if key != 'cursor_position'))
+    dependencies = []
+    if params['user_id'] is not None:
+        dependencies.append(user_dependency(params['user_id']))
+    if params['material_id'] is not None:
+        dependencies.append(material_dependency(params['material_id']))
+    return variant, dependencies or [ALL_BORROWS]
+
+
+def enrichment_complete(items, include_user, include_material):
+    """关联信息是否全部获取成功（下游服务失败时的降级结果不写入响应缓存）"""
+    return all(
+        (not include_user or 'user' in item) and (not include_material or 'material' in item)
+        for item in items
+    )
+
+
+def cache_hit_response(cached, request_headers):
+    """
+    由缓存条目构造响应（带 ETag 时先处理条件请求）
+    
+    Returns:
+        tuple: (body, status, headers)
+    """
+    headers = {'X-Cache': 'HIT'}
+    if cached.etag is not None:
+        headers.update(validator_headers(cached.etag, cached.last_modified))
+        if is_not_modified(request_headers, cached.etag, cached.last_modified):
+            return b'', 304, headers
+    return success_payload(cached.data), 200, headers
+
+
+def cache_miss_response(token, data, etag=None, last_modified=None, ttl=None, cacheable=True):
+    """
+    序列化 data，写入响应缓存并构造响应
+    
+    Args:
+        token: response_cache.lookup() 返回的缓存键（缓存关闭时为 None）
+        data: 响应 data
+        etag: ETag（不支持条件请求时为 None）
+        last_modified: 最后修改时间
+        ttl: 缓存存活时间（秒）
+        cacheable: 是否写入缓存
+    
+    Returns:
+        tuple: (body, status, headers)
+    """
+    data = json_codec.dumps(data)
+    if cacheable:
+        response_cache.store(token, data, etag, last_modified, ttl)
+    headers = validator_headers(etag, last_modified) if etag is not None else {}
+    if token is not None:
+        headers['X-Cache'] = 'MISS'
+    return success_payload(data), 200, headers
+
+
+def json_response(body, status, headers):
+    """由 (body, status, headers) 构造 Flask 响应"""
+    return Response(body, status=status, headers=headers, mimetype='application/json' if body else None)
+
+
+def cursor_page(records, page_size):
+    """
+    截取游标分页结果（records 为多取一条的查询结果）
+    
+    Returns:
+        tuple: (records, next_cursor)
+    """
+    if len(records) > page_size:
+        records = records[:page_size]
+        return records, encode_cursor(records[-1].created_at, records[-1].id)
+    return records, None
+
+
+def parse_create_fields(data):
+    """
+    校验并解析创建借用记录的请求字段
+    
+    Args:
+        data: 请求体字典
+    
+    Returns:
+        tuple: (fields, error)
+            fields: dict, 可直接用于构造 BorrowRecord 的字段
+            error: str, 校验失败的提示信息，校验通过时为 None
+    """
+    # 校验必填参数
+    user_id = data.get('userId')
+    material_id = data.get('materialId')
+    
+    if not user_id or not isinstance(user_id, int) or user_id <= 0:
+        return None, "userId 必填且必须为正整数"
+    
+    if not material_id or not isinstance(material_id, int) or material_id <= 0:
+        return None, "materialId 必填且必须为正整数"
+    
+    # 获取可选参数
+    quantity = data.get('quantity', 1)
+    due_at_str = data.get('dueAt')
+    remark = data.get('remark', '')
+    
+    # 校验数量
+    if not isinstance(quantity, int) or quantity <= 0:
+        return None, "quantity 必须为正整数"
+    
+    # 解析应归还时间
+    due_at = None
+    if due_at_str:
+        try:
+            due_at = datetime.fromisoformat(due_at_str.replace('Z', '+00:00'))
+        except ValueError:
+            return None, "dueAt 时间格式不正确，应为 ISO 8601 格式"
+    
+    return {
+        'user_id': user_id,
+        'material_id': material_id,
+        'quantity': quantity,
+        'due_at': due_at,
+        'remark': remark
+    }, None
+
+
+def active_borrowed_materials(material_ids):
+    """
+    查询存在借出中记录的物资ID
+    
+    物资服务的状态由发件箱异步更新，创建借用前以本地借出中记录为准防止重复借出。
+    """
+    if not material_ids:
+        return set()
+    rows = db.session.query(BorrowRecord.material_id).filter(
+        BorrowRecord.material_id.in_(set(material_ids)),
+        BorrowRecord.status == BorrowRecord.STATUS_BORROWED
+    ).distinct()
+    return {material_id for material_id, in rows}
+
+
+def _parse_id_list(args, name):
+    """
+    解析逗号分隔的正整数ID列表
+    
+    Returns:
+        tuple: (ids, error)
+    """
+    value = args.get(name, '')
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+    except ValueError:
+        return None, f"{name} 必须为逗号分隔的正整数"
+    if any(i <= 0 for i in ids):
+        return None, f"{name} 必须为逗号分隔的正整数"
+    if len(ids) > Config.MAX_BATCH_SIZE:
+        return None, f"{name} 单次最多 {Config.MAX_BATCH_SIZE} 个"
+    return ids, None
+
+
+def _dependency_failure(service, future, deadline):
+    """
+    并发校验中单个下游调用的失败响应
+    
+    Args:
+        service: 服务名称（用于提示信息），例如 "用户"
+        future: 下游调用的 Future
+        deadline: 本次请求的截止时间
+    
+    Returns:
+        调用成功时返回 None，否则返回 503（熔断中）/ 504（超出时间预算）/ 500 响应
+    """
+    if future.cancelled() or not future.done():
+        return gateway_timeout_response(f"{service}服务响应超时")
+    error = future.exception()
+    if error is None:
+        return None
+    if isinstance(error, CircuitOpenError):
+        return service_unavailable_response(f"{service}服务暂不可用: {str(error)}")
+    if isinstance(error, DeadlineExceeded) or deadline.expired:
+        return gateway_timeout_response(f"{service}服务响应超时")
+    return internal_error_response(f"调用{service}服务失败: {str(error)}")
+
+
+def _batch_result(index, code, message, data=None):
+    """批量操作中单个条目的处理结果"""
+    return {
+        'index': index,
+        'success': 200 <= code < 300,
+        'code': code,
+        'message': message,
+        'data': data
+    }
+
+
+def _batch_failure_response(mode, results):
+    """
+    allOrNothing 模式下的整体失败响应
+    
+    未失败的条目标记为 424（因其他条目失败未执行），HTTP 状态码取第一个失败条目的状态码
+    """
+    results = [
+        result if result is not None else _batch_result(index, 424, "因批次中其他条目失败而未执行")
+        for index, result in enumerate(results)
+    ]
+    first_failure = next(r for r in results if not r['success'] and r['code'] != 424)
+    return make_response(
+        code=first_failure['code'],
+        message="批量操作失败，未提交任何变更",
+        data={
+            'mode': mode,
+            'succeeded': 0,
+            'failed': len(results),
+            'results': results
+        }
+    )
+
+
+def _insert_records(rows):
+    """
+    写入借用记录并获取各自的主键（由调用方提交事务）
+    
+    通过 ORM flush 写入：支持 RETURNING 的数据库批量 INSERT ... RETURNING，
+    MySQL 逐行读取 lastrowid。不按首行ID推算其余ID（innodb_autoinc_lock_mode=2 时
+    并发写入下同一条多行 INSERT 的自增ID不保证连续）。
+    
+    Args:
+        rows: 字段字典列表
+    
+    Returns:
+        list: 与 rows 顺序一致的 BorrowRecord（已分配主键）
+    """
+    records = [BorrowRecord(returned_at=None, **row) for row in rows]
+    db.session.add_all(records)
+    db.session.flush()
+    return records
 
 
 @borrows_bp.route('/borrows', methods=['POST'])
@@ -32,6 +509,11 @@ def create_borrow():
         required: true
         schema:
           $ref: '#/definitions/BorrowCreateRequest'
+      - in: header
+        name: X-Request-Timeout-Ms
+        type: integer
+        required: false
+        description: 上游剩余时间预算（毫秒），比服务配置的预算更短时以其为准
     responses:
       201:
         description: 创建成功
@@ -49,6 +531,14 @@ def create_borrow():
         description: 物资状态冲突
         schema:
           $ref: '#/definitions/SimpleResponse'
+      503:
+        description: 用户或物资服务熔断中，暂不可用
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+      504:
+        description: 用户或物资服务未在请求时间预算（CREATE_BORROW_DEADLINE）内响应
+        schema:
+          $ref: '#/definitions/SimpleResponse'
       500:
         description: 服务内部错误
         schema:
@@ -60,72 +550,56 @@ def create_borrow():
         if not data:
             return bad_request_response("请求体不能为空")
         
-        # 校验必填参数
-        user_id = data.get('userId')
-        material_id = data.get('materialId')
+        # 校验参数
+        fields, error = parse_create_fields(data)
+        if error:
+            return bad_request_response(error)
         
-        if not user_id or not isinstance(user_id, int) or user_id <= 0:
-            return bad_request_response("userId 必填且必须为正整数")
+        user_id = fields['user_id']
+        material_id = fields['material_id']
         
-        if not material_id or not isinstance(material_id, int) or material_id <= 0:
-            return bad_request_response("materialId 必填且必须为正整数")
+        # 1/2. 在请求时间预算内并发验证用户存在、物资存在且可用（物资使用严格模式，绕过缓存直接查询物资服务）
+        upstream_budget = parse_deadline_header(request.headers.get(Config.DEADLINE_HEADER))
+        with deadline_scope(Config.CREATE_BORROW_DEADLINE, upstream_budget) as deadline:
+            user_future = validator.submit(user_client.get_user, user_id)
+            material_future = validator.submit(material_client.get_material, material_id, strict=True)
+            wait((user_future, material_future), timeout=deadline.remaining())
+            # 超时后取消仍在排队的调用，不再占用线程池
+            user_future.cancel()
+            material_future.cancel()
         
-        # 获取可选参数
-        quantity = data.get('quantity', 1)
-        due_at_str = data.get('dueAt')
-        remark = data.get('remark', '')
+            failure = (
+                _dependency_failure("用户", user_future, deadline)
+                or _dependency_failure("物资", material_future, deadline)
+            )
+        if failure:
+            return failure
         
-        # 校验数量
-        if not isinstance(quantity, int) or quantity <= 0:
-            return bad_request_response("quantity 必须为正整数")
+        if user_future.result() is None:
+            return not_found_response("用户不存在")
+        material_data = material_future.result()
+        if material_data is None:
+            return not_found_response("物资不存在")
+        # material_status: 0-可用, 1-借出中, 2-维护中
+        if material_data.get('materialStatus') != 0 or material_id in active_borrowed_materials([material_id]):
+            return conflict_response("物资当前不可借出")
         
-        # 解析应归还时间
-        due_at = None
-        if due_at_str:
-            try:
-                due_at = datetime.fromisoformat(due_at_str.replace('Z', '+00:00'))
-            except ValueError:
-                return bad_request_response("dueAt 时间格式不正确，应为 ISO 8601 格式")
-        
-        # 1. 验证用户存在
-        try:
-            if not user_client.check_user_exists(user_id):
-                return not_found_response("用户不存在")
-        except Exception as e:
-            return internal_error_response(f"调用用户服务失败: {str(e)}")
-        
-        # 2. 验证物资存在且可用
-        try:
-            is_available, material_data = material_client.check_material_available(material_id)
-            if material_data is None:
-                return not_found_response("物资不存在")
-            if not is_available:
-                return conflict_response("物资当前不可借出")
-        except Exception as e:
-            return internal_error_response(f"调用物资服务失败: {str(e)}")
-        
-        # 3. 创建借用记录
+        # 3. 创建借用记录，并在同一事务中写入物资状态变更事件（由发件箱异步投递到物资服务）
         borrow_record = BorrowRecord(
-            user_id=user_id,
-            material_id=material_id,
-            quantity=quantity,
             status=BorrowRecord.STATUS_BORROWED,
             borrowed_at=datetime.utcnow(),
-            due_at=due_at,
-            remark=remark
+            **fields
         )
         
         db.session.add(borrow_record)
+        db.session.flush()
+        db.session.add_all(outbox_events([(material_id, 1, borrow_record.id)]))
+        BorrowStatsDelta().add(after=stats_snapshot(borrow_record)).apply(db.session)
         db.session.commit()
+        outbox_dispatcher.notify()
         
-        # 4. 更新物资状态为借出中
-        try:
-            material_client.mark_as_borrowed(material_id)
-        except Exception as e:
-            # 如果更新物资状态失败，回滚借用记录
-            db.session.delete(borrow_record)
-            db.session.commit()
-            return internal_error_response(f"更新物资状态失败: {str(e)}")
+        count_cache.adjust(after=record_key(borrow_record))
+        response_cache.invalidate([(borrow_record.id, None, record_key(borrow_record))])
         
         # 返回创建的记录
         return created_response(
@@ -138,6 +612,174 @@ def create_borrow():
         return internal_error_response(f"创建借用记录失败: {str(e)}")
 
 
+@borrows_bp.route('/borrows/batch', methods=['POST'])
+def create_borrows_batch():
+    """
+    批量创建借用记录（批量借出）
+    ---
+    tags:
+      - Borrows
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          $ref: '#/definitions/BorrowBatchCreateRequest'
+    responses:
+      201:
+        description: 全部创建成功
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+      200:
+        description: bestEffort 模式下部分条目失败
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+      400:
+        description: 请求体或参数不合法（allOrNothing 模式下任一条目校验失败时同样返回逐条结果）
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+      404:
+        description: allOrNothing 模式下存在用户或物资不存在的条目
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+      409:
+        description: allOrNothing 模式下存在物资状态冲突的条目
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+      503:
+        description: allOrNothing 模式下存在因用户或物资服务熔断而无法校验的条目
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+      500:
+        description: 服务内部错误
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+    """
+    try:
+        # 获取请求数据
+        data = request.get_json()
+        if not data:
+            return bad_request_response("请求体不能为空")
+        
+        items = data.get('items')
+        mode = data.get('mode', 'allOrNothing')
+        
+        if not isinstance(items, list) or not items:
+            return bad_request_response("items 必须为非空数组")
+        if len(items) > Config.MAX_BATCH_SIZE:
+            return bad_request_response(f"items 单次最多 {Config.MAX_BATCH_SIZE} 条")
+        if mode not in BATCH_MODES:
+            return bad_request_response("mode 必须为 allOrNothing 或 bestEffort")
+        
+        results = [None] * len(items)
+        parsed = {}
+        material_ids = set()
+        
+        # 1. 校验参数（同一物资在一个批次中只能借出一次）
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = _batch_result(index, 400, "条目必须为对象")
+                continue
+            fields, error = parse_create_fields(item)
+            if error:
+                results[index] = _batch_result(index, 400, error)
+                continue
+            if fields['material_id'] in material_ids:
+                results[index] = _batch_result(index, 409, "同一物资在本批次中重复借出")
+                continue
+            material_ids.add(fields['material_id'])
+            parsed[index] = fields
+        
+        # 2. 去重后并发验证用户存在、物资存在且可用（物资使用严格模式）
+        users = validator.call_many(user_client.get_user, [f['user_id'] for f in parsed.values()])
+        materials = validator.call_many(
+            lambda mid: material_client.get_material(mid, strict=True),
+            [f['material_id'] for f in parsed.values()]
+        )
+        
+        borrowed = active_borrowed_materials([f['material_id'] for f in parsed.values()])
+        
+        for index, fields in list(parsed.items()):
+            user, user_error = users[fields['user_id']]
+            material, material_error = materials[fields['material_id']]
+            
+            failure = None
+            if isinstance(user_error, CircuitOpenError):
+                failure = (503, f"用户服务暂不可用: {str(user_error)}")
+            elif user_error is not None:
+                failure = (500, f"调用用户服务失败: {str(user_error)}")
+            elif user is None:
+                failure = (404, "用户不存在")
+            elif isinstance(material_error, CircuitOpenError):
+                failure = (503, f"物资服务暂不可用: {str(material_error)}")
+            elif material_error is not None:
+                failure = (500, f"调用物资服务失败: {str(material_error)}")
+            elif material is None:
+                failure = (404, "物资不存在")
+            elif material.get('materialStatus') != 0 or fields['material_id'] in borrowed:
+                failure = (409, "物资当前不可借出")
+            
+            if failure:
+                results[index] = _batch_result(index, *failure)
+                del parsed[index]
+        
+        if mode == 'allOrNothing' and len(parsed) < len(items):
+            return _batch_failure_response(mode, results)
+        
+        # 3. 写入全部记录，并在同一事务中写入物资状态变更事件
+        now = datetime.utcnow()
+        indexes = sorted(parsed)
+        rows = [
+            dict(
+                parsed[index],
+                status=BorrowRecord.STATUS_BORROWED,
+                borrowed_at=now,
+                created_at=now,
+                updated_at=now
+            )
+            for index in indexes
+        ]
+        
+        records = {}
+        if rows:
+            records = dict(zip(indexes, _insert_records(rows)))
+            db.session.add_all(outbox_events(
+                (record.material_id, 1, record.id) for record in records.values()
+            ))
+            stats_delta = BorrowStatsDelta()
+            for record in records.values():
+                stats_delta.add(after=stats_snapshot(record))
+            stats_delta.apply(db.session)
+            # 提交后实例会过期，响应数据和缓存键在提交前取出，避免逐条重新查询
+            created = {index: (record.id, record.to_dict(), record_key(record)) for index, record in records.items()}
+            db.session.commit()
+            outbox_dispatcher.notify()
+            response_cache.invalidate([(record_id, None, key) for record_id, _, key in created.values()])
+            
+            for index, (_, data, key) in created.items():
+                results[index] = _batch_result(index, 201, "创建借用记录成功", data)
+                count_cache.adjust(after=key)
+        
+        summary = {
+            'mode': mode,
+            'succeeded': len(records),
+            'failed': len(items) - len(records),
+            'results': results
+        }
+        if len(records) == len(items):
+            return created_response(data=summary, message="批量创建借用记录成功")
+        return success_response(
+            data=summary,
+            message=f"批量创建完成: 成功 {len(records)} 条，失败 {len(items) - len(records)} 条"
+        )
+    
+    except Exception as e:
+        db.session.rollback()
+        return internal_error_response(f"批量创建借用记录失败: {str(e)}")
+
+
 @borrows_bp.route('/borrows', methods=['GET'])
 def list_borrows():
     """
@@ -169,15 +811,38 @@ def list_borrows():
         in: query
         type: integer
         description: 单页数量，默认 10
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: 游标分页。传入该参数即启用游标模式（首页传空值），取值为上一页返回的 nextCursor；游标模式不返回 total
+      - name: totalStrategy
+        in: query
+        type: string
+        enum: [exact, estimate, none]
+        required: false
+        description: 总数统计策略。exact-精确 COUNT，estimate-按过滤条件缓存的估算值，none-不统计；默认 exact
       - name: include
         in: query
         type: string
         description: 包含额外信息，逗号分隔支持 user,material
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: 只返回的字段，逗号分隔（如 id,status,dueAt），同时只查询所需的列；指定后 include 的关联信息也须列出（user / material）才会获取
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: 上次响应的 ETag，本页结果未变化时返回 304（指定 include 时不支持条件请求）
     responses:
       200:
-        description: 借用记录列表
+        description: 借用记录列表（未指定 include 时附带 ETag 响应头）
         schema:
           $ref: '#/definitions/BorrowListResponse'
+      304:
+        description: 本页结果未变化
       400:
         description: 请求参数错误
         schema:
@@ -189,80 +854,451 @@ def list_borrows():
     """
     try:
         # 获取查询参数
-        user_id = request.args.get('userId', type=int)
-        material_id = request.args.get('materialId', type=int)
-        status = request.args.get('status', type=int)
-        page = request.args.get('page', 1, type=int)
-        page_size = request.args.get('pageSize', Config.DEFAULT_PAGE_SIZE, type=int)
-        include = request.args.get('include', '')
-        
-        # 限制分页大小
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > Config.MAX_PAGE_SIZE:
-            page_size = Config.DEFAULT_PAGE_SIZE
-        
-        # 构建查询
-        query = BorrowRecord.query
-        
-        if user_id is not None:
-            query = query.filter_by(user_id=user_id)
-        
-        if material_id is not None:
-            query = query.filter_by(material_id=material_id)
-        
-        if status is not None:
-            if status not in [0, 1, 2]:
-                return bad_request_response("status 必须为 0, 1 或 2")
-            query = query.filter_by(status=status)
+        params, error = parse_list_args(request.args)
+        if error:
+            return bad_request_response(error)
         
-        # 按创建时间倒序排列
-        query = query.order_by(BorrowRecord.created_at.desc())
+        page = params['page']
+        page_size = params['page_size']
+        total_strategy = params['total_strategy']
+        include_user = params['include_user']
+        include_material = params['include_material']
         
-        # 分页
-        pagination = query.paginate(page=page, per_page=page_size, error_out=False)
+        # 响应缓存：命中时不访问数据库（代数须在查询之前读取）
+        cached, cache_token = response_cache.lookup('/borrows', *list_cache_key(params))
+        if cached is not None:
+            return json_response(*cache_hit_response(cached, request.headers))
         
-        # 是否包含用户和物资信息
-        include_user = 'user' in include.lower()
-        include_material = 'material' in include.lower()
+        # 仅 exact 策略执行 COUNT（游标分页不统计总数）
+        total = list_total(params)
         
-        # 转换为字典列表
-        items = []
-        for record in pagination.items:
-            user_data = None
-            material_data = None
-            
-            # 如果需要包含用户信息
-            if include_user:
-                try:
-                    user_data = user_client.get_user(record.user_id)
-                except:
-                    pass  # 忽略获取用户信息失败
-            
-            # 如果需要包含物资信息
-            if include_material:
-                try:
-                    material_data = material_client.get_material(record.material_id)
-                except:
-                    pass  # 忽略获取物资信息失败
-            
-            items.append(record.to_dict(
+        # 条件请求（响应只依赖本地数据时）：先只查询本页各记录的 (id, updated_at)，未变化时直接返回 304
+        conditional = not (include_user or include_material)
+        if conditional and has_validators(request.headers):
+            versions = db.session.execute(page_statement(
+                db.select(BorrowRecord.id, BorrowRecord.updated_at).where(*list_criteria(params)), params
+            )).all()
+            etag = list_etag(params, versions, total)
+            if is_not_modified(request.headers, etag):
+                return '', 304, validator_headers(etag)
+        
+        # 构建查询（只读列投影）并排序分页；游标分页按 (created_at, id) 定位，不做 OFFSET 扫描
+        records = db.session.execute(page_statement(list_statement(params), params)).all()
+        etag = list_etag(params, records, total) if conditional else None
+        
+        if params['cursor'] is not None:
+            records, next_cursor = cursor_page(records, page_size)
+            data = {
+                'pageSize': page_size,
+                'nextCursor': next_cursor
+            }
+        else:
+            data = {
+                'page': page,
+                'pageSize': page_size,
+                'total': total,
+                'totalStrategy': total_strategy
+            }
+        
+        # 转换为字典列表（用户/物资信息去重后并发获取）
+        data = {
+            'items': enricher.enrich(
+                records,
                 include_user=include_user,
                 include_material=include_material,
-                user_data=user_data,
-                material_data=material_data
-            ))
+                fields=params['fields']
+            ),
+            **data
+        }
+        
+        # 返回结果（关联信息获取失败时不缓存）
+        return json_response(*cache_miss_response(
+            cache_token, data, etag,
+            ttl=response_cache.ttl_for(include_user, include_material),
+            cacheable=enrichment_complete(data['items'], include_user, include_material)
+        ))
+    
+    except Exception as e:
+        return internal_error_response(f"查询借用列表失败: {str(e)}")
+
+
+@borrows_bp.route('/borrows/export', methods=['GET'])
+def export_borrows():
+    """
+    流式导出借用记录（NDJSON / CSV）
+    ---
+    tags:
+      - Borrows
+    produces:
+      - application/x-ndjson
+      - text/csv
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson, csv]
+        required: false
+        description: 导出格式，默认 ndjson
+      - name: userId
+        in: query
+        type: integer
+        required: false
+        description: 用户ID
+      - name: materialId
+        in: query
+        type: integer
+        required: false
+        description: 物资ID
+      - name: status
+        in: query
+        type: integer
+        enum: [0, 1, 2]
+        required: false
+        description: 借用状态
+      - name: createdFrom
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: 创建时间下界（包含），ISO 8601
+      - name: createdTo
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: 创建时间上界（不包含），ISO 8601
+      - name: borrowedFrom
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: 借出时间下界（包含），ISO 8601
+      - name: borrowedTo
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: 借出时间上界（不包含），ISO 8601
+      - name: gzip
+        in: query
+        type: boolean
+        required: false
+        description: 是否以 gzip 压缩传输（Content-Encoding gzip）
+    responses:
+      200:
+        description: 按 (createdAt, id) 升序输出的记录流；NDJSON 每行一个记录对象，CSV 首行为表头
+      400:
+        description: 请求参数错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+      500:
+        description: 服务内部错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+    """
+    try:
+        # 校验参数（过滤条件与列表接口一致，不支持分页和游标）
+        params, error = parse_list_args(request.args)
+        if error:
+            return bad_request_response(error)
+        params['cursor_position'] = None
+        
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return bad_request_response("format 必须为 ndjson 或 csv")
+        use_gzip = request.args.get('gzip', '').lower() in ('1', 'true')
+        
+        criteria = list_criteria(params)
+        for name, (column, lower_bound) in EXPORT_DATE_RANGES.items():
+            value = request.args.get(name)
+            if not value:
+                continue
+            try:
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return bad_request_response(f"{name} 时间格式不正确，应为 ISO 8601 格式")
+            criteria.append(column >= value if lower_bound else column < value)
+        
+        fields = [name for name, _ in EXPORT_COLUMNS]
+        statement = db.select(*(column for _, column in EXPORT_COLUMNS)).where(*criteria).order_by(
+            BorrowRecord.created_at, BorrowRecord.id
+        ).execution_options(yield_per=Config.EXPORT_CHUNK_SIZE)
+        
+        def batches():
+            # 服务端游标按批读取，内存占用与导出总量无关
+            result = db.session.execute(statement)
+            try:
+                yield from result.partitions()
+            finally:
+                result.close()
+        
+        body = (ndjson_stream if export_format == 'ndjson' else csv_stream)(fields, batches())
+        headers = {
+            'Content-Disposition': (
+                f'attachment; filename="borrows-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}"'
+            )
+        }
+        if use_gzip:
+            body = gzip_stream(body, level=Config.EXPORT_GZIP_LEVEL)
+            headers['Content-Encoding'] = 'gzip'
+        
+        return Response(
+            stream_with_context(body),
+            content_type=EXPORT_FORMATS[export_format],
+            headers=headers
+        )
+    
+    except Exception as e:
+        return internal_error_response(f"导出借用记录失败: {str(e)}")
+
+
+@borrows_bp.route('/borrows/overdue', methods=['GET'])
+def list_overdue_borrows():
+    """
+    查询逾期借用记录（借出中且已超过应归还时间）
+    ---
+    tags:
+      - Borrows
+    parameters:
+      - name: asOf
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: 判定逾期的时间点，ISO 8601，默认当前时间
+      - name: userId
+        in: query
+        type: integer
+        required: false
+        description: 用户ID
+      - name: materialId
+        in: query
+        type: integer
+        required: false
+        description: 物资ID
+      - name: pageSize
+        in: query
+        type: integer
+        description: 单页数量，默认 10
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: 上一页返回的 nextCursor，首页不传
+      - name: include
+        in: query
+        type: string
+        description: 包含额外信息，逗号分隔支持 user,material
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: 只返回的字段，逗号分隔（overdueSeconds 始终返回）
+    responses:
+      200:
+        description: 按应归还时间升序（逾期最久的在前）的逾期记录
+        schema:
+          $ref: '#/definitions/OverdueBorrowListResponse'
+      400:
+        description: 请求参数错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+      500:
+        description: 服务内部错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+    """
+    try:
+        # 获取查询参数
+        params, error = parse_list_args(request.args)
+        if error:
+            return bad_request_response(error)
+        
+        as_of = datetime.utcnow()
+        as_of_str = request.args.get('asOf')
+        if as_of_str:
+            try:
+                as_of = datetime.fromisoformat(as_of_str.replace('Z', '+00:00'))
+            except ValueError:
+                return bad_request_response("asOf 时间格式不正确，应为 ISO 8601 格式")
+            # 数据库中的时间为 UTC 且不带时区
+            if as_of.tzinfo is not None:
+                as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        # 按 (status, due_at) 索引范围扫描，游标为 (due_at, id)
+        criteria = overdue_criteria(as_of, after=params['cursor_position'])
+        if params['user_id'] is not None:
+            criteria.append(BorrowRecord.user_id == params['user_id'])
+        if params['material_id'] is not None:
+            criteria.append(BorrowRecord.material_id == params['material_id'])
+        
+        page_size = params['page_size']
+        records = db.session.execute(
+            db.select(*BORROW_READ_COLUMNS).where(*criteria).order_by(*OVERDUE_ORDER).limit(page_size + 1)
+        ).all()
+        
+        next_cursor = None
+        if len(records) > page_size:
+            records = records[:page_size]
+            next_cursor = encode_cursor(records[-1].due_at, records[-1].id)
+        
+        items = enricher.enrich(
+            records,
+            include_user=params['include_user'],
+            include_material=params['include_material'],
+            fields=params['fields']
+        )
+        for item, record in zip(items, records):
+            item['overdueSeconds'] = int((as_of - record.due_at).total_seconds())
         
-        # 返回结果
         return success_response(data={
             'items': items,
-            'page': page,
             'pageSize': page_size,
-            'total': pagination.total
+            'asOf': as_of,
+            'nextCursor': next_cursor
         })
     
     except Exception as e:
-        return internal_error_response(f"查询借用列表失败: {str(e)}")
+        return internal_error_response(f"查询逾期借用记录失败: {str(e)}")
+
+
+@borrows_bp.route('/borrows/stats', methods=['GET'])
+def borrow_stats():
+    """
+    借用统计（读取增量维护的统计表，不扫描借用记录）
+    ---
+    tags:
+      - Borrows
+    parameters:
+      - name: userIds
+        in: query
+        type: string
+        required: false
+        description: 逗号分隔的用户ID，返回各用户的借出中数量和借用总数
+      - name: materialIds
+        in: query
+        type: string
+        required: false
+        description: 逗号分隔的物资ID，返回各物资的被借用次数和借出中数量
+      - name: from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: 每日借出/归还量的起始日期（包含，UTC），与 to 同时传入
+      - name: to
+        in: query
+        type: string
+        format: date
+        required: false
+        description: 每日借出/归还量的结束日期（包含，UTC），最多 366 天
+      - name: top
+        in: query
+        type: integer
+        required: false
+        description: 返回借出中数量最多的用户和被借用次数最多的物资排行，最多 100
+    responses:
+      200:
+        description: 请求的各项统计，未请求的项不返回
+        schema:
+          $ref: '#/definitions/BorrowStatsResponse'
+      400:
+        description: 请求参数错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+      500:
+        description: 服务内部错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+    """
+    try:
+        user_ids, error = _parse_id_list(request.args, 'userIds')
+        if error:
+            return bad_request_response(error)
+        material_ids, error = _parse_id_list(request.args, 'materialIds')
+        if error:
+            return bad_request_response(error)
+        
+        top = _get_int(request.args, 'top', 0)
+        if top < 0 or top > Config.MAX_PAGE_SIZE:
+            return bad_request_response(f"top 必须为 0 到 {Config.MAX_PAGE_SIZE} 之间的整数")
+        
+        date_from_str = request.args.get('from')
+        date_to_str = request.args.get('to')
+        if bool(date_from_str) != bool(date_to_str):
+            return bad_request_response("from 和 to 需要同时传入")
+        if date_from_str:
+            try:
+                date_from = date.fromisoformat(date_from_str)
+                date_to = date.fromisoformat(date_to_str)
+            except ValueError:
+                return bad_request_response("from/to 日期格式不正确，应为 YYYY-MM-DD")
+            if date_from > date_to:
+                return bad_request_response("from 不能晚于 to")
+            if (date_to - date_from).days >= 366:
+                return bad_request_response("日期范围最多 366 天")
+        
+        data = {}
+        
+        # 按主键查询，未出现过的用户/物资计数为 0
+        if user_ids:
+            found = {
+                stats.user_id: stats
+                for stats in BorrowUserStats.query.filter(BorrowUserStats.user_id.in_(user_ids))
+            }
+            data['users'] = [
+                found[user_id].to_dict() if user_id in found else BorrowUserStats(
+                    user_id=user_id, active_count=0, total_count=0
+                ).to_dict()
+                for user_id in user_ids
+            ]
+        
+        if material_ids:
+            found = {
+                stats.material_id: stats
+                for stats in BorrowMaterialStats.query.filter(BorrowMaterialStats.material_id.in_(material_ids))
+            }
+            data['materials'] = [
+                found[material_id].to_dict() if material_id in found else BorrowMaterialStats(
+                    material_id=material_id, borrow_count=0, active_count=0
+                ).to_dict()
+                for material_id in material_ids
+            ]
+        
+        # 按日期范围查询，缺失的日期补 0
+        if date_from_str:
+            found = {
+                stats.stat_date: stats
+                for stats in BorrowDailyStats.query.filter(
+                    BorrowDailyStats.stat_date >= date_from,
+                    BorrowDailyStats.stat_date <= date_to
+                )
+            }
+            days = (date_to - date_from).days + 1
+            data['daily'] = [
+                found[day].to_dict() if day in found else BorrowDailyStats(
+                    stat_date=day, borrowed_count=0, returned_count=0
+                ).to_dict()
+                for day in (date_from + timedelta(days=i) for i in range(days))
+            ]
+        
+        # 排行榜（按计数字段索引倒序读取）
+        if top:
+            data['topUsers'] = [
+                stats.to_dict() for stats in BorrowUserStats.query.filter(
+                    BorrowUserStats.active_count > 0
+                ).order_by(BorrowUserStats.active_count.desc()).limit(top)
+            ]
+            data['topMaterials'] = [
+                stats.to_dict() for stats in BorrowMaterialStats.query.filter(
+                    BorrowMaterialStats.borrow_count > 0
+                ).order_by(BorrowMaterialStats.borrow_count.desc()).limit(top)
+            ]
+        
+        return success_response(data=data)
+    
+    except Exception as e:
+        return internal_error_response(f"查询借用统计失败: {str(e)}")
 
 
 @borrows_bp.route('/borrows/<int:id>', methods=['GET'])
@@ -283,11 +1319,28 @@ def get_borrow(id):
         type: string
         required: false
         description: 包含额外信息，逗号分隔支持 user,material
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: 只返回的字段，逗号分隔（如 id,status,dueAt），同时只查询所需的列；指定后 include 的关联信息也须列出（user / material）才会获取
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: 上次响应的 ETag，记录未变化时返回 304（指定 include 时不支持条件请求）
+      - name: If-Modified-Since
+        in: header
+        type: string
+        required: false
+        description: 上次响应的 Last-Modified，记录此后未修改时返回 304
     responses:
       200:
-        description: 借用记录详情
+        description: 借用记录详情（未指定 include 时附带 ETag / Last-Modified 响应头）
         schema:
           $ref: '#/definitions/BorrowRecordResponse'
+      304:
+        description: 记录未变化
       404:
         description: 记录不存在
         schema:
@@ -298,16 +1351,37 @@ def get_borrow(id):
           $ref: '#/definitions/SimpleResponse'
     """
     try:
-        # 查询记录
-        record = BorrowRecord.query.get(id)
+        # 获取查询参数（fields 未列出的关联信息不获取）
+        fields, error = parse_fields(request.args)
+        if error:
+            return bad_request_response(error)
+        include_user, include_material = parse_include(request.args, fields)
+        
+        # 响应缓存：命中时不访问数据库（代数须在查询之前读取）
+        cached, cache_token = response_cache.lookup(
+            '/borrows/<int:id>', (id, include_user, include_material, fields), [borrow_dependency(id)]
+        )
+        if cached is not None:
+            return json_response(*cache_hit_response(cached, request.headers))
+        
+        # 条件请求（响应只依赖本地数据时）：只查询 updated_at 判断是否变化，未变化时不加载整行
+        conditional = not (include_user or include_material)
+        if conditional and has_validators(request.headers):
+            updated_at = db.session.execute(
+                db.select(BorrowRecord.updated_at).where(BorrowRecord.id == id)
+            ).scalar()
+            if updated_at is None:
+                return not_found_response("借用记录不存在")
+            if is_not_modified(request.headers, record_etag(id, updated_at), updated_at):
+                return '', 304, validator_headers(record_etag(id, updated_at), updated_at)
+        
+        # 查询记录（只读列投影，指定 fields 时只查询所需的列）
+        record = db.session.execute(
+            db.select(*borrow_read_columns(fields)).where(BorrowRecord.id == id)
+        ).first()
         if not record:
             return not_found_response("借用记录不存在")
         
-        # 获取查询参数
-        include = request.args.get('include', '')
-        include_user = 'user' in include.lower()
-        include_material = 'material' in include.lower()
-        
         user_data = None
         material_data = None
         
@@ -325,11 +1399,19 @@ def get_borrow(id):
             except:
                 pass
         
-        return success_response(data=record.to_dict(
+        data = borrow_to_dict(
+            record,
             include_user=include_user,
             include_material=include_material,
             user_data=user_data,
-            material_data=material_data
+            material_data=material_data,
+            fields=fields
+        )
+        etag = record_etag(record.id, record.updated_at) if conditional else None
+        return json_response(*cache_miss_response(
+            cache_token, data, etag, record.updated_at if conditional else None,
+            ttl=response_cache.ttl_for(include_user, include_material),
+            cacheable=enrichment_complete([data], include_user, include_material)
         ))
     
     except Exception as e:
@@ -383,6 +1465,9 @@ def update_borrow(id):
         if not record:
             return not_found_response("借用记录不存在")
         
+        before_key = record_key(record)
+        before_stats = stats_snapshot(record)
+        
         # 获取请求数据
         data = request.get_json()
         if not data:
@@ -410,11 +1495,8 @@ def update_borrow(id):
                 else:
                     record.returned_at = datetime.utcnow()
                 
-                # 更新物资状态为可用
-                try:
-                    material_client.mark_as_available(record.material_id)
-                except Exception as e:
-                    return internal_error_response(f"更新物资状态失败: {str(e)}")
+                # 物资状态更新为可用（与记录变更同事务写入发件箱）
+                db.session.add_all(outbox_events([(record.material_id, 0, record.id)]))
             
             record.status = new_status
         
@@ -432,7 +1514,11 @@ def update_borrow(id):
         # 更新时间戳
         record.updated_at = datetime.utcnow()
         
+        BorrowStatsDelta().add(before=before_stats, after=stats_snapshot(record)).apply(db.session)
         db.session.commit()
+        outbox_dispatcher.notify()
+        count_cache.adjust(before=before_key, after=record_key(record))
+        response_cache.invalidate([(record.id, before_key, record_key(record))])
         
         return success_response(
             data=record.to_dict(),
@@ -514,16 +1600,19 @@ def return_borrow(id):
             record.remark = remark
         
         # 更新状态为已归还
+        before_key = record_key(record)
+        before_stats = stats_snapshot(record)
         record.status = BorrowRecord.STATUS_RETURNED
         record.updated_at = datetime.utcnow()
         
-        # 更新物资状态为可用
-        try:
-            material_client.mark_as_available(record.material_id)
-        except Exception as e:
-            return internal_error_response(f"更新物资状态失败: {str(e)}")
+        # 物资状态更新为可用（与记录变更同事务写入发件箱）
+        db.session.add_all(outbox_events([(record.material_id, 0, record.id)]))
+        BorrowStatsDelta().add(before=before_stats, after=stats_snapshot(record)).apply(db.session)
         
         db.session.commit()
+        outbox_dispatcher.notify()
+        count_cache.adjust(before=before_key, after=record_key(record))
+        response_cache.invalidate([(record.id, before_key, record_key(record))])
         
         return success_response(
             data=record.to_dict(),
@@ -535,6 +1624,144 @@ def return_borrow(id):
         return internal_error_response(f"归还操作失败: {str(e)}")
 
 
+@borrows_bp.route('/borrows/return/batch', methods=['POST'])
+def return_borrows_batch():
+    """
+    批量归还
+    ---
+    tags:
+      - Borrows
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          $ref: '#/definitions/BorrowBatchReturnRequest'
+    responses:
+      200:
+        description: 处理完成，results 中给出每条记录的归还结果
+        schema:
+          $ref: '#/definitions/BorrowBatchResponse'
+      400:
+        description: 参数错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+      500:
+        description: 服务内部错误
+        schema:
+          $ref: '#/definitions/SimpleResponse'
+    """
+    try:
+        # 获取请求数据
+        data = request.get_json()
+        if not data:
+            return bad_request_response("请求体不能为空")
+        
+        ids = data.get('ids')
+        returned_at_str = data.get('returnedAt')
+        remark = data.get('remark')
+        
+        if not isinstance(ids, list) or not ids:
+            return bad_request_response("ids 必须为非空数组")
+        if any(not isinstance(i, int) or isinstance(i, bool) or i <= 0 for i in ids):
+            return bad_request_response("ids 中的元素必须为正整数")
+        
+        # 去重并保持请求顺序
+        ids = list(dict.fromkeys(ids))
+        positions = {record_id: index for index, record_id in enumerate(ids)}
+        if len(ids) > Config.MAX_BATCH_SIZE:
+            return bad_request_response(f"ids 单次最多 {Config.MAX_BATCH_SIZE} 条")
+        
+        # 解析归还时间
+        returned_at = datetime.utcnow()
+        if returned_at_str:
+            try:
+                returned_at = datetime.fromisoformat(returned_at_str.replace('Z', '+00:00'))
+            except ValueError:
+                return bad_request_response("returnedAt 时间格式不正确")
+        
+        # 1. 一次 IN 查询加载全部记录，并锁定行防止并发归还
+        records = {
+            record.id: record
+            for record in BorrowRecord.query.filter(BorrowRecord.id.in_(ids)).with_for_update()
+        }
+        
+        results = {}
+        to_return = []
+        for record_id in ids:
+            record = records.get(record_id)
+            if record is None:
+                results[record_id] = _batch_result(positions[record_id], 404, "借用记录不存在")
+            elif record.status == BorrowRecord.STATUS_RETURNED:
+                results[record_id] = _batch_result(positions[record_id], 409, "借用记录已归还", record.to_dict())
+            elif record.status != BorrowRecord.STATUS_BORROWED:
+                results[record_id] = _batch_result(positions[record_id], 409, "借用记录当前状态不允许归还操作", record.to_dict())
+            else:
+                to_return.append(record)
+        
+        # 2. 单条条件 UPDATE 批量更新状态，并在同一事务中写入物资状态变更事件
+        if to_return:
+            values = {
+                BorrowRecord.status: BorrowRecord.STATUS_RETURNED,
+                BorrowRecord.returned_at: returned_at,
+                BorrowRecord.updated_at: datetime.utcnow()
+            }
+            if remark is not None:
+                values[BorrowRecord.remark] = remark
+            
+            before_stats = {record.id: stats_snapshot(record) for record in to_return}
+            BorrowRecord.query.filter(
+                BorrowRecord.id.in_([record.id for record in to_return]),
+                BorrowRecord.status == BorrowRecord.STATUS_BORROWED
+            ).update(values, synchronize_session='evaluate')
+            
+            for record in to_return:
+                results[record.id] = _batch_result(positions[record.id], 200, "归还成功", record.to_dict())
+            
+            db.session.add_all(outbox_events(
+                (record.material_id, 0, record.id) for record in to_return
+            ))
+            stats_delta = BorrowStatsDelta()
+            for record in to_return:
+                stats_delta.add(before=before_stats[record.id], after=stats_snapshot(record))
+            stats_delta.apply(db.session)
+            db.session.commit()
+            outbox_dispatcher.notify()
+            for record in to_return:
+                count_cache.adjust(
+                    before=(record.user_id, record.material_id, BorrowRecord.STATUS_BORROWED),
+                    after=(record.user_id, record.material_id, BorrowRecord.STATUS_RETURNED)
+                )
+            response_cache.invalidate([
+                (
+                    record.id,
+                    (record.user_id, record.material_id, BorrowRecord.STATUS_BORROWED),
+                    (record.user_id, record.material_id, BorrowRecord.STATUS_RETURNED)
+                )
+                for record in to_return
+            ])
+        else:
+            db.session.rollback()
+        
+        for record_id in ids:
+            results[record_id]['id'] = record_id
+        
+        return success_response(
+            data={
+                'succeeded': len(to_return),
+                'failed': len(ids) - len(to_return),
+                'results': [results[record_id] for record_id in ids]
+            },
+            message=f"批量归还完成: 成功 {len(to_return)} 条，失败 {len(ids) - len(to_return)} 条"
+        )
+    
+    except Exception as e:
+        db.session.rollback()
+        return internal_error_response(f"批量归还失败: {str(e)}")
+
+
 @borrows_bp.route('/borrows/<int:id>', methods=['DELETE'])
 def delete_borrow(id):
     """
@@ -568,16 +1795,18 @@ def delete_borrow(id):
         if not record:
             return not_found_response("借用记录不存在")
         
-        # 如果记录状态为借出中，先归还
+        # 如果记录状态为借出中，释放物资（与删除同事务写入发件箱）
         if record.status == BorrowRecord.STATUS_BORROWED:
-            try:
-                material_client.mark_as_available(record.material_id)
-            except Exception as e:
-                return internal_error_response(f"更新物资状态失败: {str(e)}")
+            db.session.add_all(outbox_events([(record.material_id, 0, record.id)]))
         
         # 删除记录
+        before_key = record_key(record)
+        BorrowStatsDelta().add(before=stats_snapshot(record)).apply(db.session)
         db.session.delete(record)
         db.session.commit()
+        outbox_dispatcher.notify()
+        count_cache.adjust(before=before_key)
+        response_cache.invalidate([(id, before_key, None)])
         
         return success_response(
             data=None,
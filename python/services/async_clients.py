@@ -0,0 +1,258 @@
+import asyncio
+import httpx
+from config import Config
+from models import borrow_to_dict
+from services.cache import TTLCache
+from services.metrics import observe_dependency
+from services.deadline import DeadlineExceeded, current_deadline
+from services.circuit_breaker import CircuitOpenError, circuit_protected, get_breaker
+
+
+def create_async_http_client():
+    """创建下游服务共享的异步 HTTP 客户端（连接池参数与同步传输层一致）"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=Config.HTTP_POOL_MAXSIZE * Config.HTTP_POOL_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_POOL_MAXSIZE,
+            keepalive_expiry=Config.HTTP_POOL_IDLE_TIMEOUT or None
+        ),
+        timeout=httpx.Timeout(
+            Config.HTTP_READ_TIMEOUT,
+            connect=Config.HTTP_CONNECT_TIMEOUT
+        )
+    )
+
+
+def deadline_options():
+    """
+    请求截止时间对应的 httpx 请求参数（超时不超过剩余预算，并通过请求头传递给下游服务）
+
+    Raises:
+        DeadlineExceeded: 请求时间预算已用完
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return {}
+    connect, read = deadline.bound((Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT))
+    return {'timeout': httpx.Timeout(read, connect=connect), 'headers': deadline.headers()}
+
+
+class AsyncUserClient:
+    """人员管理服务异步客户端 (Java / 8083)"""
+
+    def __init__(self, http, cache=None, breaker=None):
+        self.http = http
+        self.breaker = breaker or get_breaker('user_service')
+        self.base_url = Config.USER_SERVICE_BASE_URL
+        self.cache = cache or TTLCache(
+            'user',
+            maxsize=Config.USER_CACHE_MAXSIZE,
+            ttl=Config.USER_CACHE_TTL,
+            negative_ttl=Config.CACHE_NEGATIVE_TTL
+        )
+
+    async def get_user(self, user_id, strict=False):
+        """
+        获取用户信息（优先读取本地缓存），返回值与 UserClient.get_user 一致
+
+        Raises:
+            Exception: 服务调用失败
+        """
+        if not strict:
+            found, user = self.cache.get(user_id)
+            if found:
+                return user
+
+        version = self.cache.version()
+        user = await self._fetch_user(user_id)
+        self.cache.set(user_id, user, version)
+        return user
+
+    @circuit_protected
+    @observe_dependency('user_service', 'get_user')
+    async def _fetch_user(self, user_id):
+        """从用户服务获取用户信息"""
+        try:
+            response = await self.http.get(f"{self.base_url}/users/{user_id}", **deadline_options())
+
+            if response.status_code == 200:
+                result = response.json()
+                user = result['data'] if result.get('code') == 200 and result.get('data') else None
+            elif response.status_code == 404:
+                user = None
+            else:
+                raise Exception(f"用户服务返回错误: {response.status_code}")
+
+        except DeadlineExceeded:
+            raise
+        except httpx.TimeoutException:
+            raise Exception("用户服务调用超时")
+        except httpx.ConnectError:
+            raise Exception("无法连接到用户服务")
+        except Exception as e:
+            raise Exception(f"调用用户服务失败: {str(e)}")
+
+        return user
+
+    async def check_user_exists(self, user_id):
+        """检查用户是否存在"""
+        try:
+            return await self.get_user(user_id) is not None
+        except CircuitOpenError:
+            raise
+        except Exception:
+            return False
+
+
+class AsyncMaterialClient:
+    """物资管理服务异步客户端 (Go / 8082)"""
+
+    def __init__(self, http, cache=None, breaker=None):
+        self.http = http
+        self.breaker = breaker or get_breaker('material_service')
+        self.base_url = Config.MATERIAL_SERVICE_BASE_URL
+        self.cache = cache or TTLCache(
+            'material',
+            maxsize=Config.MATERIAL_CACHE_MAXSIZE,
+            ttl=Config.MATERIAL_CACHE_TTL,
+            negative_ttl=Config.CACHE_NEGATIVE_TTL
+        )
+
+    async def get_material(self, material_id, strict=False):
+        """
+        获取物资信息（优先读取本地缓存），返回值与 MaterialClient.get_material 一致
+
+        Raises:
+            Exception: 服务调用失败
+        """
+        if not strict:
+            found, material = self.cache.get(material_id)
+            if found:
+                return material
+
+        version = self.cache.version()
+        material = await self._fetch_material(material_id)
+        self.cache.set(material_id, material, version)
+        return material
+
+    @circuit_protected
+    @observe_dependency('material_service', 'get_material')
+    async def _fetch_material(self, material_id):
+        """从物资服务获取物资信息"""
+        try:
+            response = await self.http.get(f"{self.base_url}/materials/{material_id}", **deadline_options())
+
+            if response.status_code == 200:
+                result = response.json()
+                material = result['data'] if result.get('code') == 200 and result.get('data') else None
+            elif response.status_code == 404:
+                material = None
+            else:
+                raise Exception(f"物资服务返回错误: {response.status_code}")
+
+        except DeadlineExceeded:
+            raise
+        except httpx.TimeoutException:
+            raise Exception("物资服务调用超时")
+        except httpx.ConnectError:
+            raise Exception("无法连接到物资服务")
+        except Exception as e:
+            raise Exception(f"调用物资服务失败: {str(e)}")
+
+        return material
+
+    async def check_material_available(self, material_id, strict=False):
+        """
+        检查物资是否可借（存在且状态为可用 status == 0）
+
+        Returns:
+            tuple: (is_available, material_data)
+        """
+        try:
+            material = await self.get_material(material_id, strict=strict)
+            if material is None:
+                return False, None
+            return material.get('materialStatus') == 0, material
+        except CircuitOpenError:
+            raise
+        except Exception:
+            return False, None
+
+    @circuit_protected
+    @observe_dependency('material_service', 'update_material_status')
+    async def update_material_status(self, material_id, status):
+        """
+        更新物资状态
+
+        Raises:
+            Exception: 服务调用失败
+        """
+        try:
+            response = await self.http.put(
+                f"{self.base_url}/materials/{material_id}",
+                json={"materialStatus": status},
+                **deadline_options()
+            )
+
+            if response.status_code == 200:
+                return response.json().get('code') == 200
+            raise Exception(f"物资服务返回错误: {response.status_code}")
+
+        except DeadlineExceeded:
+            raise
+        except httpx.TimeoutException:
+            raise Exception("物资服务调用超时")
+        except httpx.ConnectError:
+            raise Exception("无法连接到物资服务")
+        except Exception as e:
+            raise Exception(f"更新物资状态失败: {str(e)}")
+        finally:
+            self.cache.invalidate(material_id)
+
+    async def mark_as_borrowed(self, material_id):
+        """标记物资为借出中 (status = 1)"""
+        return await self.update_material_status(material_id, 1)
+
+    async def mark_as_available(self, material_id):
+        """标记物资为可用 (status = 0)"""
+        return await self.update_material_status(material_id, 0)
+
+
+class AsyncBorrowEnricher:
+    """借用记录关联信息异步加载器（与 BorrowEnricher 行为一致）"""
+
+    def __init__(self, user_client, material_client, max_concurrency=None):
+        self.user_client = user_client
+        self.material_client = material_client
+        self._semaphore = asyncio.Semaphore(max_concurrency or Config.ENRICH_MAX_WORKERS)
+
+    async def _safe_call(self, func, key):
+        async with self._semaphore:
+            try:
+                return await func(key)
+            except Exception:
+                return None
+
+    async def _fetch_all(self, func, keys):
+        keys = list(set(keys))
+        values = await asyncio.gather(*(self._safe_call(func, key) for key in keys))
+        return dict(zip(keys, values))
+
+    async def enrich(self, records, include_user=False, include_material=False, fields=None):
+        """将借用记录列表转换为字典（fields 为只输出的字段），并按需并发合并用户/物资信息"""
+        users, materials = await asyncio.gather(
+            self._fetch_all(self.user_client.get_user, [r.user_id for r in records] if include_user else []),
+            self._fetch_all(self.material_client.get_material, [r.material_id for r in records] if include_material else [])
+        )
+
+        return [
+            borrow_to_dict(
+                record,
+                include_user=include_user,
+                include_material=include_material,
+                user_data=users.get(record.user_id) if include_user else None,
+                material_data=materials.get(record.material_id) if include_material else None,
+                fields=fields
+            )
+            for record in records
+        ]
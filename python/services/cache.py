@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    进程内 TTL + LRU 缓存（线程安全，支持 404 负缓存）
+
+    invalidate 会记录键的失效版本，加载前通过 version() 取得的版本早于该键最近一次失效时，
+    set 丢弃加载结果，避免失效前开始的加载在失效后写回旧值。
+    """
+
+    def __init__(self, name, maxsize, ttl, negative_ttl=0):
+        """
+        Args:
+            name: 缓存名称（用于统计展示）
+            maxsize: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 正常结果的存活时间（秒）
+            negative_ttl: 空结果（None，例如 404）的存活时间（秒），0 表示不缓存空结果
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._stale_drops = 0
+
+        # 失效版本: 每次 invalidate / clear 递增 _version，_invalidated 记录各键最近一次失效时的版本，
+        # 超过 maxsize 个键时淘汰最早的记录，并把 _floor 提升到被淘汰的版本（按该版本视为已失效）
+        self._version = 0
+        self._invalidated = OrderedDict()
+        self._floor = 0
+
+    def get(self, key):
+        """
+        读取缓存
+
+        Returns:
+            tuple: (found, value)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return False, None
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return False, None
+
+            self._data.move_to_end(key)
+            self._hits += 1
+            return True, value
+
+    def version(self):
+        """当前失效版本（在加载前读取，写入时传给 set）"""
+        with self._lock:
+            return self._version
+
+    def set(self, key, value, version=None):
+        """
+        写入缓存，value 为 None 时按负缓存 TTL 处理
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            version: 加载前 version() 的返回值，该键此后被失效过时丢弃本次写入
+        """
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if not ttl or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            if version is not None and max(self._floor, self._invalidated.get(key, 0)) > version:
+                self._stale_drops += 1
+                return
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_load(self, key, loader, strict=False):
+        """
+        读取缓存，未命中时调用 loader 加载并写入缓存
+
+        Args:
+            key: 缓存键
+            loader: 加载函数，异常不会被缓存
+            strict: 为 True 时跳过缓存直接回源，并用最新结果刷新缓存
+        """
+        if not strict:
+            found, value = self.get(key)
+            if found:
+                return value
+
+        version = self.version()
+        value = loader(key)
+        self.set(key, value, version)
+        return value
+
+    def invalidate(self, key):
+        """删除指定缓存条目，并使失效前开始的加载结果不再写入"""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._invalidations += 1
+            self._version += 1
+            self._invalidated[key] = self._version
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > max(self.maxsize, 1):
+                _, version = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, version)
+
+    def clear(self):
+        """清空缓存（清空前开始的加载结果不再写入）"""
+        with self._lock:
+            self._data.clear()
+            self._version += 1
+            self._floor = self._version
+            self._invalidated.clear()
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxSize': self.maxsize,
+                'ttl': self.ttl,
+                'negativeTtl': self.negative_ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hitRate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+                'staleDrops': self._stale_drops
+            }
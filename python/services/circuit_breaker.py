@@ -0,0 +1,232 @@
+import asyncio
+import functools
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from config import Config
+from services.deadline import DeadlineExceeded
+from services.metrics import CIRCUIT_STATE, CIRCUIT_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开（或半开试探名额已满）时拒绝调用"""
+
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} 熔断中，{math.ceil(retry_after)} 秒后重试")
+
+
+class CircuitBreaker:
+    """
+    下游服务熔断器
+
+    - 关闭: 正常调用，连续失败达到 failure_threshold 次后打开
+    - 打开: 直接拒绝调用（CircuitOpenError），经过 recovery_timeout 秒后进入半开
+    - 半开: 放行至多 half_open_max_calls 个试探调用，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    # 状态在监控指标中的取值
+    STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+    def __init__(self, name, failure_threshold=None, recovery_timeout=None, half_open_max_calls=None, enabled=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout if recovery_timeout is not None else Config.CIRCUIT_RECOVERY_TIMEOUT
+        self.half_open_max_calls = half_open_max_calls or Config.CIRCUIT_HALF_OPEN_MAX_CALLS
+        self.enabled = enabled if enabled is not None else Config.CIRCUIT_BREAKER_ENABLED
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_calls = 0
+        self._total_failures = 0
+        self._rejected = 0
+        self._last_error = None
+        self._last_state_change = None
+        CIRCUIT_STATE.set(0, name)
+
+    def _set_state(self, state):
+        if state != self._state:
+            logger.warning("熔断器 %s: %s -> %s", self.name, self._state, state)
+            self._state = state
+            self._last_state_change = datetime.utcnow()
+            CIRCUIT_STATE.set(self.STATE_VALUES[state], self.name)
+
+    def _refresh(self, now):
+        """打开状态超过冷却时间后转为半开（需持有锁）"""
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._set_state(self.HALF_OPEN)
+            self._half_open_calls = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def acquire(self):
+        """
+        申请一次调用
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下试探名额已满
+        """
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return
+            self._rejected += 1
+            retry_after = max(self._opened_at + self.recovery_timeout - now, 0)
+
+        CIRCUIT_REJECTIONS.inc(self.name)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._failures = 0
+            if self._state == self.HALF_OPEN:
+                self._set_state(self.CLOSED)
+
+    def release(self):
+        """归还未实际发起的调用（不计成功或失败，半开状态下释放试探名额）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self, error=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._failures += 1
+            self._total_failures += 1
+            self._last_error = str(error) if error is not None else None
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def reset(self):
+        """手动恢复为关闭状态"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._set_state(self.CLOSED)
+
+    def stats(self):
+        """
+        熔断器状态
+
+        Returns:
+            dict: 当前状态、连续失败次数、剩余冷却时间及累计失败/拒绝次数
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            retry_after = None
+            if self._state == self.OPEN:
+                retry_after = round(max(self._opened_at + self.recovery_timeout - now, 0), 3)
+            return {
+                'name': self.name,
+                'enabled': self.enabled,
+                'state': self._state,
+                'consecutiveFailures': self._failures,
+                'retryAfter': retry_after,
+                'lastStateChange': self._last_state_change,
+                'lastError': self._last_error,
+                'totalFailures': self._total_failures,
+                'rejected': self._rejected,
+                'config': {
+                    'failureThreshold': self.failure_threshold,
+                    'recoveryTimeout': self.recovery_timeout,
+                    'halfOpenMaxCalls': self.half_open_max_calls
+                }
+            }
+
+
+def circuit_protected(func):
+    """
+    客户端方法熔断装饰器（使用实例的 breaker 属性，支持同步函数和协程函数）
+
+    被拒绝时抛出 CircuitOpenError，不会发起下游请求；调用抛出的异常计为一次失败，
+    请求时间预算用完而未发起请求（DeadlineExceeded）或调用被取消（CancelledError 等 BaseException）的不计入，
+    只释放半开状态下占用的试探名额。
+    """
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            self.breaker.acquire()
+            try:
+                result = await func(self, *args, **kwargs)
+            except DeadlineExceeded:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                self.breaker.record_failure(e)
+                raise
+            except BaseException:
+                # 调用被取消（asyncio.CancelledError，如 wait_for 超时）时结果未知，不计成功或失败，只释放试探名额
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self.breaker.acquire()
+        try:
+            result = func(self, *args, **kwargs)
+        except DeadlineExceeded:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+    return wrapper
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """获取进程内共享的下游服务熔断器（同步与异步客户端共用同一熔断器）"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def breaker_stats():
+    """全部熔断器状态"""
+    return {name: breaker.stats() for name, breaker in list(_breakers.items())}
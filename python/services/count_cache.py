@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from models import db, BorrowRecord
+from config import Config
+
+
+class BorrowCountCache:
+    """借用记录列表总数缓存（按过滤条件缓存 COUNT 结果，过期后后台刷新）"""
+
+    def __init__(self, ttl=None, maxsize=None):
+        self.ttl = ttl if ttl is not None else Config.COUNT_CACHE_TTL
+        self.maxsize = maxsize or Config.COUNT_CACHE_MAXSIZE
+
+        # key: (user_id, material_id, status)，None 表示不过滤该字段
+        self._data = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='borrow-count')
+
+    @staticmethod
+    def count(user_id=None, material_id=None, status=None):
+        """执行精确 COUNT 查询"""
+        query = db.session.query(db.func.count(BorrowRecord.id))
+        if user_id is not None:
+            query = query.filter(BorrowRecord.user_id == user_id)
+        if material_id is not None:
+            query = query.filter(BorrowRecord.material_id == material_id)
+        if status is not None:
+            query = query.filter(BorrowRecord.status == status)
+        return query.scalar()
+
+    def lookup(self, key):
+        """
+        读取已缓存的总数（不触发查询）
+
+        Returns:
+            tuple: (value, fresh)，未缓存时 value 为 None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None, False
+            self._data.move_to_end(key)
+            value, computed_at = entry
+            return value, time.monotonic() - computed_at <= self.ttl
+
+    def put(self, key, value):
+        """写入（或刷新）指定过滤条件的总数"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _refresh(self, app, key):
+        try:
+            with app.app_context():
+                self.put(key, self.count(*key))
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def estimate(self, user_id=None, material_id=None, status=None):
+        """
+        获取估算总数
+
+        未缓存时同步执行一次 COUNT；缓存过期时先返回旧值，同时提交后台刷新。
+
+        Returns:
+            int: 估算总数
+        """
+        key = (user_id, material_id, status)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+
+        if entry is None:
+            value = self.count(*key)
+            self.put(key, value)
+            return value
+
+        value, computed_at = entry
+        if time.monotonic() - computed_at > self.ttl:
+            with self._lock:
+                submit = key not in self._refreshing
+                self._refreshing.add(key)
+            if submit:
+                self._executor.submit(self._refresh, current_app._get_current_object(), key)
+        return value
+
+    @staticmethod
+    def _matches(key, fields):
+        user_id, material_id, status = key
+        return (
+            (user_id is None or user_id == fields[0]) and
+            (material_id is None or material_id == fields[1]) and
+            (status is None or status == fields[2])
+        )
+
+    def adjust(self, before=None, after=None):
+        """
+        根据单条记录的变更增量调整已缓存的总数
+
+        Args:
+            before: 变更前的 (user_id, material_id, status)，新建时为 None
+            after: 变更后的 (user_id, material_id, status)，删除时为 None
+        """
+        with self._lock:
+            for key, (value, computed_at) in self._data.items():
+                delta = 0
+                if before is not None and self._matches(key, before):
+                    delta -= 1
+                if after is not None and self._matches(key, after):
+                    delta += 1
+                if delta:
+                    self._data[key] = (max(value + delta, 0), computed_at)
+
+
+def record_key(record):
+    """借用记录对应的计数维度 (user_id, material_id, status)"""
+    return (record.user_id, record.material_id, record.status)
@@ -0,0 +1,117 @@
+import logging
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from config import Config
+from services.metrics import (
+    DB_POOL_CHECKOUT_WAIT, DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# 只对 QueuePool 有效的参数（内存 SQLite 使用 StaticPool，传入会报错）
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+# 带指标的连接池覆盖的 QueuePool 私有方法（SQLAlchemy 2.0 / 2.1 中存在，requirements.txt 限定 SQLAlchemy<2.2）；
+# 升级后如不存在则不使用带指标的连接池，只是缺少连接池指标，不影响数据库访问
+PRIVATE_HOOKS = ('_do_get', '_do_return_conn')
+HOOKS_AVAILABLE = all(callable(getattr(QueuePool, name, None)) for name in PRIVATE_HOOKS)
+
+
+class _PoolMetricsMixin:
+    """
+    记录连接获取等待耗时、等待超时次数及借出 / 溢出连接数
+
+    覆盖 QueuePool 的私有方法 _do_get / _do_return_conn（获取连接前没有公开的事件可用于计时），
+    SQLAlchemy 小版本升级可能改变其签名或行为，升级时需重新验证（见 PRIVATE_HOOKS）。
+    """
+
+    label = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.inc(self.label)
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, self.label)
+        self._record_usage()
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._record_usage()
+
+    def _record_usage(self):
+        DB_POOL_CHECKED_OUT.set(self.checkedout(), self.label)
+        DB_POOL_OVERFLOW.set(max(self.overflow(), 0), self.label)
+        DB_POOL_SIZE.set(self.size(), self.label)
+
+
+class InstrumentedQueuePool(_PoolMetricsMixin, QueuePool):
+    """同步引擎（Flask-SQLAlchemy）连接池"""
+
+    label = 'sync'
+
+
+class InstrumentedAsyncQueuePool(_PoolMetricsMixin, AsyncAdaptedQueuePool):
+    """异步引擎（asgi.py）连接池"""
+
+    label = 'async'
+
+
+def engine_options(database_uri, async_engine=False):
+    """
+    创建引擎的参数（Config.SQLALCHEMY_ENGINE_OPTIONS，开启监控指标时使用带指标的连接池）
+
+    Args:
+        database_uri: 数据库连接地址
+        async_engine: 是否用于 create_async_engine
+
+    Returns:
+        dict: 引擎参数
+    """
+    options = dict(Config.SQLALCHEMY_ENGINE_OPTIONS)
+    url = make_url(database_uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        for name in QUEUE_POOL_OPTIONS:
+            options.pop(name, None)
+        return options
+    if Config.METRICS_ENABLED and 'poolclass' not in options:
+        if HOOKS_AVAILABLE:
+            options['poolclass'] = InstrumentedAsyncQueuePool if async_engine else InstrumentedQueuePool
+        else:
+            logger.warning("当前 SQLAlchemy 版本的 QueuePool 缺少 %s，不采集连接池指标", '/'.join(PRIVATE_HOOKS))
+    return options
+
+
+def pool_stats(engine):
+    """
+    连接池状态
+
+    Args:
+        engine: SQLAlchemy 引擎（异步引擎传入 engine.sync_engine）
+
+    Returns:
+        dict: 连接池配置及当前常驻 / 空闲 / 借出 / 溢出连接数
+    """
+    # 读取连接池实例上的实际配置（引擎参数可能被覆盖，与 Config 不一定一致）
+    pool = engine.pool
+    stats = {
+        'poolClass': type(pool).__name__,
+        'recycle': getattr(pool, '_recycle', None),
+        'prePing': getattr(pool, '_pre_ping', None)
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'maxOverflow': getattr(pool, '_max_overflow', None),
+            'timeout': pool.timeout(),
+            'checkedIn': pool.checkedin(),
+            'checkedOut': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0)
+        })
+    return stats
@@ -0,0 +1,90 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config import Config
+
+# 当前请求的截止时间（线程池任务需通过 contextvars.copy_context() 传递）
+_current = ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """请求时间预算已用完"""
+
+
+class Deadline:
+    """请求级截止时间（单调时钟）"""
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """剩余时间（秒），已过期时为 0"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def bound(self, timeout):
+        """
+        将下游调用的超时时间限制在剩余预算内
+
+        Args:
+            timeout: 超时时间（秒），或 (connect, read) 元组
+
+        Returns:
+            与 timeout 形式相同的超时时间
+
+        Raises:
+            DeadlineExceeded: 预算已用完（不再发起请求）
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("请求时间预算已用完")
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) for value in timeout)
+        return min(timeout, remaining)
+
+    def headers(self):
+        """传递给下游服务的剩余预算请求头（毫秒，使用相对时长避免服务间时钟偏差）"""
+        return {Config.DEADLINE_HEADER: str(int(self.remaining() * 1000))}
+
+
+def current_deadline():
+    """当前请求的截止时间（未设置时为 None）"""
+    return _current.get()
+
+
+def parse_deadline_header(value):
+    """
+    解析上游传入的剩余预算请求头
+
+    Returns:
+        float: 剩余预算（秒），缺失或不合法时为 None
+    """
+    try:
+        milliseconds = int(value)
+    except (TypeError, ValueError):
+        return None
+    return milliseconds / 1000 if milliseconds > 0 else None
+
+
+@contextmanager
+def deadline_scope(seconds, upstream=None):
+    """
+    在代码块内设置请求截止时间
+
+    Args:
+        seconds: 时间预算（秒）
+        upstream: 上游传入的剩余预算（秒），比 seconds 更短时以其为准
+    """
+    if upstream is not None:
+        seconds = min(seconds, upstream)
+    deadline = Deadline(seconds)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
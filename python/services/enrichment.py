@@ -0,0 +1,111 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from models import borrow_to_dict
+
+
+class BorrowEnricher:
+    """借用记录关联信息加载器（批量去重 + 并发拉取用户/物资信息）"""
+
+    def __init__(self, user_client, material_client, max_workers=None, thread_name_prefix='borrow-enrich'):
+        self.user_client = user_client
+        self.material_client = material_client
+        self.max_workers = max_workers or Config.ENRICH_MAX_WORKERS
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+
+    def _safe_call(self, func, key):
+        """调用下游服务，失败时返回 None（与原逐条查询的容错行为一致）"""
+        try:
+            return func(key)
+        except Exception:
+            return None
+
+    def submit(self, func, *args, **kwargs):
+        """
+        在线程池上执行一次下游调用（传递当前上下文，使请求截止时间等对线程池任务生效）
+
+        Returns:
+            concurrent.futures.Future
+        """
+        return self._executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+    def call_many(self, func, keys):
+        """
+        在线程池上对一批（去重后的）键并发调用下游方法
+
+        Args:
+            func: 单参数下游调用，例如 material_client.mark_as_borrowed
+            keys: 参数集合（可重复，内部去重）
+
+        Returns:
+            dict: key -> (result, error)，调用成功时 error 为 None
+        """
+        def call(key):
+            try:
+                return func(key), None
+            except Exception as e:
+                return None, e
+
+        futures = {key: self.submit(call, key) for key in set(keys)}
+        return {key: future.result() for key, future in futures.items()}
+
+    def fetch(self, user_ids=(), material_ids=()):
+        """
+        并发获取一批用户和物资信息
+
+        Args:
+            user_ids: 用户ID集合（可重复，内部去重）
+            material_ids: 物资ID集合（可重复，内部去重）
+
+        Returns:
+            tuple: (users, materials)
+                users: dict, user_id -> 用户信息或 None
+                materials: dict, material_id -> 物资信息或 None
+        """
+        user_futures = {
+            uid: self.submit(self._safe_call, self.user_client.get_user, uid)
+            for uid in set(user_ids)
+        }
+        material_futures = {
+            mid: self.submit(self._safe_call, self.material_client.get_material, mid)
+            for mid in set(material_ids)
+        }
+
+        users = {uid: future.result() for uid, future in user_futures.items()}
+        materials = {mid: future.result() for mid, future in material_futures.items()}
+        return users, materials
+
+    def enrich(self, records, include_user=False, include_material=False, fields=None):
+        """
+        将借用记录列表转换为字典，并按需合并用户/物资信息
+
+        Args:
+            records: BorrowRecord 列表或按 BORROW_READ_COLUMNS 查询的结果行
+            include_user: 是否包含用户信息
+            include_material: 是否包含物资信息
+            fields: 只输出的字段元组（None 表示全部字段）
+
+        Returns:
+            list: 借用记录字典列表
+        """
+        users, materials = {}, {}
+        if include_user or include_material:
+            users, materials = self.fetch(
+                user_ids=[r.user_id for r in records] if include_user else (),
+                material_ids=[r.material_id for r in records] if include_material else ()
+            )
+
+        return [
+            borrow_to_dict(
+                record,
+                include_user=include_user,
+                include_material=include_material,
+                user_data=users.get(record.user_id) if include_user else None,
+                material_data=materials.get(record.material_id) if include_material else None,
+                fields=fields
+            )
+            for record in records
+        ]
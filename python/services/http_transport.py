@@ -0,0 +1,152 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+from services.deadline import current_deadline
+
+
+class HttpTransport:
+    """下游服务共享 HTTP 传输层（基于 requests.Session 的长连接池）"""
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, connect_timeout=None,
+                 read_timeout=None, idle_timeout=None, pool_block=None):
+        self.pool_connections = pool_connections or Config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        self.connect_timeout = connect_timeout or Config.HTTP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or Config.HTTP_READ_TIMEOUT
+        self.idle_timeout = idle_timeout if idle_timeout is not None else Config.HTTP_POOL_IDLE_TIMEOUT
+        self.pool_block = pool_block if pool_block is not None else Config.HTTP_POOL_BLOCK
+
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._in_flight = 0
+        self._total_requests = 0
+        self._total_errors = 0
+        self._evictions = 0
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=0
+        )
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    @property
+    def timeout(self):
+        """默认超时 (connect, read)"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def _evict_idle(self, now):
+        """连接池空闲超过 idle_timeout 时关闭全部空闲连接，避免复用已被对端关闭的连接"""
+        if self.idle_timeout and now - self._last_used > self.idle_timeout:
+            self.adapter.poolmanager.clear()
+            self._evictions += 1
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """
+        发送 HTTP 请求
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            timeout: 超时时间，默认使用配置中的 (connect, read)；设置了请求截止时间时不超过剩余预算
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.exceptions.RequestException: 请求失败
+            DeadlineExceeded: 请求时间预算已用完（未发起请求）
+        """
+        timeout = timeout or self.timeout
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = deadline.bound(timeout)
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **deadline.headers()}
+
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            self._last_used = now
+            self._in_flight += 1
+            self._total_requests += 1
+
+        try:
+            return self.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._total_errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._last_used = time.monotonic()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """
+        连接池统计信息
+
+        Returns:
+            dict: 全局计数以及每个下游主机的连接池使用情况
+        """
+        hosts = []
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # pool.pool 是预填充 maxsize 个槽位的队列，队列长度即未被借出的槽位数
+            available = pool.pool.qsize() if pool.pool is not None else 0
+            hosts.append({
+                'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+                'maxSize': pool.pool.maxsize if pool.pool is not None else self.pool_maxsize,
+                'inUse': (pool.pool.maxsize - available) if pool.pool is not None else 0,
+                'connectionsCreated': pool.num_connections,
+                'requests': pool.num_requests
+            })
+
+        with self._lock:
+            return {
+                'poolConnections': self.pool_connections,
+                'poolMaxSize': self.pool_maxsize,
+                'poolBlock': self.pool_block,
+                'connectTimeout': self.connect_timeout,
+                'readTimeout': self.read_timeout,
+                'idleTimeout': self.idle_timeout,
+                'inFlight': self._in_flight,
+                'totalRequests': self._total_requests,
+                'totalErrors': self._total_errors,
+                'idleEvictions': self._evictions,
+                'hosts': hosts
+            }
+
+    def close(self):
+        """关闭会话及所有连接"""
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """获取进程内共享的 HTTP 传输层（懒加载单例）"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
@@ -1,16 +1,48 @@
 import requests
 from config import Config
+from services.http_transport import get_transport
+from services.cache import TTLCache
+from services.metrics import observe_dependency
+from services.deadline import DeadlineExceeded
+from services.circuit_breaker import CircuitOpenError, circuit_protected, get_breaker
 
 
 class MaterialClient:
     """物资管理服务客户端 (Go / 8082)"""
     
-    def __init__(self):
+    def __init__(self, transport=None, cache=None, breaker=None):
+        self.http = transport or get_transport()
+        self.breaker = breaker or get_breaker('material_service')
         self.base_url = Config.MATERIAL_SERVICE_BASE_URL
+        self.cache = cache or TTLCache(
+            'material',
+            maxsize=Config.MATERIAL_CACHE_MAXSIZE,
+            ttl=Config.MATERIAL_CACHE_TTL,
+            negative_ttl=Config.CACHE_NEGATIVE_TTL
+        )
     
-    def get_material(self, material_id):
+    def get_material(self, material_id, strict=False):
         """
-        获取物资信息
+        获取物资信息（优先读取本地缓存）
+        
+        Args:
+            material_id: 物资ID
+            strict: 是否跳过缓存直接请求物资服务
+        
+        Returns:
+            dict: 物资信息，如果成功返回 {'materialId', 'materialName', 'materialStatus', ...}
+            None: 如果物资不存在或服务不可用
+        
+        Raises:
+            Exception: 服务调用失败
+        """
+        return self.cache.get_or_load(material_id, self._fetch_material, strict=strict)
+    
+    @circuit_protected
+    @observe_dependency('material_service', 'get_material')
+    def _fetch_material(self, material_id):
+        """
+        从物资服务获取物资信息
         
         Args:
             material_id: 物资ID
@@ -24,7 +56,7 @@ class MaterialClient:
         """
         try:
             url = f"{self.base_url}/materials/{material_id}"
-            response = requests.get(url, timeout=5)
+            response = self.http.get(url)
             
             if response.status_code == 200:
                 result = response.json()
@@ -37,6 +69,8 @@ class MaterialClient:
             else:
                 raise Exception(f"物资服务返回错误: {response.status_code}")
         
+        except DeadlineExceeded:
+            raise
         except requests.exceptions.Timeout:
             raise Exception("物资服务调用超时")
         except requests.exceptions.ConnectionError:
@@ -44,29 +78,37 @@ class MaterialClient:
         except Exception as e:
             raise Exception(f"调用物资服务失败: {str(e)}")
     
-    def check_material_available(self, material_id):
+    def check_material_available(self, material_id, strict=False):
         """
         检查物资是否可借（存在且状态为可用 status == 0）
         
         Args:
             material_id: 物资ID
+            strict: 是否跳过缓存直接请求物资服务（借出前校验应使用严格模式）
         
         Returns:
             tuple: (is_available, material_data)
                 is_available: bool, 是否可借
                 material_data: dict, 物资信息（如果存在）
+        
+        Raises:
+            CircuitOpenError: 物资服务熔断中（不能据此判定物资不存在）
         """
         try:
-            material = self.get_material(material_id)
+            material = self.get_material(material_id, strict=strict)
             if material is None:
                 return False, None
             
             # material_status: 0-可用, 1-借出中, 2-维护中
             is_available = material.get('materialStatus') == 0
             return is_available, material
+        except CircuitOpenError:
+            raise
         except:
             return False, None
     
+    @circuit_protected
+    @observe_dependency('material_service', 'update_material_status')
     def update_material_status(self, material_id, status):
         """
         更新物资状态
@@ -84,7 +126,7 @@ class MaterialClient:
         try:
             url = f"{self.base_url}/materials/{material_id}"
             payload = {"materialStatus": status}
-            response = requests.put(url, json=payload, timeout=5)
+            response = self.http.put(url, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -92,12 +134,17 @@ class MaterialClient:
             else:
                 raise Exception(f"物资服务返回错误: {response.status_code}")
         
+        except DeadlineExceeded:
+            raise
         except requests.exceptions.Timeout:
             raise Exception("物资服务调用超时")
         except requests.exceptions.ConnectionError:
             raise Exception("无法连接到物资服务")
         except Exception as e:
             raise Exception(f"更新物资状态失败: {str(e)}")
+        finally:
+            # 物资状态已（或可能已）变化，使本地缓存失效
+            self.cache.invalidate(material_id)
     
     def mark_as_borrowed(self, material_id):
         """
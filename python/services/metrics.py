@@ -0,0 +1,330 @@
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+from services import query_events
+
+# 默认延迟分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Prometheus 文本格式的 Content-Type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """指标基类（按标签值元组保存数据，单锁保护）"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _samples(self):
+        """
+        Returns:
+            list: (后缀, 标签值元组, 额外标签, 数值)
+        """
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for suffix, labels, extra, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labelnames, labels, extra)} {_format_number(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """单调递增计数器"""
+
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [('_total', labels, None, value) for labels, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """可增可减的瞬时值"""
+
+    type = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def _samples(self):
+        with self._lock:
+            return [('', labels, None, value) for labels, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    """分桶直方图（记录时只做一次二分查找和计数累加，导出时再计算累积值）"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # [各分桶计数（末位为 +Inf）, 总和, 总数]
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+
+        samples = []
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', labels, f'le="{_format_number(float(bound))}"', cumulative))
+            samples.append(('_sum', labels, None, total))
+            samples.append(('_count', labels, None, count))
+        return samples
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self):
+        """以 Prometheus 文本格式导出全部指标"""
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+# 接口请求
+HTTP_REQUESTS = Counter(
+    'borrow_http_requests', '按路由和状态码统计的请求数', ('method', 'route', 'status')
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'borrow_http_request_duration_seconds', '按路由统计的请求处理耗时', ('method', 'route')
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'borrow_http_requests_in_progress', '正在处理的请求数'
+)
+
+# 下游服务调用
+DEPENDENCY_DURATION = Histogram(
+    'borrow_dependency_request_duration_seconds', '下游服务调用耗时', ('dependency', 'method')
+)
+DEPENDENCY_ERRORS = Counter(
+    'borrow_dependency_errors', '下游服务调用失败次数', ('dependency', 'method')
+)
+CIRCUIT_STATE = Gauge(
+    'borrow_circuit_breaker_state', '下游服务熔断器状态（0-关闭，1-打开，2-半开）', ('dependency',)
+)
+CIRCUIT_REJECTIONS = Counter(
+    'borrow_circuit_breaker_rejections', '熔断器直接拒绝的调用次数', ('dependency',)
+)
+
+# 读接口响应缓存
+RESPONSE_CACHE_REQUESTS = Counter(
+    'borrow_response_cache_requests', '响应缓存查询次数', ('route', 'result')
+)
+RESPONSE_CACHE_INVALIDATIONS = Counter(
+    'borrow_response_cache_invalidations', '写操作触发的响应缓存失效次数'
+)
+
+# 数据库查询
+DB_QUERY_DURATION = Histogram(
+    'borrow_db_query_duration_seconds', '数据库语句执行耗时', ('operation',)
+)
+DB_QUERY_ERRORS = Counter(
+    'borrow_db_query_errors', '数据库语句执行失败次数', ('operation',)
+)
+
+# 数据库连接池（services/db_pool.py 中的连接池类记录，pool 标签为 sync / async）
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'borrow_db_pool_checkout_wait_seconds', '从连接池获取连接的等待耗时（含新建连接）', ('pool',)
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    'borrow_db_pool_checkout_timeouts', '等待空闲连接超时（QueuePool limit）次数', ('pool',)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'borrow_db_pool_checked_out', '已借出的连接数', ('pool',)
+)
+DB_POOL_OVERFLOW = Gauge(
+    'borrow_db_pool_overflow', '超出 pool_size 的溢出连接数', ('pool',)
+)
+DB_POOL_SIZE = Gauge(
+    'borrow_db_pool_size', '连接池常驻连接数上限（pool_size）', ('pool',)
+)
+
+
+def request_started():
+    """记录请求开始，返回开始时间"""
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    return time.perf_counter()
+
+
+def request_finished(started, method, route, status):
+    """记录请求结束"""
+    HTTP_REQUESTS_IN_PROGRESS.dec()
+    HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, route)
+    HTTP_REQUESTS.inc(method, route, str(status))
+
+
+def init_app(app):
+    """为 Flask 应用注册请求指标采集（路由标签取 URL 规则，避免路径参数导致标签基数膨胀）"""
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_started = request_started()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            request_finished(started, request.method, route, response.status_code)
+        return response
+
+    @app.teardown_request
+    def _record_failed_request(exc):
+        # 未经 after_request 的请求（未处理异常）按 500 记录
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            request_finished(started, request.method, route, 500)
+
+
+def observe_route(route):
+    """
+    ASGI 原生路由的请求指标装饰器（与 Flask 路由使用相同的路由标签，便于合并查询）
+
+    Args:
+        route: 路由标签，例如 /borrows/<int:id>
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(request):
+            started = request_started()
+            status = 500
+            try:
+                response = await endpoint(request)
+                status = response.status_code
+                return response
+            finally:
+                request_finished(started, request.method, route, status)
+        return wrapper
+    return decorator
+
+
+def observe_dependency(dependency, method):
+    """
+    下游服务调用指标装饰器（支持同步函数和协程函数）
+
+    Args:
+        dependency: 下游服务名称，例如 user_service
+        method: 调用方法名称，例如 get_user
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    DEPENDENCY_ERRORS.inc(dependency, method)
+                    raise
+                finally:
+                    DEPENDENCY_DURATION.observe(time.perf_counter() - started, dependency, method)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                DEPENDENCY_ERRORS.inc(dependency, method)
+                raise
+            finally:
+                DEPENDENCY_DURATION.observe(time.perf_counter() - started, dependency, method)
+        return wrapper
+    return decorator
+
+
+def _operation(statement):
+    """语句类型（SELECT / INSERT / UPDATE / DELETE 等）"""
+    parts = statement.lstrip().split(None, 1)
+    return parts[0].upper() if parts else 'UNKNOWN'
+
+
+def _observe_query(statement, duration):
+    DB_QUERY_DURATION.observe(duration, _operation(statement))
+
+
+def _observe_query_error(statement):
+    DB_QUERY_ERRORS.inc(_operation(statement or ''))
+
+
+_db_instrumented = False
+
+
+def instrument_database():
+    """为所有 SQLAlchemy 引擎（含异步引擎底层的同步引擎）注册语句耗时采集（与 query_profiler 共用 query_events 的计时）"""
+    global _db_instrumented
+    if _db_instrumented:
+        return
+    query_events.subscribe(_observe_query, _observe_query_error)
+    _db_instrumented = True
+
+
+def render():
+    """以 Prometheus 文本格式导出全部指标"""
+    return REGISTRY.render()
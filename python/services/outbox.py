@@ -0,0 +1,294 @@
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from models import db, MaterialStatusOutbox
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_events(updates):
+    """
+    构造物资状态变更事件（由调用方加入当前会话，与借用记录变更在同一事务中提交）
+
+    Args:
+        updates: (material_id, material_status, borrow_record_id) 列表
+
+    Returns:
+        list: MaterialStatusOutbox 实例列表
+    """
+    now = datetime.utcnow()
+    return [
+        MaterialStatusOutbox(
+            material_id=material_id,
+            material_status=material_status,
+            borrow_record_id=borrow_record_id,
+            status=MaterialStatusOutbox.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now,
+            updated_at=now
+        )
+        for material_id, material_status, borrow_record_id in updates
+    ]
+
+
+class OutboxDispatcher:
+    """物资状态发件箱投递器（后台批量拉取待投递事件，并发调用物资服务，失败按指数退避重试）"""
+
+    def __init__(self, material_client, batch_size=None, max_workers=None, poll_interval=None,
+                 max_attempts=None, retry_base_delay=None, retry_max_delay=None, lease_seconds=None):
+        self.material_client = material_client
+        self.app = None
+        self.batch_size = batch_size or Config.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval if poll_interval is not None else Config.OUTBOX_POLL_INTERVAL
+        self.max_attempts = max_attempts or Config.OUTBOX_MAX_ATTEMPTS
+        self.retry_base_delay = retry_base_delay if retry_base_delay is not None else Config.OUTBOX_RETRY_BASE_DELAY
+        self.retry_max_delay = retry_max_delay if retry_max_delay is not None else Config.OUTBOX_RETRY_MAX_DELAY
+        self.lease_seconds = lease_seconds or Config.OUTBOX_LEASE_SECONDS
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.OUTBOX_MAX_WORKERS,
+            thread_name_prefix='outbox-deliver'
+        )
+
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+        self._superseded = 0
+        self._lease_lost = 0
+        self._last_run_at = None
+        self._last_error = None
+
+    def init_app(self, app):
+        """绑定 Flask 应用（投递在应用上下文中访问数据库）"""
+        self.app = app
+
+    def notify(self):
+        """唤醒投递线程（写入新事件并提交后调用，避免等待下一个轮询周期）"""
+        self._wakeup.set()
+
+    def _backoff(self, attempts):
+        """第 attempts 次失败后的重试等待时间（指数退避 + 随机抖动）"""
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _deliver(self, claimed):
+        """
+        投递单个事件
+
+        Args:
+            claimed: _claim 返回的 (事件ID, 物资ID, 目标状态, 已尝试次数)
+
+        Returns:
+            str: 失败原因，投递成功时为 None
+        """
+        _, material_id, material_status, _ = claimed
+        try:
+            if self.material_client.update_material_status(material_id, material_status):
+                return None
+            return "物资服务返回失败"
+        except Exception as e:
+            return str(e)
+
+    def _claim(self, now):
+        """
+        领取一批到期事件并提交（SKIP LOCKED 使多个投递进程互不阻塞）
+
+        同一物资只投递最新的待投递事件，较早的事件标记为已覆盖，避免旧状态覆盖新状态
+        （只与待投递事件比较：已投递失败或已投递的较新事件不会使仍待投递的事件被覆盖）；
+        待投递的事件把 next_attempt_at 推迟到租约到期时间，投递期间不持有行锁，
+        其他投递进程在租约到期前不会再领取，投递进程中途退出时租约到期后重新投递。
+
+        Returns:
+            tuple: (领取的事件数, [(事件ID, 物资ID, 目标状态, 已尝试次数)], 租约到期时间, 被覆盖的事件数)
+        """
+        try:
+            events = MaterialStatusOutbox.query.filter(
+                MaterialStatusOutbox.status == MaterialStatusOutbox.STATUS_PENDING,
+                MaterialStatusOutbox.next_attempt_at <= now
+            ).order_by(MaterialStatusOutbox.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+            if not events:
+                db.session.rollback()
+                return 0, [], None, 0
+
+            latest = dict(
+                db.session.query(MaterialStatusOutbox.material_id, db.func.max(MaterialStatusOutbox.id))
+                .filter(
+                    MaterialStatusOutbox.material_id.in_({event.material_id for event in events}),
+                    MaterialStatusOutbox.status == MaterialStatusOutbox.STATUS_PENDING
+                )
+                .group_by(MaterialStatusOutbox.material_id)
+                .all()
+            )
+            # DATETIME 列为秒精度，租约时间取整，记录结果时按相等比较
+            lease_until = (now + timedelta(seconds=self.lease_seconds)).replace(microsecond=0)
+            claimed = []
+            for event in events:
+                event.updated_at = now
+                if event.id < latest[event.material_id]:
+                    event.status = MaterialStatusOutbox.STATUS_SUPERSEDED
+                else:
+                    event.next_attempt_at = lease_until
+                    claimed.append((event.id, event.material_id, event.material_status, event.attempts))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(events), claimed, lease_until, len(events) - len(claimed)
+
+    def _record(self, claimed, errors, lease_until):
+        """
+        记录投递结果并提交（只更新租约未被其他投递进程接管的事件）
+
+        Returns:
+            tuple: (成功数, 重试数, 失败数, 租约已失效的事件数)
+        """
+        now = datetime.utcnow()
+        sent = retried = failed = lost = 0
+        try:
+            for (event_id, _, _, attempts), error in zip(claimed, errors):
+                attempts += 1
+                values = {'attempts': attempts, 'updated_at': now}
+                if error is None:
+                    values.update(status=MaterialStatusOutbox.STATUS_SENT, last_error=None)
+                else:
+                    values['last_error'] = error[:255]
+                    if attempts >= self.max_attempts:
+                        values['status'] = MaterialStatusOutbox.STATUS_FAILED
+                    else:
+                        values['next_attempt_at'] = now + timedelta(seconds=self._backoff(attempts))
+
+                updated = MaterialStatusOutbox.query.filter(
+                    MaterialStatusOutbox.id == event_id,
+                    MaterialStatusOutbox.status == MaterialStatusOutbox.STATUS_PENDING,
+                    MaterialStatusOutbox.next_attempt_at == lease_until
+                ).update(values, synchronize_session=False)
+                if not updated:
+                    lost += 1
+                    logger.warning("物资状态事件 %s 的投递租约已失效，结果由接管的投递进程记录", event_id)
+                elif error is None:
+                    sent += 1
+                elif 'status' in values:
+                    failed += 1
+                    logger.error("物资状态事件 %s 投递失败且已达最大重试次数: %s", event_id, error)
+                else:
+                    retried += 1
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return sent, retried, failed, lost
+
+    def dispatch_once(self):
+        """
+        投递一批到期的待投递事件（需在应用上下文中调用）
+
+        领取、投递、记录结果分为独立的步骤：领取和记录结果各自在短事务中完成，
+        调用物资服务期间不持有数据库行锁和连接。
+
+        Returns:
+            int: 本批处理的事件数量
+        """
+        count, claimed, lease_until, superseded = self._claim(datetime.utcnow())
+        if not count:
+            return 0
+
+        sent = retried = failed = lost = 0
+        if claimed:
+            # 领取事务已提交，投递期间会话不持有连接
+            errors = list(self._executor.map(self._deliver, claimed))
+            sent, retried, failed, lost = self._record(claimed, errors, lease_until)
+
+        with self._lock:
+            self._sent += sent
+            self._retried += retried
+            self._failed += failed
+            self._superseded += superseded
+            self._lease_lost += lost
+        return count
+
+    def run_forever(self):
+        """循环投递直到调用 stop()；一批取满时立即继续，否则等待轮询周期或 notify()"""
+        while not self._stopped.is_set():
+            processed = 0
+            try:
+                with self.app.app_context():
+                    processed = self.dispatch_once()
+                with self._lock:
+                    self._last_run_at = datetime.utcnow()
+                    self._last_error = None
+            except Exception as e:
+                logger.exception("物资状态事件投递异常")
+                with self._lock:
+                    self._last_error = str(e)
+
+            if processed < self.batch_size:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def start(self):
+        """在后台守护线程中启动投递"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run_forever, name='outbox-dispatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台投递线程"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        """
+        发件箱状态（需在应用上下文中调用）
+
+        Returns:
+            dict: 各投递状态的事件数量、最早待投递事件的等待时间及本进程投递计数
+        """
+        counts = dict(
+            db.session.query(MaterialStatusOutbox.status, db.func.count(MaterialStatusOutbox.id))
+            .group_by(MaterialStatusOutbox.status)
+            .all()
+        )
+        oldest_pending = db.session.query(db.func.min(MaterialStatusOutbox.created_at)).filter(
+            MaterialStatusOutbox.status == MaterialStatusOutbox.STATUS_PENDING
+        ).scalar()
+
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'pending': counts.get(MaterialStatusOutbox.STATUS_PENDING, 0),
+                'sent': counts.get(MaterialStatusOutbox.STATUS_SENT, 0),
+                'failed': counts.get(MaterialStatusOutbox.STATUS_FAILED, 0),
+                'superseded': counts.get(MaterialStatusOutbox.STATUS_SUPERSEDED, 0),
+                'oldestPendingSeconds': (
+                    (datetime.utcnow() - oldest_pending).total_seconds() if oldest_pending else None
+                ),
+                'process': {
+                    'sent': self._sent,
+                    'retried': self._retried,
+                    'failed': self._failed,
+                    'superseded': self._superseded,
+                    'leaseLost': self._lease_lost,
+                    'lastRunAt': self._last_run_at.isoformat() if self._last_run_at else None,
+                    'lastError': self._last_error
+                },
+                'config': {
+                    'batchSize': self.batch_size,
+                    'pollInterval': self.poll_interval,
+                    'maxAttempts': self.max_attempts,
+                    'retryBaseDelay': self.retry_base_delay,
+                    'retryMaxDelay': self.retry_max_delay,
+                    'leaseSeconds': self.lease_seconds
+                }
+            }
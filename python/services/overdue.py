@@ -0,0 +1,247 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from models import db, BorrowRecord, SweeperWatermark, BORROW_READ_COLUMNS
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 逾期查询排序: (due_at, id) 升序，对应索引 idx_status_due (status, due_at)
+OVERDUE_ORDER = (BorrowRecord.due_at, BorrowRecord.id)
+
+
+def overdue_criteria(as_of, after=None):
+    """
+    逾期记录过滤条件：借出中且应归还时间早于 as_of
+
+    Args:
+        as_of: 判定逾期的时间点
+        after: (due_at, id) 位置，只返回该位置之后的记录（游标/水位线）
+    """
+    criteria = [
+        BorrowRecord.status == BorrowRecord.STATUS_BORROWED,
+        BorrowRecord.due_at < as_of
+    ]
+    if after is not None:
+        after_due_at, after_id = after
+        criteria.append(db.or_(
+            BorrowRecord.due_at > after_due_at,
+            db.and_(BorrowRecord.due_at == after_due_at, BorrowRecord.id > after_id)
+        ))
+    return criteria
+
+
+class OverdueSweeper:
+    """
+    逾期借用扫描器（按 (due_at, id) 水位线增量扫描新逾期的记录，并通知监听者）
+
+    创建时 dueAt 已过期、或更新时 dueAt 提前到水位线之前的记录不会再被主水位线扫到，
+    另按 (updated_at, id) 补扫水位线之前 rescan_window 内最近写入的逾期记录。
+    """
+
+    NAME = 'overdue_borrows'
+    RESCAN_NAME = 'overdue_borrows_rescan'
+
+    def __init__(self, batch_size=None, interval=None, rescan_window=None, rescan_lag=None):
+        self.app = None
+        self.batch_size = batch_size or Config.OVERDUE_SWEEP_BATCH_SIZE
+        self.interval = interval if interval is not None else Config.OVERDUE_SWEEP_INTERVAL
+        self.rescan_window = rescan_window or timedelta(hours=Config.OVERDUE_RESCAN_WINDOW_HOURS)
+        self.rescan_lag = rescan_lag if rescan_lag is not None else timedelta(seconds=Config.OVERDUE_RESCAN_LAG)
+        self._listeners = []
+
+        self._thread = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._emitted = 0
+        self._last_run_at = None
+        self._last_error = None
+
+    def init_app(self, app):
+        """绑定 Flask 应用（扫描在应用上下文中访问数据库）"""
+        self.app = app
+
+    def add_listener(self, listener):
+        """
+        注册逾期事件监听者
+
+        Args:
+            listener: 可调用对象，参数为本批新逾期的记录行列表（BORROW_READ_COLUMNS）
+        """
+        self._listeners.append(listener)
+        return listener
+
+    def _emit(self, rows):
+        logger.info("发现 %d 条新逾期借用记录", len(rows))
+        for listener in self._listeners:
+            try:
+                listener(rows)
+            except Exception:
+                logger.exception("逾期事件监听者处理失败")
+
+    def _rescan(self, watermark, as_of):
+        """
+        补扫主水位线之前最近写入的逾期记录（调用方已持有主水位线行锁）
+
+        只处理 updated_at 早于 as_of - rescan_lag 的写入，保证对应事务已提交；
+        补扫位置 (updated_at, id) 保存在 RESCAN_NAME 水位线中，每条写入只补扫一次。
+        """
+        rescan_to = as_of - self.rescan_lag
+        position = db.session.get(SweeperWatermark, self.RESCAN_NAME)
+        if position is None:
+            # 首次运行：从当前时间开始补扫
+            db.session.add(SweeperWatermark(
+                name=self.RESCAN_NAME, position_at=rescan_to, position_id=0, processed=0
+            ))
+            return []
+        if position.position_at >= rescan_to:
+            return []
+        if watermark.position_at is None:
+            # 主扫描尚未开始，全部逾期记录都会由主扫描处理
+            position.position_at, position.position_id = rescan_to, 0
+            return []
+
+        rows = db.session.execute(
+            db.select(*BORROW_READ_COLUMNS)
+            .where(
+                *overdue_criteria(as_of),
+                # 主水位线之后的记录由主扫描处理
+                BorrowRecord.due_at >= watermark.position_at - self.rescan_window,
+                db.or_(
+                    BorrowRecord.due_at < watermark.position_at,
+                    db.and_(BorrowRecord.due_at == watermark.position_at, BorrowRecord.id <= watermark.position_id)
+                ),
+                db.or_(
+                    BorrowRecord.updated_at > position.position_at,
+                    db.and_(BorrowRecord.updated_at == position.position_at, BorrowRecord.id > position.position_id)
+                ),
+                BorrowRecord.updated_at < rescan_to
+            )
+            .order_by(BorrowRecord.updated_at, BorrowRecord.id)
+            .limit(self.batch_size)
+        ).all()
+
+        if len(rows) < self.batch_size:
+            position.position_at, position.position_id = rescan_to, 0
+        else:
+            position.position_at, position.position_id = rows[-1].updated_at, rows[-1].id
+        position.processed += len(rows)
+        position.updated_at = datetime.utcnow()
+        return rows
+
+    def sweep_once(self, as_of=None):
+        """
+        扫描一批新逾期的记录并推进水位线（需在应用上下文中调用）
+
+        水位线行加锁（SKIP LOCKED），多个进程同时运行时只有一个进程执行扫描。
+
+        Returns:
+            int: 本批新逾期的记录数（含补扫的记录）
+        """
+        as_of = as_of or datetime.utcnow()
+        try:
+            watermark = SweeperWatermark.query.filter_by(name=self.NAME).with_for_update(skip_locked=True).first()
+            if watermark is None:
+                if db.session.get(SweeperWatermark, self.NAME) is not None:
+                    # 其他进程正在扫描
+                    db.session.rollback()
+                    return 0
+                watermark = SweeperWatermark(name=self.NAME, position_at=None, position_id=0, processed=0)
+                db.session.add(watermark)
+
+            late_rows = self._rescan(watermark, as_of)
+
+            after = None
+            if watermark.position_at is not None:
+                after = (watermark.position_at, watermark.position_id)
+
+            rows = db.session.execute(
+                db.select(*BORROW_READ_COLUMNS)
+                .where(*overdue_criteria(as_of, after))
+                .order_by(*OVERDUE_ORDER)
+                .limit(self.batch_size)
+            ).all()
+
+            if rows:
+                watermark.position_at = rows[-1].due_at
+                watermark.position_id = rows[-1].id
+                watermark.processed += len(rows)
+            watermark.updated_at = datetime.utcnow()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        rows = late_rows + rows
+        if rows:
+            self._emit(rows)
+            with self._lock:
+                self._emitted += len(rows)
+        return len(rows)
+
+    def run_forever(self):
+        """循环扫描直到调用 stop()；一批取满时立即继续，否则等待扫描周期"""
+        while not self._stopped.is_set():
+            processed = 0
+            try:
+                with self.app.app_context():
+                    processed = self.sweep_once()
+                with self._lock:
+                    self._last_run_at = datetime.utcnow()
+                    self._last_error = None
+            except Exception as e:
+                logger.exception("逾期借用扫描异常")
+                with self._lock:
+                    self._last_error = str(e)
+
+            if processed < self.batch_size:
+                self._stopped.wait(self.interval)
+
+    def start(self):
+        """在后台守护线程中启动扫描"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run_forever, name='overdue-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台扫描线程"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        """
+        扫描状态（需在应用上下文中调用）
+
+        Returns:
+            dict: 水位线位置、累计处理数及本进程发出的逾期事件数
+        """
+        watermark = db.session.get(SweeperWatermark, self.NAME)
+        rescan = db.session.get(SweeperWatermark, self.RESCAN_NAME)
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'watermark': {
+                    'dueAt': watermark.position_at if watermark else None,
+                    'id': watermark.position_id if watermark else None,
+                    'processed': watermark.processed if watermark else 0,
+                    'updatedAt': watermark.updated_at if watermark else None
+                },
+                'rescan': {
+                    'updatedAt': rescan.position_at if rescan else None,
+                    'processed': rescan.processed if rescan else 0
+                },
+                'process': {
+                    'emitted': self._emitted,
+                    'lastRunAt': self._last_run_at,
+                    'lastError': self._last_error
+                },
+                'config': {
+                    'batchSize': self.batch_size,
+                    'interval': self.interval,
+                    'rescanWindowHours': self.rescan_window.total_seconds() / 3600,
+                    'rescanLag': self.rescan_lag.total_seconds()
+                }
+            }
@@ -0,0 +1,50 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 订阅者: [(on_query, on_error)]
+#   on_query(statement, duration): 语句执行完成（duration 为秒）
+#   on_error(statement): 语句执行出错（可为 None）
+_subscribers = []
+_lock = threading.Lock()
+_registered = False
+
+
+def subscribe(on_query, on_error=None):
+    """
+    订阅 SQL 语句执行事件（metrics 与 query_profiler 共用同一组引擎监听器，每条语句只计时一次）
+
+    Args:
+        on_query: 语句执行完成时调用，参数为 (statement, duration)
+        on_error: 语句执行出错时调用，参数为 statement
+    """
+    global _registered
+    with _lock:
+        if (on_query, on_error) in _subscribers:
+            return
+        _subscribers.append((on_query, on_error))
+        if not _registered:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+            _registered = True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['_query_started'].pop()
+    for on_query, _ in _subscribers:
+        on_query(statement, duration)
+
+
+def _handle_error(context):
+    started = context.connection.info.get('_query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+    for _, on_error in _subscribers:
+        if on_error is not None:
+            on_error(context.statement)
@@ -0,0 +1,164 @@
+import functools
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from flask import request
+from config import Config
+from services import query_events
+
+logger = logging.getLogger(__name__)
+
+# 当前请求的 SQL 统计（contextvars 在线程和协程间天然隔离；异步引擎的 greenlet 沿用调用方上下文）
+_current = ContextVar('query_profile', default=None)
+
+# IN (?, ?, ?) 等展开的占位符列表，归一为同一语句形态
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)')
+
+
+def statement_shape(statement):
+    """语句形态：参数已绑定为占位符，仅需合并 IN 列表展开出的不同占位符个数"""
+    return _PLACEHOLDER_LIST.sub('(?)', statement)
+
+
+class QueryProfile:
+    """单个请求内的 SQL 执行统计"""
+
+    __slots__ = ('count', 'duration', 'shapes')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold=None):
+        """
+        同一请求内重复执行的语句形态（疑似 N+1 查询）
+
+        Args:
+            threshold: 执行次数阈值，默认 QUERY_REPEAT_THRESHOLD
+
+        Returns:
+            list: [(语句形态, 执行次数)]，按次数降序
+        """
+        threshold = threshold or Config.QUERY_REPEAT_THRESHOLD
+        merged = Counter()
+        for statement, count in self.shapes.items():
+            merged[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in merged.most_common() if count >= threshold]
+
+
+def start():
+    """开始统计当前请求，返回用于 finish() 的令牌"""
+    return _current.set(QueryProfile())
+
+
+def finish(token, label):
+    """
+    结束当前请求的统计，记录疑似 N+1 查询
+
+    Args:
+        token: start() 返回的令牌
+        label: 日志中标识请求的文本，例如 "GET /borrows"
+
+    Returns:
+        QueryProfile: 本请求的统计
+    """
+    profile = _current.get()
+    _current.reset(token)
+    if profile is not None:
+        for shape, count in profile.repeated():
+            logger.warning("疑似 N+1 查询: %s 中同一语句执行 %d 次: %s", label, count, _truncate(shape))
+    return profile
+
+
+def current():
+    """当前请求的统计（不在请求中时为 None）"""
+    return _current.get()
+
+
+def debug_headers(profile):
+    """
+    调试响应头
+
+    Returns:
+        dict: X-DB-Query-Count / X-DB-Query-Time（毫秒）/ X-DB-Repeated-Queries（疑似 N+1 的语句形态数）
+    """
+    return {
+        'X-DB-Query-Count': str(profile.count),
+        'X-DB-Query-Time': f'{profile.duration * 1000:.2f}',
+        'X-DB-Repeated-Queries': str(len(profile.repeated()))
+    }
+
+
+def _truncate(statement, limit=500):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def _record_query(statement, duration):
+    profile = _current.get()
+    if profile is not None:
+        profile.record(statement, duration)
+
+    if duration * 1000 >= Config.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning("慢查询 %.1f ms: %s", duration * 1000, _truncate(statement))
+
+
+def init_app(app):
+    """注册引擎事件并为 Flask 请求开启 SQL 统计（QUERY_DEBUG_HEADER 开启时输出调试响应头）"""
+    instrument_database()
+
+    @app.before_request
+    def _start_query_profile():
+        request.environ['borrow.query_profile'] = start()
+
+    @app.after_request
+    def _finish_query_profile(response):
+        token = request.environ.pop('borrow.query_profile', None)
+        if token is not None:
+            profile = finish(token, f'{request.method} {request.path}')
+            if Config.QUERY_DEBUG_HEADER:
+                response.headers.update(debug_headers(profile))
+        return response
+
+    @app.teardown_request
+    def _reset_query_profile(exc):
+        # 未经 after_request 的请求（未处理异常）也要复位上下文，避免线程复用时串到下一个请求
+        token = request.environ.pop('borrow.query_profile', None)
+        if token is not None:
+            finish(token, f'{request.method} {request.path}')
+
+
+def profile_route(endpoint):
+    """ASGI 原生路由的 SQL 统计装饰器（与 Flask 路由行为一致）"""
+    @functools.wraps(endpoint)
+    async def wrapper(request):
+        token = start()
+        try:
+            response = await endpoint(request)
+        except Exception:
+            finish(token, f'{request.method} {request.url.path}')
+            raise
+        profile = finish(token, f'{request.method} {request.url.path}')
+        if Config.QUERY_DEBUG_HEADER:
+            response.headers.update(debug_headers(profile))
+        return response
+    return wrapper
+
+
+_instrumented = False
+
+
+def instrument_database():
+    """为所有 SQLAlchemy 引擎注册语句统计及慢查询日志（与 metrics 共用 query_events 的计时）"""
+    global _instrumented
+    if _instrumented:
+        return
+    query_events.subscribe(_record_query)
+    _instrumented = True
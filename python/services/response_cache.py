@@ -0,0 +1,439 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from config import Config
+from services.metrics import RESPONSE_CACHE_REQUESTS, RESPONSE_CACHE_INVALIDATIONS
+from utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+# 不按用户/物资过滤的列表依赖的全局代数（任何写操作都会递增）
+ALL_BORROWS = 'borrows:all'
+
+
+def borrow_dependency(record_id):
+    return f'borrow:{record_id}'
+
+
+def user_dependency(user_id):
+    return f'user:{user_id}'
+
+
+def material_dependency(material_id):
+    return f'material:{material_id}'
+
+
+class MemoryBackend:
+    """
+    进程内缓存后端（按字节数限制的 LRU）
+
+    只在单个进程内共享；多 worker 部署时各进程的代数计数互不可见，需使用 SQLiteBackend 等共享后端。
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_bytes, max_generations=None):
+        self.max_bytes = max_bytes
+        self.max_generations = max_generations or Config.RESPONSE_CACHE_MAX_GENERATIONS
+
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._bytes = 0
+        # 代数取自单调递增序列；未记录的名称读作 _base，清空后 _base 大于此前发出的所有代数，旧条目不会再被命中
+        self._generations = {}
+        self._seq = 0
+        self._base = 0
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self._resets = 0
+
+    def generations(self, names):
+        with self._lock:
+            return tuple(self._generations.get(name, self._base) for name in names)
+
+    def bump(self, names):
+        with self._lock:
+            for name in names:
+                self._seq += 1
+                self._generations[name] = self._seq
+            if len(self._generations) > self.max_generations:
+                # 代数表超出上限时整体清空（连同缓存条目），保证内存有界
+                self._seq += 1
+                self._base = self._seq
+                self._generations.clear()
+                self._entries.clear()
+                self._bytes = 0
+                self._resets += 1
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._bytes -= len(key) + len(value)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(key) + len(previous[0])
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, (old_value, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_key) + len(old_value)
+                self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.name,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+                'generations': len(self._generations),
+                'evictions': self._evictions,
+                'resets': self._resets
+            }
+
+
+class SQLiteBackend:
+    """
+    本机共享缓存后端（SQLite 文件，WAL 模式）
+
+    同一主机上的多个 worker 进程共享缓存条目和代数计数，作为 Redis 等共享存储的本地替代。
+    容量按字节数限制：每写入 PURGE_EVERY 条检查一次，超出时优先淘汰最早过期的条目。
+    代数与 MemoryBackend 相同，取自 cache_meta 中的单调递增序列；代数表超过 max_generations 行时整体清空（连同缓存条目），
+    未记录的名称读作 base。
+    """
+
+    name = 'sqlite'
+    PURGE_EVERY = 100
+
+    def __init__(self, path, max_bytes, max_generations=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_generations = max_generations or Config.RESPONSE_CACHE_MAX_GENERATIONS
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            upgrading = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'cache_meta'"
+            ).fetchone()[0] == 0
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_generations (name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            if upgrading:
+                # 旧版本文件中的代数不是取自序列，清空后重新开始，避免与新发出的代数重复
+                conn.execute('DELETE FROM cache_generations')
+                conn.execute('DELETE FROM cache_entries')
+            conn.executemany(
+                'INSERT OR IGNORE INTO cache_meta (name, value) VALUES (?, 0)',
+                [('seq',), ('base',), ('count',), ('resets',)]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _connection(self):
+        """每个线程一个连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def generations(self, names):
+        # 单条语句读取，代数与 base 来自同一快照
+        placeholders = ','.join('?' * len(names))
+        rows = dict(self._connection().execute(
+            f'SELECT name, value FROM cache_generations WHERE name IN ({placeholders}) '
+            "UNION ALL SELECT '', value FROM cache_meta WHERE name = 'base'",
+            list(names)
+        ).fetchall())
+        base = rows.get('', 0)
+        return tuple(rows.get(name, base) for name in names)
+
+    def bump(self, names):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            meta = dict(conn.execute('SELECT name, value FROM cache_meta').fetchall())
+            seq, count = meta['seq'], meta['count']
+            for name in sorted(names):
+                seq += 1
+                if conn.execute('UPDATE cache_generations SET value = ? WHERE name = ?', (seq, name)).rowcount == 0:
+                    conn.execute('INSERT INTO cache_generations (name, value) VALUES (?, ?)', (name, seq))
+                    count += 1
+            updates = {'seq': seq, 'count': count}
+            if count > self.max_generations:
+                # 代数表超出上限时整体清空（连同缓存条目），base 大于此前发出的所有代数
+                seq += 1
+                conn.execute('DELETE FROM cache_generations')
+                conn.execute('DELETE FROM cache_entries')
+                updates = {'seq': seq, 'base': seq, 'count': 0, 'resets': meta['resets'] + 1}
+            conn.executemany(
+                'UPDATE cache_meta SET value = ? WHERE name = ?', [(value, name) for name, value in updates.items()]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at) VALUES (?, ?, ?, ?)',
+            (key, value, size, time.time() + ttl)
+        )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def purge(self):
+        """删除过期条目，并在超出容量时淘汰最早过期的条目"""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+            conn.execute(
+                'DELETE FROM cache_entries WHERE key IN ('
+                ' SELECT key FROM ('
+                '  SELECT key, SUM(size) OVER (ORDER BY expires_at DESC, key) AS running FROM cache_entries'
+                ' ) WHERE running > ?'
+                ')',
+                (self.max_bytes,)
+            )
+
+    def stats(self):
+        entries, size = self._connection().execute(
+            'SELECT COUNT(*), TOTAL(size) FROM cache_entries'
+        ).fetchone()
+        meta = dict(self._connection().execute('SELECT name, value FROM cache_meta').fetchall())
+        return {
+            'backend': self.name,
+            'path': self.path,
+            'entries': entries,
+            'bytes': int(size),
+            'maxBytes': self.max_bytes,
+            'generations': meta['count'],
+            'maxGenerations': self.max_generations,
+            'resets': meta['resets']
+        }
+
+
+def default_sqlite_path():
+    """默认缓存文件（系统临时目录下，按数据库地址区分，不同数据库的服务不会共用缓存）"""
+    digest = hashlib.sha1(Config.SQLALCHEMY_DATABASE_URI.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'borrow_response_cache_{digest}.sqlite3')
+
+
+def worker_count():
+    """WEB_CONCURRENCY（Gunicorn / Uvicorn 未指定 --workers 时使用的 worker 数）"""
+    try:
+        return int(os.getenv('WEB_CONCURRENCY', '1'))
+    except ValueError:
+        return 1
+
+
+BACKENDS = {
+    MemoryBackend.name: lambda: MemoryBackend(Config.RESPONSE_CACHE_MAX_BYTES),
+    SQLiteBackend.name: lambda: SQLiteBackend(
+        Config.RESPONSE_CACHE_SQLITE_PATH or default_sqlite_path(), Config.RESPONSE_CACHE_MAX_BYTES
+    )
+}
+
+
+class CachedResponse:
+    """缓存的响应：已序列化的 data 及条件请求校验信息"""
+
+    __slots__ = ('data', 'etag', 'last_modified')
+
+    def __init__(self, data, etag=None, last_modified=None):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ResponseCache:
+    """
+    读接口响应缓存（按代数失效）
+
+    每个缓存键附带其依赖的代数（单条记录、用户、物资或全部记录），写操作提交后递增相关代数，
+    读取时用当前代数拼出缓存键，旧代数下的条目不会再被命中，随 LRU / TTL 自然淘汰。
+    读取代数发生在查询数据库之前、递增代数发生在事务提交之后，并发读写时不会以新代数缓存旧数据。
+    """
+
+    def __init__(self, backend=None, ttl=None, enabled=None):
+        self.enabled = enabled if enabled is not None else Config.RESPONSE_CACHE_ENABLED
+        self.ttl = ttl or Config.RESPONSE_CACHE_TTL
+        self._backend = backend
+        self._backend_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+        self._invalidations = 0
+
+    @property
+    def backend(self):
+        """缓存后端（首次使用时按 RESPONSE_CACHE_BACKEND 创建）"""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    name = Config.RESPONSE_CACHE_BACKEND
+                    if name not in BACKENDS:
+                        raise ValueError(f"不支持的响应缓存后端: {name}，可选 {', '.join(BACKENDS)}")
+                    if name == MemoryBackend.name and worker_count() > 1:
+                        # 进程内代数无法通知其他 worker，多 worker 时改用共享后端
+                        logger.warning("WEB_CONCURRENCY > 1，响应缓存改用 sqlite 后端（memory 后端仅适用于单进程）")
+                        name = SQLiteBackend.name
+                    self._backend = BACKENDS[name]()
+        return self._backend
+
+    def ttl_for(self, include_user=False, include_material=False):
+        """包含下游服务数据的响应不超过对应本地缓存的 TTL，避免延长下游数据的陈旧时间"""
+        ttl = self.ttl
+        if include_user:
+            ttl = min(ttl, Config.USER_CACHE_TTL)
+        if include_material:
+            ttl = min(ttl, Config.MATERIAL_CACHE_TTL)
+        return ttl
+
+    def lookup(self, route, variant, dependencies):
+        """
+        查询缓存
+
+        Args:
+            route: 路由标签，例如 /borrows/<int:id>
+            variant: 决定响应内容的参数（过滤条件、分页、include 等）
+            dependencies: 依赖的代数名称列表
+
+        Returns:
+            tuple: (cached, token)
+                cached: CachedResponse，未命中时为 None
+                token: 用于 store() 的缓存键，缓存关闭时为 None
+        """
+        if not self.enabled:
+            return None, None
+
+        token = repr((route, variant, self.backend.generations(dependencies)))
+        value = self.backend.get(token)
+        with self._lock:
+            counter = self._hits if value is not None else self._misses
+            counter[route] = counter.get(route, 0) + 1
+        RESPONSE_CACHE_REQUESTS.inc(route, 'hit' if value is not None else 'miss')
+        if value is None:
+            return None, token
+
+        meta, data = value.split(b'\n', 1)
+        etag, last_modified = json_codec.loads(meta)
+        return CachedResponse(
+            data, etag, datetime.fromisoformat(last_modified) if last_modified else None
+        ), token
+
+    def store(self, token, data, etag=None, last_modified=None, ttl=None):
+        """
+        写入缓存
+
+        Args:
+            token: lookup() 返回的缓存键
+            data: 已序列化的 data（bytes）
+            etag: ETag（无条件请求支持时为 None）
+            last_modified: 最后修改时间
+            ttl: 存活时间（秒），默认 RESPONSE_CACHE_TTL
+        """
+        if token is None:
+            return
+        meta = json_codec.dumps([etag, last_modified])
+        self.backend.set(token, meta + b'\n' + data, ttl or self.ttl)
+
+    def invalidate(self, changes):
+        """
+        写操作提交后递增相关代数
+
+        Args:
+            changes: [(record_id, before, after)]，before / after 为变更前后的 (user_id, material_id, status)，
+                新建时 before 为 None，删除时 after 为 None
+        """
+        if not self.enabled:
+            return
+
+        names = {ALL_BORROWS}
+        for record_id, before, after in changes:
+            names.add(borrow_dependency(record_id))
+            for key in (before, after):
+                if key is not None:
+                    names.add(user_dependency(key[0]))
+                    names.add(material_dependency(key[1]))
+        self.backend.bump(names)
+        with self._lock:
+            self._invalidations += 1
+        RESPONSE_CACHE_INVALIDATIONS.inc()
+
+    def stats(self):
+        """
+        缓存状态
+
+        Returns:
+            dict: 各路由的命中/未命中次数及命中率、失效次数和后端容量使用情况
+        """
+        if not self.enabled:
+            return {'enabled': False}
+
+        with self._lock:
+            routes = {
+                route: {
+                    'hits': self._hits.get(route, 0),
+                    'misses': self._misses.get(route, 0),
+                    'hitRate': round(
+                        self._hits.get(route, 0) / (self._hits.get(route, 0) + self._misses.get(route, 0)), 4
+                    )
+                }
+                for route in sorted(set(self._hits) | set(self._misses))
+            }
+            invalidations = self._invalidations
+        return {
+            'enabled': True,
+            'ttl': self.ttl,
+            'routes': routes,
+            'invalidations': invalidations,
+            'store': self.backend.stats()
+        }
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from models import db, BorrowRecord, BorrowUserStats, BorrowMaterialStats, BorrowDailyStats
+
+# 各统计表的计数字段
+USER_COUNTERS = ('active_count', 'total_count')
+MATERIAL_COUNTERS = ('borrow_count', 'active_count')
+DAILY_COUNTERS = ('borrowed_count', 'returned_count')
+
+
+def stats_snapshot(record):
+    """借用记录中与统计相关的字段快照 (user_id, material_id, status, borrowed_at, returned_at)"""
+    return (record.user_id, record.material_id, record.status, record.borrowed_at, record.returned_at)
+
+
+class BorrowStatsDelta:
+    """一次事务内借用记录变更对统计表的增量（同一键的增量先合并，再按键逐行 UPSERT）"""
+
+    def __init__(self):
+        self.users = defaultdict(lambda: dict.fromkeys(USER_COUNTERS, 0))
+        self.materials = defaultdict(lambda: dict.fromkeys(MATERIAL_COUNTERS, 0))
+        self.daily = defaultdict(lambda: dict.fromkeys(DAILY_COUNTERS, 0))
+
+    def _apply(self, snapshot, sign):
+        user_id, material_id, status, borrowed_at, returned_at = snapshot
+        active = sign if status == BorrowRecord.STATUS_BORROWED else 0
+
+        self.users[user_id]['total_count'] += sign
+        self.users[user_id]['active_count'] += active
+        self.materials[material_id]['borrow_count'] += sign
+        self.materials[material_id]['active_count'] += active
+        if borrowed_at is not None:
+            self.daily[borrowed_at.date()]['borrowed_count'] += sign
+        if status == BorrowRecord.STATUS_RETURNED and returned_at is not None:
+            self.daily[returned_at.date()]['returned_count'] += sign
+
+    def add(self, before=None, after=None):
+        """
+        记录单条借用记录的变更
+
+        Args:
+            before: 变更前的 stats_snapshot，新建时为 None
+            after: 变更后的 stats_snapshot，删除时为 None
+        """
+        if before is not None:
+            self._apply(before, -1)
+        if after is not None:
+            self._apply(after, 1)
+        return self
+
+    def apply(self, session):
+        """在调用方的事务中写入统计表（由调用方提交）"""
+        _upsert(session, BorrowUserStats.__table__, 'user_id', self.users)
+        _upsert(session, BorrowMaterialStats.__table__, 'material_id', self.materials)
+        _upsert(session, BorrowDailyStats.__table__, 'stat_date', self.daily)
+
+
+def _upsert(session, table, key, deltas):
+    """
+    按主键累加计数（不存在时插入）
+
+    键按顺序写入，降低并发事务间死锁的概率；合并后为 0 的增量跳过。
+    """
+    rows = [
+        dict(counters, **{key: value})
+        for value, counters in sorted(deltas.items())
+        if any(counters.values())
+    ]
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    counters = [name for name in rows[0] if name != key]
+    if dialect == 'mysql':
+        statement = mysql.insert(table)
+        statement = statement.on_duplicate_key_update({
+            name: table.c[name] + statement.inserted[name] for name in counters
+        })
+    else:
+        statement = (postgresql if dialect == 'postgresql' else sqlite).insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[key]],
+            set_={name: table.c[name] + statement.excluded[name] for name in counters}
+        )
+    session.execute(statement, rows)
+
+
+def rebuild_stats():
+    """
+    从 borrow_records 全量重建统计表（需在应用上下文中调用，在同一事务中清空并回填）
+
+    Returns:
+        dict: 各统计表重建后的行数
+    """
+    active = db.func.sum(db.case((BorrowRecord.status == BorrowRecord.STATUS_BORROWED, 1), else_=0))
+    borrowed_date = db.func.date(BorrowRecord.borrowed_at)
+    returned_date = db.func.date(BorrowRecord.returned_at)
+
+    borrowed_by_date = db.select(
+        borrowed_date.label('stat_date'),
+        db.func.count().label('borrowed_count'),
+        db.literal(0).label('returned_count')
+    ).where(BorrowRecord.borrowed_at.isnot(None)).group_by(borrowed_date)
+    returned_by_date = db.select(
+        returned_date.label('stat_date'),
+        db.literal(0).label('borrowed_count'),
+        db.func.count().label('returned_count')
+    ).where(
+        BorrowRecord.status == BorrowRecord.STATUS_RETURNED,
+        BorrowRecord.returned_at.isnot(None)
+    ).group_by(returned_date)
+    daily = db.union_all(borrowed_by_date, returned_by_date).subquery()
+
+    statements = {
+        BorrowUserStats.__table__: db.select(
+            BorrowRecord.user_id, active, db.func.count()
+        ).group_by(BorrowRecord.user_id),
+        BorrowMaterialStats.__table__: db.select(
+            BorrowRecord.material_id, db.func.count(), active
+        ).group_by(BorrowRecord.material_id),
+        BorrowDailyStats.__table__: db.select(
+            daily.c.stat_date, db.func.sum(daily.c.borrowed_count), db.func.sum(daily.c.returned_count)
+        ).group_by(daily.c.stat_date)
+    }
+    columns = {
+        BorrowUserStats.__table__: ('user_id', 'active_count', 'total_count'),
+        BorrowMaterialStats.__table__: ('material_id', 'borrow_count', 'active_count'),
+        BorrowDailyStats.__table__: ('stat_date', 'borrowed_count', 'returned_count')
+    }
+
+    try:
+        result = {}
+        for table, select in statements.items():
+            db.session.execute(table.delete())
+            db.session.execute(table.insert().from_select(columns[table], select))
+            result[table.name] = db.session.execute(db.select(db.func.count()).select_from(table)).scalar()
+        db.session.commit()
+        return result
+    except Exception:
+        db.session.rollback()
+        raise
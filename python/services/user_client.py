@@ -1,16 +1,48 @@
 import requests
 from config import Config
+from services.http_transport import get_transport
+from services.cache import TTLCache
+from services.metrics import observe_dependency
+from services.deadline import DeadlineExceeded
+from services.circuit_breaker import CircuitOpenError, circuit_protected, get_breaker
 
 
 class UserClient:
     """人员管理服务客户端 (Java / 8083)"""
     
-    def __init__(self):
+    def __init__(self, transport=None, cache=None, breaker=None):
+        self.http = transport or get_transport()
+        self.breaker = breaker or get_breaker('user_service')
         self.base_url = Config.USER_SERVICE_BASE_URL
+        self.cache = cache or TTLCache(
+            'user',
+            maxsize=Config.USER_CACHE_MAXSIZE,
+            ttl=Config.USER_CACHE_TTL,
+            negative_ttl=Config.CACHE_NEGATIVE_TTL
+        )
     
-    def get_user(self, user_id):
+    def get_user(self, user_id, strict=False):
         """
-        获取用户信息
+        获取用户信息（优先读取本地缓存）
+        
+        Args:
+            user_id: 用户ID
+            strict: 是否跳过缓存直接请求用户服务
+        
+        Returns:
+            dict: 用户信息，如果成功返回 {'id', 'name', 'roleId'}
+            None: 如果用户不存在或服务不可用
+        
+        Raises:
+            Exception: 服务调用失败
+        """
+        return self.cache.get_or_load(user_id, self._fetch_user, strict=strict)
+    
+    @circuit_protected
+    @observe_dependency('user_service', 'get_user')
+    def _fetch_user(self, user_id):
+        """
+        从用户服务获取用户信息
         
         Args:
             user_id: 用户ID
@@ -24,7 +56,7 @@ class UserClient:
         """
         try:
             url = f"{self.base_url}/users/{user_id}"
-            response = requests.get(url, timeout=5)
+            response = self.http.get(url)
             
             if response.status_code == 200:
                 result = response.json()
@@ -37,6 +69,8 @@ class UserClient:
             else:
                 raise Exception(f"用户服务返回错误: {response.status_code}")
         
+        except DeadlineExceeded:
+            raise
         except requests.exceptions.Timeout:
             raise Exception("用户服务调用超时")
         except requests.exceptions.ConnectionError:
@@ -53,9 +87,14 @@ class UserClient:
         
         Returns:
             bool: 用户是否存在
+        
+        Raises:
+            CircuitOpenError: 用户服务熔断中（不能据此判定用户不存在）
         """
         try:
             user = self.get_user(user_id)
             return user is not None
+        except CircuitOpenError:
+            raise
         except:
             return False
@@ -0,0 +1,117 @@
+"""
+测试公共配置
+
+与 benchmarks/load_test.py 相同，在导入 app 之前把数据库指向临时目录下的 SQLite 文件；
+下游用户 / 物资服务由进程内替身代替，每个用例开始前重建数据表并使用新的响应缓存和总数缓存。
+
+运行（在 python/ 目录下）:
+    python -m pytest -q tests
+"""
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from config import Config
+
+
+# SQLite 只有 INTEGER PRIMARY KEY 会自增
+@compiles(BigInteger, 'sqlite')
+def _bigint_as_integer(type_, compiler, **kw):
+    return 'INTEGER'
+
+
+Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='borrow-tests-'), 'borrow.db')
+Config.RESPONSE_CACHE_BACKEND = 'memory'
+
+
+class FakeUserService:
+    """用户服务替身（missing 中的用户不存在）"""
+
+    def __init__(self):
+        self.missing = set()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_user(self, user_id, strict=False):
+        with self._lock:
+            self.calls.append(user_id)
+        if user_id in self.missing:
+            return None
+        return {'id': user_id, 'username': f'user{user_id}'}
+
+
+class FakeMaterialService:
+    """物资服务替身（statuses 保存物资状态，failing 中的物资调用失败）"""
+
+    def __init__(self):
+        self.statuses = {}
+        self.missing = set()
+        self.failing = set()
+        self.calls = []
+        self.updates = []
+        self._lock = threading.Lock()
+
+    def get_material(self, material_id, strict=False):
+        with self._lock:
+            self.calls.append(material_id)
+        if material_id in self.failing:
+            raise Exception("物资服务不可用")
+        if material_id in self.missing:
+            return None
+        return {'materialId': material_id, 'materialStatus': self.statuses.get(material_id, 0)}
+
+    def update_material_status(self, material_id, status):
+        if material_id in self.failing:
+            raise Exception("物资服务不可用")
+        with self._lock:
+            self.updates.append((material_id, status))
+            self.statuses[material_id] = status
+        return True
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    return app
+
+
+@pytest.fixture
+def users(monkeypatch):
+    import routes_borrows
+    service = FakeUserService()
+    monkeypatch.setattr(routes_borrows.user_client, 'get_user', service.get_user)
+    return service
+
+
+@pytest.fixture
+def materials(monkeypatch):
+    import routes_borrows
+    service = FakeMaterialService()
+    monkeypatch.setattr(routes_borrows.material_client, 'get_material', service.get_material)
+    monkeypatch.setattr(routes_borrows.material_client, 'update_material_status', service.update_material_status)
+    return service
+
+
+@pytest.fixture
+def client(app, users, materials, monkeypatch):
+    """重建数据表的测试客户端（响应缓存、总数缓存使用新的实例）"""
+    import routes_borrows
+    from models import db
+    from services.count_cache import BorrowCountCache
+    from services.response_cache import ResponseCache, MemoryBackend
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    monkeypatch.setattr(routes_borrows, 'response_cache', ResponseCache(
+        backend=MemoryBackend(Config.RESPONSE_CACHE_MAX_BYTES), enabled=True
+    ))
+    monkeypatch.setattr(routes_borrows, 'count_cache', BorrowCountCache())
+    return app.test_client()
@@ -0,0 +1,82 @@
+"""
+批量借出 / 批量归还测试（返回的记录ID与数据库一致，发件箱事件指向对应记录，allOrNothing 失败时不写入）
+"""
+from models import db, BorrowRecord, MaterialStatusOutbox
+
+
+def items(*material_ids, user_id=1):
+    return [{'userId': user_id, 'materialId': material_id} for material_id in material_ids]
+
+
+def outbox_rows(app):
+    with app.app_context():
+        return [
+            (event.material_id, event.material_status, event.borrow_record_id)
+            for event in MaterialStatusOutbox.query.order_by(MaterialStatusOutbox.id)
+        ]
+
+
+def test_batch_create_returns_database_ids(app, client):
+    # 先写入一条记录，批量写入的ID不从 1 开始
+    assert client.post('/borrows', json={'userId': 9, 'materialId': 900}).status_code == 201
+
+    response = client.post('/borrows/batch', json={'items': items(101, 102, 103)})
+    assert response.status_code == 201, response.get_json()
+    results = response.get_json()['data']['results']
+    created = {result['data']['materialId']: result['data']['id'] for result in results}
+
+    with app.app_context():
+        stored = dict(db.session.query(BorrowRecord.material_id, BorrowRecord.id).filter(
+            BorrowRecord.material_id.in_(created)
+        ).all())
+    assert created == stored
+    assert [result['index'] for result in results] == [0, 1, 2]
+    assert outbox_rows(app)[1:] == [(material_id, 1, created[material_id]) for material_id in (101, 102, 103)]
+
+
+def test_batch_create_all_or_nothing_rolls_back(app, client, materials):
+    materials.statuses[202] = 1
+
+    response = client.post('/borrows/batch', json={'items': items(201, 202, 203)})
+    assert response.status_code == 409
+    codes = [result['code'] for result in response.get_json()['data']['results']]
+    assert codes == [424, 409, 424]
+
+    with app.app_context():
+        assert BorrowRecord.query.count() == 0
+    assert outbox_rows(app) == []
+
+
+def test_batch_create_best_effort_keeps_valid_items(app, client, users):
+    users.missing.add(2)
+
+    response = client.post('/borrows/batch', json={
+        'mode': 'bestEffort',
+        'items': items(301) + items(302, user_id=2) + items(301)
+    })
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert [result['code'] for result in data['results']] == [201, 404, 409]
+    assert data['succeeded'] == 1
+
+    with app.app_context():
+        assert [record.material_id for record in BorrowRecord.query] == [301]
+
+
+def test_batch_return_updates_records_and_outbox(app, client):
+    created = client.post('/borrows/batch', json={'items': items(401, 402)}).get_json()['data']['results']
+    ids = [result['data']['id'] for result in created]
+
+    response = client.post('/borrows/return/batch', json={'ids': ids + [9999]})
+    assert response.status_code == 200
+    results = response.get_json()['data']['results']
+    assert [(result['id'], result['code']) for result in results] == [(ids[0], 200), (ids[1], 200), (9999, 404)]
+
+    with app.app_context():
+        assert {record.id: record.status for record in BorrowRecord.query} == {
+            ids[0]: BorrowRecord.STATUS_RETURNED, ids[1]: BorrowRecord.STATUS_RETURNED
+        }
+    assert sorted(outbox_rows(app)[2:]) == [(401, 0, ids[0]), (402, 0, ids[1])]
+
+    again = client.post('/borrows/return/batch', json={'ids': ids[:1]}).get_json()['data']['results']
+    assert again[0]['code'] == 409
@@ -0,0 +1,73 @@
+"""
+本地 TTL 缓存测试（加载期间被失效时不写回旧值）
+
+运行（在 python/ 目录下）:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.cache import TTLCache
+
+
+def make_cache(maxsize=10):
+    return TTLCache('test', maxsize=maxsize, ttl=60, negative_ttl=60)
+
+
+def test_get_or_load_caches_loaded_value():
+    cache = make_cache()
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        return {'id': key}
+
+    assert cache.get_or_load(1, loader) == {'id': 1}
+    assert cache.get_or_load(1, loader) == {'id': 1}
+    assert calls == [1]
+
+
+def test_invalidate_during_load_drops_stale_value():
+    cache = make_cache()
+
+    def loader(key):
+        # 加载期间另一个线程更新了物资状态并使缓存失效
+        cache.invalidate(key)
+        return {'id': key, 'status': 'stale'}
+
+    assert cache.get_or_load(1, loader) == {'id': 1, 'status': 'stale'}
+    assert cache.get(1) == (False, None)
+    assert cache.stats()['staleDrops'] == 1
+
+    # 失效之后开始的加载正常写入
+    assert cache.get_or_load(1, lambda key: {'id': key, 'status': 'fresh'})
+    assert cache.get(1) == (True, {'id': 1, 'status': 'fresh'})
+
+
+def test_invalidating_other_key_does_not_drop_value():
+    cache = make_cache()
+    version = cache.version()
+    cache.invalidate(2)
+    cache.set(1, 'value', version)
+    assert cache.get(1) == (True, 'value')
+
+
+def test_clear_during_load_drops_stale_value():
+    cache = make_cache()
+    version = cache.version()
+    cache.clear()
+    cache.set(1, 'value', version)
+    assert cache.get(1) == (False, None)
+
+
+def test_pruned_invalidation_records_stay_conservative():
+    cache = make_cache(maxsize=2)
+    version = cache.version()
+    for key in (1, 2, 3):
+        cache.invalidate(key)
+    # 键 1 的失效记录已被淘汰，仍按已失效处理
+    cache.set(1, 'value', version)
+    assert cache.get(1) == (False, None)
+    assert len(cache._invalidated) == 2
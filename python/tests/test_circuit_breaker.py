@@ -0,0 +1,174 @@
+"""
+熔断器状态转换测试（关闭 -> 打开 -> 半开 -> 关闭 / 打开，及半开试探调用被取消的情况）
+
+运行（在 python/ 目录下）:
+    python -m pytest -q tests
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import circuit_breaker
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_protected
+from services.deadline import DeadlineExceeded
+
+
+class FakeClock:
+    """替换 circuit_breaker 模块中的 time，手动推进 monotonic 时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class Client:
+    """被熔断器保护的客户端（同步 / 异步方法）"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+
+    @circuit_protected
+    def call(self, outcome=None):
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return 'ok'
+
+    @circuit_protected
+    async def call_async(self, delay=0, outcome=None):
+        await asyncio.sleep(delay)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return 'ok'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        'test_service', failure_threshold=3, recovery_timeout=30, half_open_max_calls=1, enabled=True
+    )
+
+
+def trip(client, times=3):
+    for _ in range(times):
+        with pytest.raises(RuntimeError):
+            client.call(RuntimeError('down'))
+
+
+def test_opens_after_consecutive_failures(breaker):
+    client = Client(breaker)
+    trip(client, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    trip(client, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.call()
+
+
+def test_success_resets_consecutive_failures(breaker):
+    client = Client(breaker)
+    trip(client, 2)
+    assert client.call() == 'ok'
+    trip(client, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_after_recovery_timeout_then_closes_on_success(breaker, clock):
+    client = Client(breaker)
+    trip(client)
+
+    clock.advance(29)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.advance(1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert client.call() == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert client.call() == 'ok'
+
+
+def test_half_open_failure_reopens(breaker, clock):
+    client = Client(breaker)
+    trip(client)
+    clock.advance(30)
+
+    with pytest.raises(RuntimeError):
+        client.call(RuntimeError('still down'))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.call()
+
+
+def test_half_open_limits_trial_calls(breaker, clock):
+    client = Client(breaker)
+    trip(client)
+    clock.advance(30)
+
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        client.call()
+    breaker.release()
+    assert client.call() == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_deadline_exceeded_releases_trial_call(breaker, clock):
+    client = Client(breaker)
+    trip(client)
+    clock.advance(30)
+
+    with pytest.raises(DeadlineExceeded):
+        client.call(DeadlineExceeded('budget used up'))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.call() == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_half_open_trial_releases_slot(breaker, clock):
+    client = Client(breaker)
+    trip(client)
+    clock.advance(30)
+
+    async def cancelled_trial():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.call_async(delay=1), 0.05)
+
+    asyncio.run(cancelled_trial())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker._half_open_calls == 0
+
+    assert asyncio.run(client.call_async()) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_sync_base_exception_releases_slot(breaker, clock):
+    client = Client(breaker)
+    trip(client)
+    clock.advance(30)
+
+    with pytest.raises(KeyboardInterrupt):
+        client.call(KeyboardInterrupt())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.call() == 'ok'
+
+
+def test_disabled_breaker_never_opens(clock):
+    client = Client(CircuitBreaker('disabled_service', failure_threshold=1, enabled=False))
+    trip(client, 5)
+    assert client.call() == 'ok'
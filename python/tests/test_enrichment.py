@@ -0,0 +1,51 @@
+"""
+列表 include=user,material 测试（同一页内的用户 / 物资去重后获取，下游失败时省略对应字段）
+"""
+
+
+def create(client, user_id, material_id):
+    response = client.post('/borrows', json={'userId': user_id, 'materialId': material_id})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['data']
+
+
+def test_include_fetches_each_user_and_material_once(client, users, materials):
+    for material_id in range(1, 7):
+        create(client, user_id=material_id % 2 + 1, material_id=material_id)
+    users.calls.clear()
+    materials.calls.clear()
+
+    response = client.get('/borrows?include=user,material&pageSize=10')
+    items = response.get_json()['data']['items']
+
+    assert len(items) == 6
+    assert sorted(users.calls) == [1, 2]
+    assert sorted(materials.calls) == [1, 2, 3, 4, 5, 6]
+    for item in items:
+        assert item['user'] == {'id': item['userId'], 'username': f"user{item['userId']}"}
+        assert item['material']['materialId'] == item['materialId']
+
+
+def test_include_omits_material_when_material_service_fails(client, materials):
+    create(client, user_id=1, material_id=1)
+    create(client, user_id=1, material_id=2)
+    materials.failing.add(2)
+
+    response = client.get('/borrows?include=user,material')
+    assert response.status_code == 200
+    items = {item['materialId']: item for item in response.get_json()['data']['items']}
+
+    assert items[1]['material']['materialId'] == 1
+    assert 'material' not in items[2]
+    assert items[2]['user']['id'] == 1
+
+
+def test_without_include_does_not_call_downstream(client, users, materials):
+    create(client, user_id=1, material_id=1)
+    users.calls.clear()
+    materials.calls.clear()
+
+    response = client.get('/borrows')
+    assert response.status_code == 200
+    assert 'user' not in response.get_json()['data']['items'][0]
+    assert users.calls == [] and materials.calls == []
@@ -0,0 +1,140 @@
+"""
+物资状态发件箱投递测试（领取 / 合并 / 重试，投递期间不持有事务，租约被接管时不覆盖结果）
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, MaterialStatusOutbox
+from services.outbox import OutboxDispatcher, outbox_events
+
+
+class MaterialClient:
+    """物资服务替身（on_deliver 在投递线程中调用，用于模拟投递期间的并发操作）"""
+
+    def __init__(self, app, failing=(), on_deliver=None):
+        self.app = app
+        self.failing = set(failing)
+        self.on_deliver = on_deliver
+        self.delivered = []
+
+    def update_material_status(self, material_id, status):
+        if self.on_deliver is not None:
+            with self.app.app_context():
+                self.on_deliver(material_id, status)
+        if material_id in self.failing:
+            raise Exception("物资服务不可用")
+        self.delivered.append((material_id, status))
+        return True
+
+
+@pytest.fixture
+def context(app, client):
+    with app.app_context():
+        yield
+
+
+def add_events(*updates):
+    events = outbox_events(updates)
+    db.session.add_all(events)
+    db.session.commit()
+    return [event.id for event in events]
+
+
+def statuses():
+    db.session.expire_all()
+    return {event.id: (event.status, event.attempts) for event in MaterialStatusOutbox.query}
+
+
+def test_dispatch_delivers_and_marks_sent(app, context):
+    ids = add_events((1, 1, 10), (2, 1, 11))
+    material_client = MaterialClient(app)
+    dispatcher = OutboxDispatcher(material_client)
+
+    assert dispatcher.dispatch_once() == 2
+    assert sorted(material_client.delivered) == [(1, 1), (2, 1)]
+    assert statuses() == {ids[0]: (MaterialStatusOutbox.STATUS_SENT, 1), ids[1]: (MaterialStatusOutbox.STATUS_SENT, 1)}
+    assert dispatcher.dispatch_once() == 0
+
+
+def test_dispatch_coalesces_to_latest_pending_event(app, context):
+    borrowed, returned = add_events((1, 1, 10), (1, 0, 10))
+    material_client = MaterialClient(app)
+
+    OutboxDispatcher(material_client).dispatch_once()
+
+    assert material_client.delivered == [(1, 0)]
+    assert statuses() == {
+        borrowed: (MaterialStatusOutbox.STATUS_SUPERSEDED, 0),
+        returned: (MaterialStatusOutbox.STATUS_SENT, 1)
+    }
+
+
+def test_failed_newer_event_does_not_supersede_pending_event(app, context):
+    pending, failed = add_events((1, 1, 10), (1, 0, 10))
+    db.session.get(MaterialStatusOutbox, failed).status = MaterialStatusOutbox.STATUS_FAILED
+    db.session.commit()
+    material_client = MaterialClient(app)
+
+    OutboxDispatcher(material_client).dispatch_once()
+
+    assert material_client.delivered == [(1, 1)]
+    assert statuses()[pending] == (MaterialStatusOutbox.STATUS_SENT, 1)
+
+
+def test_failed_delivery_retries_until_max_attempts(app, context):
+    event_id, = add_events((1, 1, 10))
+    dispatcher = OutboxDispatcher(MaterialClient(app, failing={1}), max_attempts=3, retry_base_delay=10)
+
+    dispatcher.dispatch_once()
+    event = db.session.get(MaterialStatusOutbox, event_id)
+    assert (event.status, event.attempts, event.last_error) == (MaterialStatusOutbox.STATUS_PENDING, 1, "物资服务不可用")
+    assert event.next_attempt_at > datetime.utcnow()
+    # 退避期间不会再次领取
+    assert dispatcher.dispatch_once() == 0
+
+    for _ in range(2):
+        db.session.get(MaterialStatusOutbox, event_id).next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        dispatcher.dispatch_once()
+
+    assert statuses()[event_id] == (MaterialStatusOutbox.STATUS_FAILED, 3)
+    assert dispatcher.stats()['process']['failed'] == 1
+
+
+def test_claim_is_committed_before_delivery(app, context):
+    event_id, other_id = add_events((1, 1, 10), (2, 1, 11))
+    observed = {}
+
+    def on_deliver(material_id, status):
+        if material_id != 1:
+            return
+        event = db.session.get(MaterialStatusOutbox, event_id)
+        observed['next_attempt_at'] = event.next_attempt_at
+        # 其他投递进程在租约到期前领取不到该事件
+        observed['claimed'] = OutboxDispatcher(MaterialClient(app)).dispatch_once()
+        # 投递期间没有未提交的写事务，其他连接可以写入
+        db.session.get(MaterialStatusOutbox, other_id).last_error = 'touched'
+        db.session.commit()
+
+    dispatcher = OutboxDispatcher(MaterialClient(app, on_deliver=on_deliver), batch_size=1, lease_seconds=120)
+    dispatcher.dispatch_once()
+
+    assert observed['next_attempt_at'] > datetime.utcnow() + timedelta(seconds=60)
+    assert observed['claimed'] == 1
+    assert statuses()[event_id] == (MaterialStatusOutbox.STATUS_SENT, 1)
+
+
+def test_result_is_not_recorded_after_lease_is_taken_over(app, context):
+    event_id, = add_events((1, 1, 10))
+
+    def on_deliver(material_id, status):
+        # 租约到期后被其他投递进程接管（next_attempt_at 已变为对方的租约）
+        db.session.get(MaterialStatusOutbox, event_id).next_attempt_at = datetime.utcnow() + timedelta(hours=1)
+        db.session.commit()
+
+    dispatcher = OutboxDispatcher(MaterialClient(app, on_deliver=on_deliver))
+    dispatcher.dispatch_once()
+
+    assert statuses()[event_id] == (MaterialStatusOutbox.STATUS_PENDING, 0)
+    assert dispatcher.stats()['process']['leaseLost'] == 1
@@ -0,0 +1,85 @@
+"""
+游标分页测试（按 (created_at, id) 倒序定位，相同创建时间按 ID 区分，翻页期间的新记录不影响后续页）
+"""
+from datetime import datetime, timedelta
+
+from models import db, BorrowRecord
+
+BASE_TIME = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def seed(app, specs):
+    """
+    写入借用记录
+
+    Args:
+        specs: [(user_id, created_at 相对 BASE_TIME 的分钟数)]，按顺序分配 ID
+
+    Returns:
+        list: 记录ID
+    """
+    with app.app_context():
+        records = [
+            BorrowRecord(
+                user_id=user_id, material_id=index + 1, quantity=1, status=BorrowRecord.STATUS_BORROWED,
+                borrowed_at=BASE_TIME, created_at=BASE_TIME + timedelta(minutes=minutes), updated_at=BASE_TIME
+            )
+            for index, (user_id, minutes) in enumerate(specs)
+        ]
+        db.session.add_all(records)
+        db.session.commit()
+        return [record.id for record in records]
+
+
+def walk(client, page_size, **filters):
+    """按 nextCursor 翻到最后一页，返回各页的记录ID"""
+    pages = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get('/borrows', query_string=dict(filters, pageSize=page_size, cursor=cursor))
+        assert response.status_code == 200, response.get_json()
+        data = response.get_json()['data']
+        assert 'total' not in data
+        pages.append([item['id'] for item in data['items']])
+        cursor = data['nextCursor']
+    return pages
+
+
+def test_cursor_pages_cover_all_records_in_order(app, client):
+    # 多条记录的创建时间相同，需要按 ID 区分位置
+    ids = seed(app, [(1, minutes) for minutes in (0, 1, 1, 1, 2, 3, 3)])
+    expected = [ids[6], ids[5], ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+    pages = walk(client, page_size=3)
+
+    assert pages == [expected[0:3], expected[3:6], expected[6:]]
+
+
+def test_last_full_page_has_no_next_cursor(app, client):
+    seed(app, [(1, minutes) for minutes in range(4)])
+    pages = walk(client, page_size=2)
+    assert [len(page) for page in pages] == [2, 2]
+
+
+def test_cursor_respects_filters(app, client):
+    ids = seed(app, [(user_id, minutes) for minutes, user_id in enumerate((1, 2, 1, 2, 1, 1))])
+
+    pages = walk(client, page_size=2, userId=1)
+
+    assert [record_id for page in pages for record_id in page] == [ids[5], ids[4], ids[2], ids[0]]
+
+
+def test_new_records_do_not_shift_following_pages(app, client):
+    ids = seed(app, [(1, minutes) for minutes in range(5)])
+
+    first = client.get('/borrows?pageSize=2&cursor=').get_json()['data']
+    seed(app, [(1, 60)])
+    second = client.get(f"/borrows?pageSize=2&cursor={first['nextCursor']}").get_json()['data']
+
+    assert [item['id'] for item in first['items']] == [ids[4], ids[3]]
+    assert [item['id'] for item in second['items']] == [ids[2], ids[1]]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get('/borrows?cursor=not-a-cursor')
+    assert response.status_code == 400
@@ -0,0 +1,121 @@
+"""
+响应缓存测试（写操作递增代数后旧条目不再命中，SQLite 后端跨实例共享代数，代数表超出上限时整体清空）
+"""
+import pytest
+
+from services.response_cache import (
+    ResponseCache, MemoryBackend, SQLiteBackend, ALL_BORROWS, borrow_dependency, user_dependency
+)
+
+MAX_BYTES = 1024 * 1024
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_backend(request, tmp_path):
+    """创建缓存后端（sqlite 后端的多个实例共享同一文件，相当于同一主机上的多个 worker）"""
+    def make(max_generations=None):
+        if request.param == 'memory':
+            return MemoryBackend(MAX_BYTES, max_generations)
+        return SQLiteBackend(str(tmp_path / 'cache.sqlite3'), MAX_BYTES, max_generations)
+    return make
+
+
+def store(cache, route, variant, dependencies, body=b'{}'):
+    cached, token = cache.lookup(route, variant, dependencies)
+    assert cached is None
+    cache.store(token, body)
+
+
+def hit(cache, route, variant, dependencies):
+    cached, _ = cache.lookup(route, variant, dependencies)
+    return cached is not None
+
+
+def test_invalidate_bumps_only_affected_dependencies(make_backend):
+    cache = ResponseCache(backend=make_backend(), enabled=True)
+    record = ('/borrows/<int:id>', (('id', 1),), [borrow_dependency(1)])
+    user_list = ('/borrows', (('userId', 1),), [user_dependency(1)])
+    other_list = ('/borrows', (('userId', 2),), [user_dependency(2)])
+    all_list = ('/borrows', (), [ALL_BORROWS])
+    for entry in (record, user_list, other_list, all_list):
+        store(cache, *entry)
+        assert hit(cache, *entry)
+
+    # 记录 1（用户 1、物资 5）被修改
+    cache.invalidate([(1, (1, 5, 0), (1, 5, 1))])
+
+    assert not hit(cache, *record)
+    assert not hit(cache, *user_list)
+    assert not hit(cache, *all_list)
+    assert hit(cache, *other_list)
+
+
+def test_invalidate_covers_user_before_and_after_change(make_backend):
+    cache = ResponseCache(backend=make_backend(), enabled=True)
+    old_owner = ('/borrows', (('userId', 1),), [user_dependency(1)])
+    new_owner = ('/borrows', (('userId', 2),), [user_dependency(2)])
+    store(cache, *old_owner)
+    store(cache, *new_owner)
+
+    cache.invalidate([(1, (1, 5, 0), (2, 5, 0))])
+
+    assert not hit(cache, *old_owner)
+    assert not hit(cache, *new_owner)
+
+
+def test_sqlite_backend_shares_generations_between_instances(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    first = ResponseCache(backend=SQLiteBackend(path, MAX_BYTES), enabled=True)
+    second = ResponseCache(backend=SQLiteBackend(path, MAX_BYTES), enabled=True)
+    entry = ('/borrows/<int:id>', (('id', 1),), [borrow_dependency(1)])
+
+    store(first, *entry)
+    assert hit(second, *entry)
+
+    second.invalidate([(1, None, (1, 5, 0))])
+    assert not hit(first, *entry)
+
+
+def test_generation_table_is_bounded_and_never_reuses_generations(make_backend):
+    backend = make_backend(max_generations=3)
+    cache = ResponseCache(backend=backend, enabled=True)
+    entry = ('/borrows/<int:id>', (('id', 1),), [borrow_dependency(1)])
+    store(cache, *entry)
+    seen = {backend.generations([borrow_dependency(1)])}
+
+    for record_id in range(1, 6):
+        cache.invalidate([(record_id, None, (record_id, record_id, 0))])
+        seen.add(backend.generations([borrow_dependency(1)]))
+        assert backend.stats()['generations'] <= 3
+
+    # 清空后代数取自单调递增序列，不会回到清空前发出过的值
+    assert len(seen) == 6
+    assert backend.stats()['resets'] >= 1
+    assert not hit(cache, *entry)
+
+
+def test_get_borrow_is_cached_until_record_changes(client):
+    record_id = client.post('/borrows', json={'userId': 1, 'materialId': 1}).get_json()['data']['id']
+
+    first = client.get(f'/borrows/{record_id}')
+    second = client.get(f'/borrows/{record_id}')
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+
+    assert client.put(f'/borrows/{record_id}', json={'remark': 'changed'}).status_code == 200
+    third = client.get(f'/borrows/{record_id}')
+    assert third.headers['X-Cache'] == 'MISS'
+    assert third.get_json()['data']['remark'] == 'changed'
+
+
+def test_filtered_list_is_invalidated_only_by_matching_writes(client):
+    client.post('/borrows', json={'userId': 1, 'materialId': 1})
+    assert client.get('/borrows?userId=1').headers['X-Cache'] == 'MISS'
+    assert client.get('/borrows?userId=1').headers['X-Cache'] == 'HIT'
+
+    client.post('/borrows', json={'userId': 2, 'materialId': 2})
+    assert client.get('/borrows?userId=1').headers['X-Cache'] == 'HIT'
+
+    client.post('/borrows', json={'userId': 1, 'materialId': 3})
+    response = client.get('/borrows?userId=1')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert sorted(item['materialId'] for item in response.get_json()['data']['items']) == [1, 3]
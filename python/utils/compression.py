@@ -0,0 +1,224 @@
+import zlib
+from flask import request
+from werkzeug.http import parse_accept_header
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时只支持 gzip
+    brotli = None
+
+# 需要压缩的内容类型（前缀匹配）
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/javascript', 'text/')
+
+# 不压缩的状态码（无响应体或分段响应）
+SKIPPED_STATUSES = (204, 206, 304)
+
+
+def available_encodings():
+    """服务端支持的编码（按 COMPRESSION_ENCODINGS 的优先顺序，未安装 brotli 时不含 br）"""
+    return [
+        encoding for encoding in Config.COMPRESSION_ENCODINGS
+        if encoding == 'gzip' or (encoding == 'br' and brotli is not None)
+    ]
+
+
+def negotiate(accept_encoding):
+    """
+    根据 Accept-Encoding 选择编码
+
+    Args:
+        accept_encoding: Accept-Encoding 请求头（支持 q 值，q=0 表示不接受）
+
+    Returns:
+        str: gzip / br，客户端不接受任何可用编码时为 None
+    """
+    if not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding).best_match(available_encodings())
+
+
+def compress(data, encoding):
+    """
+    压缩完整响应体
+
+    Args:
+        data: bytes
+        encoding: gzip / br
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(Config.COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def stream_compressor(encoding):
+    """
+    增量压缩器（每块同步刷新）
+
+    Args:
+        encoding: gzip / br
+
+    Returns:
+        tuple: (process, finish)，process(chunk) 返回该块压缩后的数据，finish() 返回结尾数据
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=Config.COMPRESSION_BROTLI_QUALITY)
+        return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+
+    compressor = zlib.compressobj(Config.COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+def compress_stream(chunks, encoding):
+    """
+    流式压缩（每块同步刷新，客户端可边下载边解压）
+
+    Args:
+        chunks: 可迭代的 bytes
+        encoding: gzip / br
+
+    Yields:
+        bytes: 压缩后的数据块
+    """
+    process, finish = stream_compressor(encoding)
+    for chunk in chunks:
+        yield process(chunk)
+    yield finish()
+
+
+def is_compressible(status_code, content_type, content_encoding=None):
+    """响应是否需要按 Accept-Encoding 协商压缩（已编码、无响应体或非文本类型的响应不压缩）"""
+    if content_encoding or status_code < 200 or status_code in SKIPPED_STATUSES:
+        return False
+    return (content_type or '').lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def init_app(app):
+    """为 Flask 应用注册响应压缩（普通响应按 COMPRESSION_MIN_SIZE 过滤，流式响应逐块压缩）"""
+
+    @app.after_request
+    def _compress_response(response):
+        if response.direct_passthrough or not is_compressible(
+            response.status_code, response.content_type, response.headers.get('Content-Encoding')
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < Config.COMPRESSION_MIN_SIZE:
+                return response
+            response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class CompressionMiddleware:
+    """
+    ASGI 响应压缩中间件（asgi.py 原生异步路由使用，与 init_app 的协商和过滤规则一致）
+
+    完整响应按 COMPRESSION_MIN_SIZE 过滤后整体压缩，分段发送的响应逐块压缩。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ', '.join(
+            value.decode('latin-1') for name, value in scope['headers'] if name == b'accept-encoding'
+        )
+        encoding = negotiate(accept_encoding)
+        state = {'start': None, 'process': None, 'finish': None, 'passthrough': False}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                headers = _ResponseHeaders(message['headers'])
+                if not is_compressible(message['status'], headers.get('content-type'), headers.get('content-encoding')):
+                    state['passthrough'] = True
+                    await send(message)
+                    return
+                headers.add_vary('Accept-Encoding')
+                message['headers'] = headers.raw
+                if encoding is None:
+                    state['passthrough'] = True
+                    await send(message)
+                    return
+                # 等到第一块响应体再决定是否压缩
+                state['start'] = message
+                return
+
+            if message['type'] != 'http.response.body' or state['passthrough']:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            start = state['start']
+            if start is not None:
+                state['start'] = None
+                headers = _ResponseHeaders(start['headers'])
+                if not more_body:
+                    # 完整响应
+                    if len(body) >= Config.COMPRESSION_MIN_SIZE:
+                        body = compress(body, encoding)
+                        headers.set('content-encoding', encoding)
+                        headers.set('content-length', str(len(body)))
+                        start['headers'] = headers.raw
+                        message['body'] = body
+                    await send(start)
+                    await send(message)
+                    return
+                # 分段响应
+                state['process'], state['finish'] = stream_compressor(encoding)
+                headers.set('content-encoding', encoding)
+                headers.remove('content-length')
+                start['headers'] = headers.raw
+                await send(start)
+
+            message['body'] = state['process'](body) if body else b''
+            if not more_body:
+                message['body'] += state['finish']()
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class _ResponseHeaders:
+    """ASGI 原始响应头（[(name, value), ...] bytes 列表）的读写"""
+
+    def __init__(self, raw):
+        self.raw = list(raw)
+
+    def get(self, name):
+        key = name.encode('latin-1')
+        for header, value in self.raw:
+            if header.lower() == key:
+                return value.decode('latin-1')
+        return None
+
+    def remove(self, name):
+        key = name.encode('latin-1')
+        self.raw = [(header, value) for header, value in self.raw if header.lower() != key]
+
+    def set(self, name, value):
+        self.remove(name)
+        self.raw.append((name.encode('latin-1'), value.encode('latin-1')))
+
+    def add_vary(self, value):
+        current = self.get('vary')
+        if current is None:
+            self.set('vary', value)
+        elif value.lower() not in [item.strip().lower() for item in current.split(',')]:
+            self.set('vary', f'{current}, {value}')
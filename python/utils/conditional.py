@@ -0,0 +1,61 @@
+import hashlib
+from datetime import timezone
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
+
+
+def record_etag(record_id, updated_at):
+    """单条记录的 ETag（由 id 和 updated_at 生成）"""
+    return f"{record_id}-{updated_at:%Y%m%d%H%M%S%f}"
+
+
+def fingerprint_etag(*parts):
+    """
+    列表结果的 ETag（对决定响应内容的各部分取摘要）
+
+    Args:
+        parts: 可 repr 的值，例如分页参数、总数及本页各记录的 (id, updated_at)
+    """
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def has_validators(headers):
+    """请求是否携带 If-None-Match / If-Modified-Since"""
+    return bool(headers.get('If-None-Match') or headers.get('If-Modified-Since'))
+
+
+def is_not_modified(headers, etag, last_modified=None):
+    """
+    判断客户端缓存是否仍然有效（If-None-Match 优先于 If-Modified-Since）
+
+    Args:
+        headers: 请求头（Flask / Starlette 均可）
+        etag: 当前资源的 ETag（不含引号）
+        last_modified: 当前资源的最后修改时间（UTC，无时区）
+    """
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        # 响应体包含生成时间戳，按弱校验比较
+        return parse_etags(if_none_match).contains_weak(etag)
+
+    if last_modified is not None:
+        if_modified_since = parse_date(headers.get('If-Modified-Since'))
+        if if_modified_since is not None:
+            # HTTP 日期精度为秒
+            return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= if_modified_since
+    return False
+
+
+def validator_headers(etag, last_modified=None):
+    """
+    条件请求相关的响应头（200 与 304 响应均携带）
+
+    Returns:
+        dict: ETag（弱校验）、Last-Modified 及 Cache-Control: no-cache（使用缓存前须重新验证）
+    """
+    headers = {
+        'ETag': quote_etag(etag, weak=True),
+        'Cache-Control': 'no-cache'
+    }
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified.replace(tzinfo=timezone.utc))
+    return headers
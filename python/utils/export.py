@@ -0,0 +1,68 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from utils.json_codec import dumps
+
+
+def _format_value(value):
+    """导出字段值格式化：时间转 ISO 8601 字符串"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_stream(fields, batches):
+    """
+    按批生成 NDJSON（每行一个 JSON 对象）
+
+    Args:
+        fields: 字段名列表，与行元组顺序一致
+        batches: 可迭代的行元组批次
+
+    Yields:
+        bytes: 一批行对应的 NDJSON 文本
+    """
+    for rows in batches:
+        yield b''.join(dumps(dict(zip(fields, row))) + b'\n' for row in rows)
+
+
+def csv_stream(fields, batches):
+    """
+    按批生成 CSV（首行为表头，空值输出为空字符串）
+
+    Args:
+        fields: 字段名列表，与行元组顺序一致
+        batches: 可迭代的行元组批次
+
+    Yields:
+        bytes: 表头或一批行对应的 CSV 文本
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fields)
+    yield buffer.getvalue().encode('utf-8')
+
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_format_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_stream(chunks, level=6):
+    """
+    对字节流做流式 gzip 压缩（每块同步刷新，客户端可边下载边解压）
+
+    Args:
+        chunks: 可迭代的 bytes
+        level: 压缩级别 1-9
+
+    Yields:
+        bytes: gzip 压缩后的数据块
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
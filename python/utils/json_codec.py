@@ -0,0 +1,101 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退到标准库
+    orjson = None
+
+
+def _default(obj):
+    """编码器无法直接处理的类型"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibCodec:
+    """标准库 json 编码（紧凑格式，UTF-8 输出）"""
+
+    name = 'json'
+
+    @staticmethod
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """orjson 编码（C 实现，原生序列化 datetime）"""
+
+    name = 'orjson'
+
+    @staticmethod
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+CODECS = {
+    'json': StdlibCodec,
+    'orjson': OrjsonCodec
+}
+
+
+def get_codec(name=None):
+    """
+    按名称获取编码器
+
+    Args:
+        name: json / orjson / auto，默认读取 Config.JSON_ENCODER；auto 时优先使用 orjson
+
+    Raises:
+        ValueError: 编码器名称不正确或依赖未安装
+    """
+    name = (name or Config.JSON_ENCODER).lower()
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    if name not in CODECS:
+        raise ValueError(f"不支持的 JSON 编码器: {name}")
+    if name == 'orjson' and orjson is None:
+        raise ValueError("JSON_ENCODER=orjson 需要安装 orjson")
+    return CODECS[name]
+
+
+# 当前使用的编码器
+codec = get_codec()
+
+
+def dumps(obj):
+    """将对象编码为 JSON 字节串"""
+    return codec.dumps(obj)
+
+
+def loads(data):
+    """解析 JSON 字符串或字节串"""
+    return codec.loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON 提供者：jsonify 及所有响应工具函数统一使用当前编码器，直接输出字节串"""
+
+    def dumps(self, obj, **kwargs):
+        return codec.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(codec.dumps(obj), mimetype='application/json')
@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at, record_id):
+    """
+    将 (created_at, id) 编码为不透明游标
+
+    Args:
+        created_at: 记录创建时间
+        record_id: 记录ID
+
+    Returns:
+        str: URL 安全的 base64 字符串
+    """
+    raw = json.dumps([created_at.isoformat(), record_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor 生成的游标字符串
+
+    Returns:
+        tuple: (created_at, id)
+
+    Raises:
+        ValueError: 游标格式不正确
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at_str, record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at = datetime.fromisoformat(created_at_str)
+    except Exception:
+        raise ValueError("cursor 格式不正确")
+
+    if not isinstance(record_id, int):
+        raise ValueError("cursor 格式不正确")
+    return created_at, record_id
@@ -1,10 +1,11 @@
 from flask import jsonify
+from utils import json_codec
 from datetime import datetime
 
 
-def make_response(code=200, message="success", data=None):
+def build_payload(code=200, message="success", data=None):
     """
-    统一响应格式封装
+    构造统一响应体
     
     Args:
         code: 业务状态码
@@ -12,14 +13,43 @@ def make_response(code=200, message="success", data=None):
         data: 具体数据对象或数组
     
     Returns:
-        (response, http_status_code)
+        (payload, http_status_code)
     """
-    return jsonify({
+    return {
         "code": code,
         "message": message,
         "data": data,
-        "timestamp": datetime.utcnow().isoformat()
-    }), code if code < 600 else 500
+        "timestamp": datetime.utcnow()
+    }, code if code < 600 else 500
+
+
+def success_payload(data):
+    """
+    用已序列化的 data 拼接成功响应体（与 build_payload 的字段顺序一致，data 无需重新序列化）
+    
+    Args:
+        data: JSON 字节串
+    
+    Returns:
+        bytes: 完整响应体
+    """
+    return b'{"code":200,"message":"success","data":' + data + b',"timestamp":' + json_codec.dumps(datetime.utcnow()) + b'}'
+
+
+def make_response(code=200, message="success", data=None):
+    """
+    统一响应格式封装
+    
+    Args:
+        code: 业务状态码
+        message: 人类可读信息
+        data: 具体数据对象或数组
+    
+    Returns:
+        (response, http_status_code)
+    """
+    payload, status = build_payload(code=code, message=message, data=data)
+    return jsonify(payload), status
 
 
 def success_response(data=None, message="success", code=200):
@@ -47,6 +77,16 @@ def conflict_response(message="业务冲突"):
     return make_response(code=409, message=message, data=None)
 
 
+def service_unavailable_response(message="服务暂不可用"):
+    """依赖服务不可用响应 (503)"""
+    return make_response(code=503, message=message, data=None)
+
+
+def gateway_timeout_response(message="依赖服务响应超时"):
+    """依赖服务超时响应 (504)"""
+    return make_response(code=504, message=message, data=None)
+
+
 def internal_error_response(message="服务器内部错误"):
     """服务器内部错误响应 (500)"""
     return make_response(code=500, message=message, data=None)